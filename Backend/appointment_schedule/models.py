@@ -41,6 +41,9 @@ class Appointment(models.Model):
     class Meta:
         unique_together = ('date', 'time_slot')
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['date', 'created_at'], name='schedule_date_created_idx'),
+        ]
 
     def __str__(self):
         return f"Appointment on {self.date} at {self.time_slot}"
\ No newline at end of file
@@ -46,6 +46,7 @@ AUTH_USER_MODEL = 'clients.Client'
 
 
 MIDDLEWARE = [
+    'utils.request_metrics.RequestMetricsMiddleware', #<----- QUERY COUNTS, SERVER-TIMING, SLOW REQUEST LOG
     'corsheaders.middleware.CorsMiddleware', #<----- CORSMIDDLEWARE
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -146,9 +147,124 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'utils.request_metrics.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 # JWE SETTINGS
 JWE_ALGORITHM = 'A256GCM'
 JWE_ENCRYPTION = 'A256GCMKW'
-JWE_SECRET_KEY = os.getenv('JWE_SECRET_KEY', 'abHFngAxgJMLmCAFqjpHmMpMj3-bR46jizpagzmTkX0=')
\ No newline at end of file
+JWE_SECRET_KEY = os.getenv('JWE_SECRET_KEY', 'abHFngAxgJMLmCAFqjpHmMpMj3-bR46jizpagzmTkX0=')
+# Comma separated keys that were rotated out; tokens they issued stay valid until they expire
+JWE_PREVIOUS_SECRET_KEYS = [key for key in os.getenv('JWE_PREVIOUS_SECRET_KEYS', '').split(',') if key]
+# Personnel are authorized from their token's claims alone, so keep these short lived
+PERSONNEL_TOKEN_HOURS = 12
+
+# APPOINTMENT BOOKING
+# Default number of appointments per date; individual dates can be changed in the admin
+APPOINTMENT_DAILY_CAPACITY = 10
+
+# FEEDBACK ENRICHMENT (translation + sentiment, see `manage.py process_feedback_queue`)
+# Use 'client_appointments.feedback.StubTranslator' to run the worker without network access
+FEEDBACK_TRANSLATOR = os.getenv('FEEDBACK_TRANSLATOR', 'client_appointments.feedback.GoogleTranslator')
+FEEDBACK_ENRICHMENT_MAX_ATTEMPTS = 5
+FEEDBACK_ENRICHMENT_RETRY_DELAY = 30  # seconds, doubled after every failed attempt
+FEEDBACK_ENRICHMENT_RATE = 5  # tasks per second per worker, 0 for no limit
+FEEDBACK_SENTIMENT_POSITIVE_THRESHOLD = 0.05  # VADER compound score; re-run `manage.py rescore_feedback` after changing
+FEEDBACK_SENTIMENT_NEGATIVE_THRESHOLD = -0.05
+
+# TRANSLATION CACHE (see `manage.py translation_cache`)
+TRANSLATION_CACHE_MEMORY_ENTRIES = 5000  # per process LRU
+TRANSLATION_CACHE_MAX_ROWS = 100000
+TRANSLATION_CACHE_MAX_AGE_DAYS = 180  # since last use
+
+# OFFLINE LANGUAGE IDENTIFICATION (see `manage.py benchmark_langid`)
+# Below this confidence the remote translator detects the language itself
+FEEDBACK_LANGID_MIN_CONFIDENCE = 0.9
+
+# CACHING
+# Per-process by default. Point this at a shared backend (Redis/Memcached) so the
+# dashboard snapshot and its single-flight refresh lock are shared by all workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+DASHBOARD_STATS_TTL = 60  # seconds a dashboard_stats snapshot is served before a refresh
+
+# RESUMABLE ATTACHMENT UPLOADS
+# Part files of uploads in progress; kept outside MEDIA_ROOT so they are never served
+UPLOAD_SESSION_DIR = os.path.join(BASE_DIR, 'upload_sessions')
+UPLOAD_CHUNK_MAX_SIZE = 8 * 1024 * 1024  # 8MB per PUT, streamed to disk
+ATTACHMENT_MAX_SIZE = 200 * 1024 * 1024  # 200MB per file
+
+# ATTACHMENT DOWNLOADS
+# Set to 'X-Accel-Redirect' (nginx) or 'X-Sendfile' (Apache) to let the front proxy
+# send attachment bodies. For nginx, ATTACHMENT_SENDFILE_PREFIX must be an
+# internal location aliased to MEDIA_ROOT.
+ATTACHMENT_SENDFILE_HEADER = os.getenv('ATTACHMENT_SENDFILE_HEADER') or None
+ATTACHMENT_SENDFILE_PREFIX = '/protected-media/'
+
+# SMS (SEMAPHORE)
+SEMAPHORE_API_KEY = os.getenv('SEMAPHORE_API_KEY', '')
+SEMAPHORE_SENDER_NAME = os.getenv('SEMAPHORE_SENDER_NAME', '')
+# Point at a local fake server (manage.py fake_sms_server) to exercise the dispatcher
+SEMAPHORE_URL = os.getenv('SEMAPHORE_URL', 'https://api.semaphore.co/api/v4/messages')
+SMS_TIMEOUT = 10  # seconds per request to the gateway
+SMS_MAX_ATTEMPTS = 6
+SMS_RETRY_DELAY = 30  # seconds before the first retry, doubled on each attempt
+
+# AUTHENTICATION TOKEN CACHE
+# Verified tokens and their users are kept in each worker for a short time so
+# authenticated requests skip decryption and the user query
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_CACHE_TTL = 60  # seconds; also how long other workers may see a stale user
+
+# PASSWORD HASHING POOL
+# Logins and registrations hash on a small dedicated pool; when it and its queue
+# are full, they get an immediate 503 instead of starving every other endpoint.
+# Each running or queued hash parks a request thread, so keep
+# WORKERS + QUEUE_SIZE well below the request threads per server process
+PASSWORD_HASH_WORKERS = 2
+PASSWORD_HASH_QUEUE_SIZE = 2
+PASSWORD_HASH_TIMEOUT = 3  # seconds a request waits for its hash
+
+# CLIENT AUTOCOMPLETE
+# Each worker keeps a prefix index of active clients, patched by signals for its
+# own saves and rebuilt from the database after this many seconds for everyone else's
+CLIENT_AUTOCOMPLETE_MAX_AGE = 300
+
+# CSV/XLSX EXPORTS (utils/export.py): rows read per keyset query while streaming
+EXPORT_BATCH_SIZE = 2000
+
+# REQUEST METRICS (utils/request_metrics.py)
+# Every response gets a Server-Timing header; requests over either limit are
+# logged as one JSON line on the request_metrics logger
+REQUEST_METRICS_SERVER_TIMING = True
+REQUEST_METRICS_SLOW_MS = 500
+REQUEST_METRICS_SLOW_QUERIES = 50
+
+# METRICS (utils/metrics.py), served at /metrics
+# With several workers, point METRICS_MULTIPROCESS_DIR at a directory they all
+# share (emptied on every restart) so a scrape adds up every process
+METRICS_MULTIPROCESS_DIR = os.getenv('METRICS_MULTIPROCESS_DIR') or None
+METRICS_FLUSH_INTERVAL = 5
+# Scrapes must send "Authorization: Bearer <token>"; without a token /metrics
+# answers 403 unless DEBUG is on
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'request_metrics': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'request_metrics': {'handlers': ['request_metrics'], 'level': 'WARNING', 'propagate': False},
+    },
+}
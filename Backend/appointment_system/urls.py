@@ -4,6 +4,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from utils.metrics import metrics_view
 #----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
 #---PROJECT URLS-------------------------------------------------------------------------------------------------------------------------------------------------------------------
@@ -13,6 +14,9 @@ urlpatterns = [
     # FOR DJANGO ADMIN
     path('admin/', admin.site.urls),
 
+    # PROMETHEUS SCRAPE TARGET
+    path('metrics', metrics_view, name='metrics'),
+
     # CLIENT URLS
     path('api/clients/', include('clients.urls')),
         # CLIENT APPOINTMENTS URLS
@@ -22,8 +26,8 @@ urlpatterns = [
     # path('api/personnel/', include('personnel.urls')),
        path('api/', include('appointment_schedule.urls')),
 path('api/', include('appointment_nature.urls')),
-    # APPOINTMENT URLS
-  path('api/client_appointments/', include('client_appointments.urls')),
+    # APPOINTMENT URLS (older mount of the same views; namespaced so reverse() names the api/ one)
+  path('api/client_appointments/', include(('client_appointments.urls', 'client_appointments'), namespace='client_appointments_legacy')),
 ]
 
 # SERVES MEDIA FILES FOR DEVELOPMENT / DEBUG
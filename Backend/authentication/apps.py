@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authentication'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from utils.metrics import register_cache
+        from .token_cache import token_cache
+        register_cache('auth_token', token_cache.stats)
@@ -3,9 +3,31 @@ from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from django.contrib.auth import get_user_model
 from .jwe_utils import jwe_manager
+from .token_cache import token_cache
 
 User = get_user_model()
 
+
+class PersonnelPrincipal:
+    """request.user for a personnel token, built from its claims without touching the database"""
+    
+    is_authenticated = True
+    is_anonymous = False
+    is_active = True
+    is_staff = True
+    user_type = 'personnel'
+    
+    def __init__(self, payload):
+        self.id = self.pk = payload['user_id']
+        self.username = payload['username']
+        self.position = payload.get('position')
+        self.role = payload.get('role', 'staff')
+        self.claims = payload
+    
+    def __str__(self):
+        return self.username
+
+
 class JWEAuthentication(BaseAuthentication):
     
     def authenticate(self, request):
@@ -15,16 +37,28 @@ class JWEAuthentication(BaseAuthentication):
             return None
         
         token = auth_header.split(' ')[1]
+        
+        # Fast path: token already verified and its user loaded recently
+        cached = token_cache.get(token)
+        if cached is not None:
+            return (cached[0], token)
+        
         payload = jwe_manager.verify_token(token)
         
         if not payload:
             raise AuthenticationFailed('Invalid or expired token')
         
+        # Personnel tokens carry everything needed for authorization
+        if payload.get('user_type') == 'personnel':
+            return (PersonnelPrincipal(payload), token)
+        
+        generation = token_cache.generation(payload['user_id'])
         try:
             user = User.objects.get(id=payload['user_id'])
             if not user.is_active:
                 raise AuthenticationFailed('User account is disabled')
             
+            token_cache.set(token, user, payload, generation)
             return (user, token)
         except User.DoesNotExist:
-            raise AuthenticationFailed('User not found')
\ No newline at end of file
+            raise AuthenticationFailed('User not found')
@@ -0,0 +1,92 @@
+# backend/authentication/hashing.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class HashPoolBusy(Exception):
+    """Too many password hashes queued; the caller should answer 503 with Retry-After"""
+
+
+class PasswordHashPool:
+    """Small dedicated thread pool for password hashing.
+
+    PBKDF2 is deliberately slow (and hashlib releases the GIL while running
+    it), so logins are limited to `workers` hashes at a time instead of one
+    per request thread. At most `queue_size` more may wait; beyond that
+    callers get HashPoolBusy straight away rather than tying up a worker
+    that other endpoints need.
+
+    Every caller holding a slot is a request thread parked in
+    future.result(), so `workers + queue_size` must stay well below the
+    server's request threads per process, and `timeout` only a few hash
+    durations long.
+    """
+
+    def __init__(self, workers=None, queue_size=None, timeout=None):
+        self.workers = workers or getattr(settings, 'PASSWORD_HASH_WORKERS', 2)
+        queue_size = queue_size if queue_size is not None else getattr(settings, 'PASSWORD_HASH_QUEUE_SIZE', 2)
+        self.timeout = timeout or getattr(settings, 'PASSWORD_HASH_TIMEOUT', 3)
+        self._slots = threading.BoundedSemaphore(self.workers + queue_size)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self):
+        # Created on first use so importing this module starts no threads
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+        return self._executor
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashPoolBusy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Still counted against the queue until it finishes
+            raise HashPoolBusy()
+
+
+def _verify(raw_password, encoded):
+    """(is_correct, new_encoded); new_encoded is set when the stored hash should be upgraded"""
+    upgraded = []
+    is_correct = hashers.check_password(
+        raw_password,
+        encoded,
+        setter=lambda raw: upgraded.append(hashers.make_password(raw))
+    )
+    return is_correct, upgraded[0] if upgraded else None
+
+
+def check_password(user, raw_password):
+    """user.check_password() run on the hash pool.
+
+    A correct password stored with an outdated hasher or iteration count is
+    rehashed in the pool and written back, so hashes upgrade transparently
+    as people log in. Raises HashPoolBusy when the pool is saturated.
+    """
+    is_correct, new_encoded = hash_pool.run(_verify, raw_password, user.password)
+    if is_correct and new_encoded:
+        user.password = new_encoded
+        # Only the hash changes; skip save() so signals don't treat it as a profile edit
+        type(user).objects.filter(pk=user.pk).update(password=new_encoded)
+    return is_correct
+
+
+def make_password(raw_password):
+    """hashers.make_password() run on the hash pool; raises HashPoolBusy when saturated"""
+    return hash_pool.run(hashers.make_password, raw_password)
+
+
+# GLOBAL INSTANCE FOR USEABILITY
+hash_pool = PasswordHashPool()
@@ -1,7 +1,7 @@
 #---imports------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 import json
 from datetime import datetime, timedelta
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.backends import default_backend
@@ -13,11 +13,14 @@ from django.conf import settings
 #---TOKEN UTIL---------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
 class JWETokenManager:
-    def __init__(self):
-        self.secret_key = settings.JWE_SECRET_KEY.encode()
-        self.cipher_suite = self._get_cipher_suite()
+    def __init__(self, secret_keys=None):
+        # KEY ROTATION: THE FIRST KEY SIGNS NEW TOKENS, EVERY KEY IS ACCEPTED WHEN VERIFYING
+        if secret_keys is None:
+            secret_keys = [settings.JWE_SECRET_KEY, *getattr(settings, 'JWE_PREVIOUS_SECRET_KEYS', [])]
+        self.secret_key = secret_keys[0].encode()
+        self.cipher_suite = MultiFernet([self._get_cipher_suite(key.encode()) for key in secret_keys])
     
-    def _get_cipher_suite(self):
+    def _get_cipher_suite(self, secret_key):
         
         # GENERATES FERNET KEY using SECRET KEY
         kdf = PBKDF2HMAC(
@@ -27,15 +30,16 @@ class JWETokenManager:
             iterations=100000,
             backend=default_backend()
         )
-        key = base64.urlsafe_b64encode(kdf.derive(self.secret_key))
+        key = base64.urlsafe_b64encode(kdf.derive(secret_key))
         return Fernet(key)
     
-    def create_token(self, user_id, username, expires_in_hours=24):
+    def create_token(self, user_id, username, expires_in_hours=24, **claims):
         
-        # GENERATES TOKEN FOR USER
+        # GENERATES TOKEN FOR USER; EXTRA CLAIMS (user_type, position, role) ARE EMBEDDED AS-IS
         expiry = datetime.utcnow() + timedelta(hours=expires_in_hours)
         
         payload = {
+            **claims,
             'user_id': user_id,
             'username': username,
             'exp': expiry.timestamp(),
@@ -0,0 +1,83 @@
+# authentication/management/commands/benchmark_login_storm.py
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Measure latency of a non-auth endpoint on a running server, first idle and then '
+            'while many clients log in at once')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--username', required=True, help='Client account used for the logins')
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--login-url', default='/api/clients/login/')
+        parser.add_argument('--probe-url', default='/api/client-appointments/full_dates/',
+                            help='Endpoint whose latency should stay flat')
+        parser.add_argument('--concurrency', type=int, default=50, help='Simultaneous login clients')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per phase')
+
+    def handle(self, *args, **options):
+        base_url = options['base_url'].rstrip('/')
+        probe_url = base_url + options['probe_url']
+
+        self.stdout.write(f'Idle phase ({options["duration"]:.0f}s)...')
+        idle = self.probe(probe_url, options['duration'], threading.Event())
+
+        self.stdout.write(f'Login storm with {options["concurrency"]} clients ({options["duration"]:.0f}s)...')
+        stop = threading.Event()
+        statuses = Counter()
+        login_times = []
+        lock = threading.Lock()
+
+        def log_in():
+            session = requests.Session()
+            payload = {'username': options['username'], 'password': options['password']}
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    code = session.post(base_url + options['login_url'], json=payload, timeout=30).status_code
+                except requests.RequestException:
+                    code = 'error'
+                with lock:
+                    statuses[code] += 1
+                    login_times.append((time.perf_counter() - started) * 1000)
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            for _ in range(options['concurrency']):
+                pool.submit(log_in)
+            time.sleep(0.5)  # let the storm build up before measuring
+            storm = self.probe(probe_url, options['duration'], stop)
+            stop.set()
+
+        self.report('Probe, idle', idle)
+        self.report('Probe, during storm', storm)
+        self.report('Logins', sorted(login_times))
+        self.stdout.write('Login responses: ' + ', '.join(f'{code}={count}' for code, count in sorted(statuses.items(), key=str)))
+
+    def probe(self, url, duration, stop):
+        session = requests.Session()
+        timings = []
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline and not stop.is_set():
+            started = time.perf_counter()
+            session.get(url, timeout=30)
+            timings.append((time.perf_counter() - started) * 1000)
+        return sorted(timings)
+
+    def report(self, label, timings):
+        if not timings:
+            self.stdout.write(f'{label}: no samples')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'{label}: {len(timings)} request(s), p50 {self.percentile(timings, 50):.1f}ms, '
+            f'p99 {self.percentile(timings, 99):.1f}ms, max {timings[-1]:.1f}ms'
+        ))
+
+    def percentile(self, ordered, pct):
+        index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
@@ -0,0 +1,21 @@
+# backend/authentication/permissions.py
+from django.contrib.auth import get_user_model
+from rest_framework.permissions import BasePermission
+
+
+class IsPersonnel(BasePermission):
+    """Staff-only endpoints: a valid personnel token, checked from its claims with no queries"""
+    
+    message = 'Personnel login required'
+    
+    def has_permission(self, request, view):
+        return getattr(request.user, 'user_type', None) == 'personnel'
+
+
+class IsClient(BasePermission):
+    """Client-only endpoints: request.user must be a Client, not a personnel principal"""
+    
+    message = 'Client login required'
+    
+    def has_permission(self, request, view):
+        return isinstance(request.user, get_user_model())
@@ -0,0 +1,13 @@
+# backend/authentication/signals.py
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .token_cache import token_cache
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_tokens(sender, instance, **kwargs):
+    # Covers update_client, delete_client, password changes and admin edits,
+    # so a deactivated or deleted client cannot keep using a cached token
+    token_cache.invalidate_user(instance.pk)
@@ -1,3 +1,168 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import date
+from unittest import mock
+from django.test import RequestFactory, TestCase
+from clients.models import Client
+from .authentication import JWEAuthentication
+from .hashing import HashPoolBusy, PasswordHashPool
+from .jwe_utils import jwe_manager
+from .token_cache import TokenCache, token_cache
 
-# Create your tests here.
+
+def personnel_header(user_id=1, username='officer', position='Examiner'):
+    token = jwe_manager.create_token(
+        user_id=user_id, username=username, user_type='personnel', position=position, role='staff'
+    )
+    return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+
+class TokenScopeTests(TestCase):
+    """Personnel tokens authenticate without a database user, so client-only views must reject them"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = Client.objects.create(
+            username='juan', email='juan@example.com', lastname='Cruz', firstname='Juan',
+            birthday=date(1990, 1, 1), contact_number='09170000000'
+        )
+
+    def test_client_profile_with_client_token(self):
+        token = jwe_manager.create_token(self.client_user.id, self.client_user.username)
+        response = self.client.get('/api/clients/profile/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['username'], 'juan')
+
+    def test_client_profile_rejects_personnel_token(self):
+        response = self.client.get('/api/clients/profile/', **personnel_header())
+        self.assertEqual(response.status_code, 403)
+
+    def test_client_logout_rejects_personnel_token(self):
+        response = self.client.post('/api/clients/logout/', **personnel_header())
+        self.assertEqual(response.status_code, 403)
+
+    def test_staff_endpoint_rejects_client_token(self):
+        token = jwe_manager.create_token(self.client_user.id, self.client_user.username)
+        response = self.client.get('/api/client-appointments/stats/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 403)
+
+    def test_staff_endpoint_with_personnel_token(self):
+        response = self.client.get('/api/client-appointments/stats/', **personnel_header())
+        self.assertEqual(response.status_code, 200)
+
+
+class PasswordHashPoolTests(TestCase):
+    """A saturated pool must turn callers away at once instead of parking request threads"""
+
+    def test_full_pool_rejects_without_waiting(self):
+        pool = PasswordHashPool(workers=1, queue_size=1, timeout=5)
+        release = threading.Event()
+        waiters = [threading.Thread(target=pool.run, args=(release.wait,)) for _ in range(2)]
+        for waiter in waiters:
+            waiter.start()
+        # One hash running and one queued
+        while pool._slots._value:
+            time.sleep(0.001)
+        try:
+            started = time.monotonic()
+            with self.assertRaises(HashPoolBusy):
+                pool.run(lambda: None)
+            self.assertLess(time.monotonic() - started, 0.5)
+        finally:
+            release.set()
+            for waiter in waiters:
+                waiter.join()
+        # Slots are given back once the hashes finish
+        self.assertEqual(pool.run(lambda: 'ok'), 'ok')
+
+    def test_slow_hash_times_out(self):
+        pool = PasswordHashPool(workers=1, queue_size=0, timeout=0.05)
+        release = threading.Event()
+        try:
+            with self.assertRaises(HashPoolBusy):
+                pool.run(release.wait)
+        finally:
+            release.set()
+
+    def test_login_answers_503_when_busy(self):
+        Client.objects.create(
+            username='juan', email='juan@example.com', lastname='Cruz', firstname='Juan',
+            birthday=date(1990, 1, 1), contact_number='09170000000'
+        )
+        with mock.patch('authentication.hashing.hash_pool.run', side_effect=HashPoolBusy):
+            response = self.client.post(
+                '/api/clients/login/', {'username': 'juan', 'password': 'secret123'}, content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '2')
+
+
+class TokenCacheTests(TestCase):
+    """Verified tokens are reused until their TTL, the token's expiry or a change to the user"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = Client.objects.create(
+            username='juan', email='juan@example.com', lastname='Cruz', firstname='Juan',
+            birthday=date(1990, 1, 1), contact_number='09170000000'
+        )
+
+    def setUp(self):
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.token = jwe_manager.create_token(self.client_user.id, self.client_user.username)
+
+    def authenticate(self):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        return JWEAuthentication().authenticate(request)
+
+    def payload(self, expires_in=3600):
+        return {'user_id': self.client_user.id, 'exp': time.time() + expires_in}
+
+    def test_second_request_skips_decryption_and_query(self):
+        self.authenticate()
+        with self.assertNumQueries(0), mock.patch.object(jwe_manager, 'verify_token') as verify:
+            user, _ = self.authenticate()
+        verify.assert_not_called()
+        self.assertEqual(user.pk, self.client_user.pk)
+
+    def test_saving_the_user_drops_its_tokens(self):
+        self.authenticate()
+        self.client_user.is_active = False
+        self.client_user.save()
+        self.assertIsNone(token_cache.get(self.token))
+
+    def test_entries_expire_after_ttl(self):
+        cache = TokenCache(ttl=60)
+        with mock.patch('authentication.token_cache.time.monotonic', return_value=1000.0):
+            cache.set('token', self.client_user, self.payload())
+            self.assertIsNotNone(cache.get('token'))
+        with mock.patch('authentication.token_cache.time.monotonic', return_value=1061.0):
+            self.assertIsNone(cache.get('token'))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_entries_never_outlive_the_token(self):
+        cache = TokenCache(ttl=60)
+        with mock.patch('authentication.token_cache.time.monotonic', return_value=1000.0):
+            cache.set('token', self.client_user, self.payload(expires_in=5))
+        with mock.patch('authentication.token_cache.time.monotonic', return_value=1006.0):
+            self.assertIsNone(cache.get('token'))
+        cache.set('expired', self.client_user, self.payload(expires_in=-1))
+        self.assertIsNone(cache.get('expired'))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TokenCache(max_entries=2, ttl=60)
+        for token in ('a', 'b'):
+            cache.set(token, self.client_user, self.payload())
+        cache.get('a')
+        cache.set('c', self.client_user, self.payload())
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_lookup_racing_an_invalidation_is_not_cached(self):
+        cache = TokenCache(ttl=60)
+        generation = cache.generation(self.client_user.pk)
+        cache.invalidate_user(self.client_user.pk)
+        cache.set('token', self.client_user, self.payload(), generation)
+        self.assertIsNone(cache.get('token'))
@@ -0,0 +1,100 @@
+# backend/authentication/token_cache.py
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+
+
+class TokenCache:
+    """Bounded LRU of verified tokens and the users they resolved to.
+
+    A hit skips both the Fernet decryption and the user query. Entries live
+    for at most `ttl` seconds (and never past the token's own expiry), and
+    are dropped as soon as the user is saved or deleted in this process;
+    the short TTL bounds how long other worker processes can lag behind.
+    """
+
+    def __init__(self, max_entries=None, ttl=None):
+        self.max_entries = max_entries or getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 10000)
+        self.ttl = ttl if ttl is not None else getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 60)
+        self._entries = OrderedDict()
+        self._tokens_by_user = {}
+        # Bumped on every invalidation so a lookup that raced with one is not cached
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token):
+        """Returns (user, payload) for a cached token, or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self._forget(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            _, user, payload = entry
+        # Views may modify request.user; hand out a copy so the cached one stays clean
+        return copy.copy(user), payload
+
+    def generation(self, user_id):
+        """Read before loading a user and pass to set()"""
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def set(self, token, user, payload, generation=0):
+        if self.ttl <= 0:
+            return
+        # Never cache past the token's expiry (exp is wall-clock, the cache is monotonic)
+        lifetime = min(self.ttl, payload.get('exp', float('inf')) - time.time())
+        if lifetime <= 0:
+            return
+        with self._lock:
+            if self._generations.get(user.pk, 0) != generation:
+                # The user changed while it was being loaded
+                return
+            if token in self._entries:
+                self._forget(token)
+            self._entries[token] = (time.monotonic() + lifetime, copy.copy(user), payload)
+            self._tokens_by_user.setdefault(user.pk, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._forget(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id):
+        """Drop every cached token of a user, e.g. after they are updated, deactivated or deleted"""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            for token in self._tokens_by_user.pop(user_id, ()):
+                self._entries.pop(token, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def _forget(self, token):
+        _, user, _ = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(user.pk)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user.pk]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+# GLOBAL INSTANCE FOR USEABILITY
+token_cache = TokenCache()
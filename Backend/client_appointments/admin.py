@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ClientAppointment, AppointmentAttachment
+from .models import ClientAppointment, AppointmentAttachment, AppointmentDateCapacity, FeedbackEnrichmentTask, SmsOutbox
 
 @admin.register(ClientAppointment)
 class ClientAppointmentAdmin(admin.ModelAdmin):
@@ -41,4 +41,29 @@ class AppointmentAttachmentAdmin(admin.ModelAdmin):
     list_display = ['id', 'appointment', 'filename', 'file_size', 'uploaded_at']
     list_filter = ['uploaded_at']
     search_fields = ['appointment__client__firstname', 'appointment__client__lastname', 'filename']
-    ordering = ['-uploaded_at']
\ No newline at end of file
+    ordering = ['-uploaded_at']
+
+@admin.register(AppointmentDateCapacity)
+class AppointmentDateCapacityAdmin(admin.ModelAdmin):
+    list_display = ['appointment_date', 'capacity', 'booked', 'updated_at']
+    list_filter = ['appointment_date']
+    ordering = ['-appointment_date']
+    # booked is maintained by the booking flow; only capacity is edited here
+    readonly_fields = ['booked', 'updated_at']
+
+
+@admin.register(FeedbackEnrichmentTask)
+class FeedbackEnrichmentTaskAdmin(admin.ModelAdmin):
+    list_display = ['id', 'appointment', 'status', 'attempts', 'run_after', 'updated_at']
+    list_filter = ['status']
+    ordering = ['run_after']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(SmsOutbox)
+class SmsOutboxAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'phone_number', 'status', 'attempts', 'run_after', 'sent_at']
+    list_filter = ['status', 'kind']
+    search_fields = ['phone_number', 'message']
+    ordering = ['-created_at']
+    readonly_fields = ['created_at', 'updated_at']
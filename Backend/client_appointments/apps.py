@@ -3,4 +3,9 @@ from django.apps import AppConfig
 class ClientAppointmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'client_appointments'
-    verbose_name = 'Client Appointments'
\ No newline at end of file
+    verbose_name = 'Client Appointments'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from . import metrics
+        metrics.register()
\ No newline at end of file
@@ -0,0 +1,150 @@
+# client_appointments/feedback.py
+import threading
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+import nltk
+from nltk.sentiment import SentimentIntensityAnalyzer
+from .langid import identify_language
+from .metrics import SENTIMENT_LATENCY, TRANSLATION_LATENCY
+from utils.request_metrics import timed
+
+
+#---TRANSLATORS--------------------------------------------------------------------------------
+
+class GoogleTranslator:
+    """Detects the language and translates to English with googletrans (network bound)"""
+
+    def translate(self, text, src=None):
+        from googletrans import Translator
+        translator = Translator()
+
+        # Skip the detect round trip when the caller already knows the language
+        detected_lang = src or translator.detect(text).lang
+        if detected_lang == 'en':
+            return text, detected_lang  # No need to translate
+
+        translation = translator.translate(text, src=detected_lang, dest='en')
+        return translation.text, detected_lang
+
+
+class StubTranslator:
+    """Offline translator for local runs and tests; returns the text unchanged"""
+    language = 'en'
+
+    def translate(self, text, src=None):
+        return text, src or self.language
+
+
+_translator = None
+
+def get_translator():
+    """Translator configured by FEEDBACK_TRANSLATOR, built once per process"""
+    global _translator
+    if _translator is None:
+        path = getattr(settings, 'FEEDBACK_TRANSLATOR', 'client_appointments.feedback.GoogleTranslator')
+        _translator = import_string(path)()
+    return _translator
+
+
+#---ENRICHMENT---------------------------------------------------------------------------------
+
+def translate_text(text):
+    """Returns (english_text, detected_language). Raises if the translator fails.
+
+    The language is identified offline first: confidently English text never
+    reaches the translator, and confidently identified text skips the remote
+    detect call. Results are memoized, so identical feedback only reaches the
+    translator once.
+    """
+    from .translation_cache import translation_cache
+
+    language, confidence = identify_language(text)
+    confident = confidence >= getattr(settings, 'FEEDBACK_LANGID_MIN_CONFIDENCE', 0.9)
+    if confident and language == 'en':
+        return text, language
+
+    cached = translation_cache.get(text)
+    if cached is not None:
+        return cached
+
+    with timed('external'), TRANSLATION_LATENCY.time():
+        translated_text, detected_language = get_translator().translate(text, src=language if confident else None)
+    translation_cache.set(text, translated_text, detected_language)
+    return translated_text, detected_language
+
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+def get_sentiment_analyzer():
+    """Process-wide VADER analyzer; the lexicon is loaded on first use only"""
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                # Download VADER lexicon if not already present
+                try:
+                    nltk.data.find('sentiment/vader_lexicon')
+                except LookupError:
+                    nltk.download('vader_lexicon')
+                _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+
+def sentiment_label(score):
+    if score >= getattr(settings, 'FEEDBACK_SENTIMENT_POSITIVE_THRESHOLD', 0.05):
+        return 'Positive'
+    if score <= getattr(settings, 'FEEDBACK_SENTIMENT_NEGATIVE_THRESHOLD', -0.05):
+        return 'Negative'
+    return 'Neutral'
+
+
+def analyze_sentiment(text):
+    """Analyze sentiment of English text"""
+    analyzer = get_sentiment_analyzer()
+    # Timed after the first-use lexicon load, which would swamp the histogram
+    with SENTIMENT_LATENCY.time():
+        score = analyzer.polarity_scores(text)['compound']
+    return score, sentiment_label(score)
+
+
+def analyze_sentiment_batch(texts):
+    """Score a list of texts; used by the rescore_feedback process pool"""
+    return [analyze_sentiment(text) for text in texts]
+
+
+def enrich_feedback(appointment, translate=True):
+    """Fill in translation and sentiment for the appointment's feedback and save them.
+
+    With translate=False the feedback is scored as-is and its language recorded
+    as unknown, which is the fallback once translation has run out of retries.
+
+    The results are only written while the stored feedback is still the text
+    that was scored; returns False, saving nothing, if the client resubmitted
+    in the meantime.
+    """
+    feedback = appointment.feedback
+    if translate:
+        translated_feedback, detected_language = translate_text(feedback)
+        status = 'Done'
+    else:
+        translated_feedback, detected_language = feedback, 'unknown'
+        status = 'Failed'
+
+    sentiment_score, sentiment_label_value = analyze_sentiment(translated_feedback)
+    values = {
+        'translated_feedback': translated_feedback,
+        'feedback_language': detected_language,
+        'sentiment_score': sentiment_score,
+        'sentiment_label': sentiment_label_value,
+        'enrichment_status': status,
+        'updated_at': timezone.now(),
+    }
+    # One conditional UPDATE: no lock is held across the translation call
+    updated = type(appointment).objects.filter(pk=appointment.pk, feedback=feedback).update(**values)
+    if not updated:
+        return False
+    for name, value in values.items():
+        setattr(appointment, name, value)
+    return True
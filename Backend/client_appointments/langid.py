@@ -0,0 +1,88 @@
+# client_appointments/langid.py
+import math
+import re
+import threading
+from collections import Counter
+from .langid_samples import TRAINING_TEXT
+
+_non_letters = re.compile(r"[^\w']+|[\d_]+")
+
+
+def _words(text):
+    return [word for word in _non_letters.split(text.lower()) if word]
+
+
+def _ngrams(text, orders):
+    """Character n-grams of each word, padded with spaces so prefixes and suffixes count"""
+    for word in _words(text):
+        padded = f' {word} '
+        for n in orders:
+            for i in range(len(padded) - n + 1):
+                yield padded[i:i + n]
+
+
+class NgramLanguageIdentifier:
+    """Naive Bayes over character 1-3 grams.
+
+    Small enough to build from the bundled samples at startup and answers
+    without any network access; it only needs to separate the languages our
+    feedback is written in (English, Tagalog and Cebuano).
+    """
+
+    def __init__(self, training_text, orders=(1, 2, 3)):
+        self.orders = orders
+        self.languages = sorted(training_text)
+        vocabulary = set()
+        counts = {}
+        for language, text in training_text.items():
+            counts[language] = Counter(_ngrams(text, orders))
+            vocabulary.update(counts[language])
+
+        # Laplace smoothed log probabilities, one row per n-gram holding every
+        # language, so scoring costs a single dict lookup per n-gram
+        totals = [sum(counts[language].values()) + len(vocabulary) + 1 for language in self.languages]
+        self.unseen_log_probs = tuple(math.log(1 / total) for total in totals)
+        self.log_probs = {
+            ngram: tuple(
+                math.log((counts[language][ngram] + 1) / total)
+                for language, total in zip(self.languages, totals)
+            )
+            for ngram in vocabulary
+        }
+
+    def scores(self, text):
+        scores = [0.0] * len(self.languages)
+        found = False
+        for ngram in _ngrams(text, self.orders):
+            found = True
+            row = self.log_probs.get(ngram, self.unseen_log_probs)
+            for i, log_prob in enumerate(row):
+                scores[i] += log_prob
+        return dict(zip(self.languages, scores)) if found else None
+
+    def identify(self, text):
+        """Returns (language, confidence), or ('unknown', 0.0) for text without words"""
+        scores = self.scores(text)
+        if scores is None:
+            return 'unknown', 0.0
+
+        best = max(scores, key=scores.get)
+        # Posterior of the best language, computed stably
+        total = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1.0 / total
+
+
+_identifier = None
+_identifier_lock = threading.Lock()
+
+def get_identifier():
+    global _identifier
+    if _identifier is None:
+        with _identifier_lock:
+            if _identifier is None:
+                _identifier = NgramLanguageIdentifier(TRAINING_TEXT)
+    return _identifier
+
+
+def identify_language(text):
+    return get_identifier().identify(text)
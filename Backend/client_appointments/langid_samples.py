@@ -0,0 +1,137 @@
+# client_appointments/langid_samples.py
+# Text the offline language identifier is trained on, plus a separate labelled
+# set of feedback used by `manage.py benchmark_langid`. Codes match googletrans.
+
+TRAINING_TEXT = {
+    'en': """
+        thank you very much for the fast and friendly service
+        the staff were very helpful and answered all of my questions
+        the process was quick and easy and i got my documents on time
+        i waited for a long time before anyone attended to me
+        the officer was rude and did not explain the requirements
+        good service keep up the good work
+        the office is clean and well organized
+        it took too long to process my request and nobody told me why
+        very satisfied with the assistance i received today
+        the examiner explained the status of my title clearly
+        please add more chairs in the waiting area because it is crowded
+        the online appointment system is convenient and saves time
+        i am not happy with how my concern was handled
+        excellent and professional staff highly recommended
+        the line was long but the people were patient and kind
+        they were able to help me with my land registration problem
+        the requirements were not posted so i had to come back again
+        overall it was a pleasant experience and i will recommend this office
+        my appointment was confirmed and i was served on schedule
+        the person at the counter was polite and very accommodating
+        there should be a clear list of fees and requirements on the website
+        i could not find where to submit the forms
+        nice and fast thank you for helping me with my certified true copy
+        the service was okay but the waiting time can be improved
+        this is the best government office i have visited
+        the guard was helpful and showed me where to go
+        everything was smooth from registration to release
+        i was treated with respect and my questions were answered
+        it was confusing and the staff seemed busy with other things
+        great job to the team and thank you for your patience
+    """,
+    'tl': """
+        maraming salamat po sa mabilis at magalang na serbisyo
+        napakabait ng mga empleyado at sinagot nila lahat ng tanong ko
+        mabilis at madali ang proseso at nakuha ko agad ang mga dokumento
+        matagal akong naghintay bago ako inasikaso
+        bastos ang empleyado at hindi ipinaliwanag ang mga kailangan
+        magaling ang serbisyo ipagpatuloy ninyo po ang magandang trabaho
+        malinis at maayos ang opisina
+        masyadong matagal ang pagproseso ng aking hiling at walang nagsabi kung bakit
+        lubos akong nasiyahan sa tulong na natanggap ko ngayong araw
+        malinaw na ipinaliwanag ng examiner ang estado ng aking titulo
+        sana po ay dagdagan ang upuan sa hintayan dahil siksikan
+        maginhawa ang online na appointment at nakakatipid ng oras
+        hindi ako masaya sa paraan ng pag asikaso sa aking problema
+        mahusay at propesyonal ang mga kawani lubos kong inirerekomenda
+        mahaba ang pila pero matiyaga at mabait ang mga tao
+        natulungan nila ako sa problema ko sa pagpaparehistro ng lupa
+        hindi nakapaskil ang mga kailangan kaya kinailangan kong bumalik
+        sa kabuuan ay maganda ang naging karanasan ko dito
+        nakumpirma ang aking appointment at naasikaso ako sa takdang oras
+        magalang at matulungin ang nasa counter
+        dapat may malinaw na listahan ng bayarin at mga kailangan sa website
+        hindi ko alam kung saan ipapasa ang mga papeles
+        salamat po sa pagtulong sa akin na makakuha ng kopya
+        ayos naman ang serbisyo pero sana bilisan pa ang pila
+        ito na ang pinakamahusay na opisina ng gobyerno na napuntahan ko
+        mabait ang guwardiya at itinuro niya kung saan ako pupunta
+        maayos ang lahat mula sa pagpaparehistro hanggang sa paglabas
+        ginalang ako at nasagot ang lahat ng aking mga tanong
+        nakakalito at mukhang abala ang mga tauhan sa ibang bagay
+        mabuhay kayo at salamat sa inyong pasensya
+        wala po akong reklamo napakaganda ng serbisyo ninyo
+    """,
+    'ceb': """
+        daghang salamat sa paspas ug buotan nga serbisyo
+        buotan kaayo ang mga empleyado ug gitubag nila ang tanan nakong pangutana
+        paspas ug sayon ang proseso ug nakuha nako dayon ang mga dokumento
+        dugay kaayo ko naghulat sa wala pa ko giasikaso
+        bastos ang empleyado ug wala niya gipatin aw ang mga kinahanglanon
+        maayo ang serbisyo padayona ninyo ang maayong trabaho
+        limpyo ug hapsay ang opisina
+        dugay kaayo ang pagproseso sa akong hangyo ug walay nagsulti nganong
+        kontento kaayo ko sa tabang nga akong nadawat karong adlawa
+        klaro nga gipatin aw sa examiner ang kahimtang sa akong titulo
+        palihug dugangi ang lingkuranan sa hulatanan kay daghan kaayo tawo
+        sayon ang online nga appointment ug makadaginot sa oras
+        dili ko malipayon sa paagi sa pag atiman sa akong problema
+        maayo ug propesyonal ang mga kawani girekomendar nako kaayo
+        taas ang linya apan mapailubon ug buotan ang mga tawo
+        natabangan ko nila sa akong problema sa pagparehistro sa yuta
+        wala gipapilit ang mga kinahanglanon mao nga kinahanglan ko mobalik
+        sa kinatibuk an nindot ang akong kasinatian diri
+        nakumpirma ang akong appointment ug naasikaso ko sa husto nga oras
+        matinahuron ug matinabangon ang naa sa counter
+        kinahanglan naay klaro nga lista sa bayranan ug kinahanglanon sa website
+        wala ko kahibalo asa ihatag ang mga papeles
+        salamat kaayo sa pagtabang nako nga makakuha ug kopya
+        okay ra ang serbisyo pero unta mapaspasan pa ang linya
+        mao na ni ang labing maayo nga opisina sa gobyerno nga akong naadtoan
+        buotan ang guwardiya ug gitudlo niya kung asa ko moadto
+        hapsay ang tanan gikan sa pagparehistro hangtod sa pagkuha
+        gitahod ko ug natubag ang tanan nakong pangutana
+        makalibog ug murag busy kaayo ang mga trabahante sa ubang butang
+        salamat kaninyo sa inyong pailob
+        wala koy reklamo nindot kaayo ang inyong serbisyo
+    """,
+}
+
+BENCHMARK_SAMPLES = [
+    ('en', 'Very helpful staff, thank you!'),
+    ('en', 'The waiting time was too long.'),
+    ('en', 'Great service, I got my papers quickly.'),
+    ('en', 'The officer did not explain anything to me.'),
+    ('en', 'Clean office and polite employees.'),
+    ('en', 'I had to come back twice because of missing requirements.'),
+    ('en', 'Fast and efficient, highly recommended.'),
+    ('en', 'Nobody answered my questions at the counter.'),
+    ('en', 'Thank you for accommodating me even without an appointment.'),
+    ('en', 'The system is easy to use and the staff are kind.'),
+    ('tl', 'Salamat po sa tulong ninyo.'),
+    ('tl', 'Napakatagal ng pila at walang nag-aasikaso.'),
+    ('tl', 'Mabait at matulungin ang mga empleyado.'),
+    ('tl', 'Hindi maayos ang serbisyo, sana ayusin ninyo.'),
+    ('tl', 'Mabilis ang proseso, nakuha ko agad ang titulo.'),
+    ('tl', 'Ang galing ng examiner, malinaw ang paliwanag niya.'),
+    ('tl', 'Kulang ang upuan sa hintayan.'),
+    ('tl', 'Maraming salamat, babalik po ako ulit.'),
+    ('tl', 'Nakakainis dahil pinabalik-balik ako.'),
+    ('tl', 'Magalang ang guwardiya at itinuro ang daan.'),
+    ('ceb', 'Salamat kaayo sa inyong tabang.'),
+    ('ceb', 'Dugay kaayo ang linya ug walay nag-asikaso.'),
+    ('ceb', 'Buotan ug matinabangon ang mga empleyado.'),
+    ('ceb', 'Dili maayo ang serbisyo, unta ayohon ninyo.'),
+    ('ceb', 'Paspas ang proseso, nakuha nako dayon ang titulo.'),
+    ('ceb', 'Nindot kaayo ang pagpatin-aw sa examiner.'),
+    ('ceb', 'Kulang ang lingkuranan sa hulatanan.'),
+    ('ceb', 'Daghang salamat, mobalik ko usab.'),
+    ('ceb', 'Makalagot kay gipabalik-balik ko nila.'),
+    ('ceb', 'Matinahuron ang guwardiya ug gitudlo ang dalan.'),
+]
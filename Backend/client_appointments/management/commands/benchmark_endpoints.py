@@ -0,0 +1,250 @@
+# client_appointments/management/commands/benchmark_endpoints.py
+import json
+import platform
+import statistics
+import time
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client as TestClient
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from appointment_nature.models import AppointmentNature
+from appointment_schedule.models import Appointment
+from authentication.jwe_utils import jwe_manager
+from clients.models import Client
+from personnel.models import Personnel
+from client_appointments.models import AppointmentAttachment, AppointmentDateCapacity, ClientAppointment
+from client_appointments.pagination import KeysetPagination
+
+# (name, path, auth) per endpoint; paths are filled in from the database by endpoint_context().
+# auth is None, 'client' or 'personnel'. Only reads are measured, so runs never change the data.
+ENDPOINTS = [
+    # clients
+    ('clients.list', '/api/clients/list/', None),
+    ('clients.list.search', '/api/clients/list/?search={client_lastname}', None),
+    ('clients.list.by_age.page20', '/api/clients/list/?ordering=-age&page=20', None),
+    ('clients.autocomplete', '/api/clients/autocomplete/?q={client_prefix}', 'personnel'),
+    ('clients.profile', '/api/clients/profile/', 'client'),
+    # client_appointments
+    ('appointments.list', '/api/client-appointments/', None),
+    ('appointments.list.next_page', '/api/client-appointments/?cursor={cursor}', None),
+    ('appointments.list.by_status', '/api/client-appointments/?status=Pending,Confirmed', None),
+    ('appointments.list.by_client', '/api/client-appointments/?client_id={client_id}', None),
+    ('appointments.list.by_officer', '/api/client-appointments/?officer_id={officer_id}', None),
+    ('appointments.list.by_date', '/api/client-appointments/?appointment_date={busy_date}', None),
+    ('appointments.retrieve', '/api/client-appointments/{appointment_id}/', None),
+    ('appointments.by_client', '/api/client-appointments/by_client/?client_id={client_id}', None),
+    ('appointments.full_dates', '/api/client-appointments/full_dates/', None),
+    ('appointments.availability', '/api/client-appointments/availability/?date={busy_date}', None),
+    ('appointments.stats', '/api/client-appointments/stats/', 'personnel'),
+    ('appointments.dashboard_stats', '/api/client-appointments/dashboard_stats/', 'personnel'),
+    ('appointments.attachment_file', '/api/client-appointments/{attachment_appointment_id}/attachments/{attachment_id}/file/', None),
+    ('appointments.attachments_zip', '/api/client-appointments/{attachment_appointment_id}/attachments/zip/', None),
+    # appointment_schedule
+    ('schedules.list', '/api/appointment-schedules/', None),
+    ('schedules.personnel_options', '/api/appointment-schedules/personnel-options/', None),
+    # appointment_nature
+    ('natures.list', '/api/appointment-natures/', None),
+    ('natures.retrieve', '/api/appointment-natures/{nature_id}/', None),
+    # personnel
+    ('personnel.list', '/api/personnel/personnel/', None),
+    ('personnel.retrieve', '/api/personnel/personnel/{officer_id}/', None),
+]
+
+# Whole-table downloads; only run with --include-exports
+EXPORT_ENDPOINTS = [
+    ('clients.export', '/api/clients/export/', 'personnel'),
+    ('appointments.export', '/api/client-appointments/export/', 'personnel'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Time every read endpoint through the Django test client and write latency percentiles '
+        'and query counts as JSON. With --compare, fail when an endpoint regressed against a baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per endpoint first')
+        parser.add_argument('--only', action='append', default=[],
+                            help='Run endpoints whose name starts with this (repeatable)')
+        parser.add_argument('--include-exports', action='store_true', help='Also time the CSV exports')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--compare', help='Baseline JSON from an earlier run to check against')
+        parser.add_argument('--tolerance', type=float, default=1.5,
+                            help='A p95 this many times the baseline counts as a regression')
+        parser.add_argument('--min-delta-ms', type=float, default=5.0,
+                            help='Ignore p95 changes smaller than this, which are noise')
+
+    def handle(self, *args, **options):
+        context = self.endpoint_context()
+        endpoints = ENDPOINTS + (EXPORT_ENDPOINTS if options['include_exports'] else [])
+        if options['only']:
+            endpoints = [endpoint for endpoint in endpoints if endpoint[0].startswith(tuple(options['only']))]
+
+        # Adds 'testserver' to ALLOWED_HOSTS for the test client
+        setup_test_environment()
+        try:
+            results = {}
+            for name, path, auth in endpoints:
+                try:
+                    url = path.format(**context)
+                except KeyError as missing:
+                    self.stdout.write(self.style.WARNING(f'  {name}: skipped, no data for {missing}'))
+                    continue
+                results[name] = self.measure(url, context['headers'][auth], options['warmup'], options['iterations'])
+                self.stdout.write(self.format_row(name, results[name]))
+        finally:
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'iterations': options['iterations'],
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'debug': settings.DEBUG,
+                'rows': context['rows'],
+            },
+            'endpoints': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                # Stable key order so successive baselines diff cleanly
+                json.dump(report, output, indent=2, sort_keys=True)
+                output.write('\n')
+            self.stdout.write(self.style.SUCCESS(f'Wrote {len(results)} endpoint(s) to {options["output"]}'))
+
+        if options['compare']:
+            self.compare(options['compare'], results, options['tolerance'], options['min_delta_ms'])
+
+    def endpoint_context(self):
+        """Ids and values the endpoint paths need, picked from the current data"""
+        context = {'headers': {None: {}}}
+        appointment = ClientAppointment.objects.order_by('-created_at', '-id').first()
+        if appointment is None:
+            raise CommandError('No appointments to benchmark; run manage.py seed_data first')
+
+        client = appointment.client
+        officer = appointment.assigned_officer
+        context.update(
+            client_id=client.id,
+            client_lastname=client.lastname,
+            client_prefix=client.lastname[:3],
+            officer_id=officer.id,
+            appointment_id=appointment.id,
+        )
+        busiest = AppointmentDateCapacity.objects.order_by('-booked', 'appointment_date').first()
+        context['busy_date'] = (busiest.appointment_date if busiest else appointment.appointment_date).isoformat()
+        # Cursor of the tenth page
+        cursor_row = ClientAppointment.objects.order_by('-created_at', '-id')[499:500].first()
+        if cursor_row:
+            context['cursor'] = KeysetPagination().encode_cursor(cursor_row)
+        attachment = AppointmentAttachment.objects.order_by('-id').first()
+        if attachment:
+            context.update(attachment_id=attachment.id, attachment_appointment_id=attachment.appointment_id)
+        nature = AppointmentNature.objects.order_by('id').first()
+        if nature:
+            context['nature_id'] = nature.id
+
+        context['headers']['client'] = {
+            'HTTP_AUTHORIZATION': f'Bearer {jwe_manager.create_token(client.id, client.username)}'
+        }
+        context['headers']['personnel'] = {
+            'HTTP_AUTHORIZATION': 'Bearer ' + jwe_manager.create_token(
+                user_id=officer.id,
+                username=officer.username,
+                expires_in_hours=settings.PERSONNEL_TOKEN_HOURS,
+                user_type='personnel',
+                position=officer.position,
+                role='admin' if officer.is_superuser else 'staff'
+            )
+        }
+        context['rows'] = {
+            'clients': Client.objects.count(),
+            'personnel': Personnel.objects.count(),
+            'appointments': ClientAppointment.objects.count(),
+            'attachments': AppointmentAttachment.objects.count(),
+            'schedules': Appointment.objects.count(),
+        }
+        return context
+
+    def measure(self, url, headers, warmup, iterations):
+        test_client = TestClient()
+        for _ in range(warmup):
+            self.request(test_client, url, headers)
+
+        timings = []
+        query_counts = []
+        sizes = []
+        status_codes = set()
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                status_code, size = self.request(test_client, url, headers)
+                timings.append((time.perf_counter() - started) * 1000)
+            query_counts.append(len(queries))
+            sizes.append(size)
+            status_codes.add(status_code)
+        timings.sort()
+
+        return {
+            'url': url,
+            'status': sorted(status_codes),
+            'p50_ms': round(self.percentile(timings, 50), 2),
+            'p95_ms': round(self.percentile(timings, 95), 2),
+            'p99_ms': round(self.percentile(timings, 99), 2),
+            'mean_ms': round(statistics.fmean(timings), 2),
+            'max_ms': round(timings[-1], 2),
+            'queries': max(query_counts),
+            'bytes': max(sizes),
+        }
+
+    def request(self, test_client, url, headers):
+        response = test_client.get(url, **headers)
+        # Streaming responses do their work while being read
+        if response.streaming:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size = len(response.content)
+        response.close()
+        return response.status_code, size
+
+    def percentile(self, ordered, pct):
+        index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
+
+    def format_row(self, name, result):
+        return (
+            f'  {name:<34} {"/".join(map(str, result["status"])):>7}  '
+            f'p50 {result["p50_ms"]:>8.2f}ms  p95 {result["p95_ms"]:>8.2f}ms  '
+            f'p99 {result["p99_ms"]:>8.2f}ms  {result["queries"]:>3} queries'
+        )
+
+    def compare(self, path, results, tolerance, min_delta_ms):
+        try:
+            with open(path) as baseline_file:
+                baseline = json.load(baseline_file)['endpoints']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f'Cannot read baseline {path}: {e}')
+
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            if result['queries'] > before['queries']:
+                regressions.append(f'{name}: {before["queries"]} -> {result["queries"]} queries')
+            if result['status'] != before['status']:
+                regressions.append(f'{name}: status {before["status"]} -> {result["status"]}')
+            if (result['p95_ms'] > before['p95_ms'] * tolerance
+                    and result['p95_ms'] - before['p95_ms'] >= min_delta_ms):
+                regressions.append(f'{name}: p95 {before["p95_ms"]}ms -> {result["p95_ms"]}ms')
+
+        if regressions:
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(f'  {line}'))
+            raise CommandError(f'{len(regressions)} regression(s) against {path}')
+        self.stdout.write(self.style.SUCCESS(f'No regressions against {path}'))
@@ -0,0 +1,57 @@
+# client_appointments/management/commands/benchmark_langid.py
+import time
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from client_appointments.langid import get_identifier, identify_language
+from client_appointments.langid_samples import BENCHMARK_SAMPLES
+
+
+class Command(BaseCommand):
+    help = 'Measure accuracy and latency of the offline language identifier on labelled sample feedback'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200,
+                            help='Times each sample is identified for the latency figures')
+
+    def handle(self, *args, **options):
+        threshold = getattr(settings, 'FEEDBACK_LANGID_MIN_CONFIDENCE', 0.9)
+        get_identifier()  # exclude model construction from the timings
+
+        correct = Counter()
+        totals = Counter()
+        confusion = defaultdict(Counter)
+        skipped_remote = 0
+        for expected, text in BENCHMARK_SAMPLES:
+            language, confidence = identify_language(text)
+            totals[expected] += 1
+            confusion[expected][language] += 1
+            if language == expected:
+                correct[expected] += 1
+            if language == 'en' and confidence >= threshold:
+                skipped_remote += 1
+
+        timings = []
+        for _ in range(options['iterations']):
+            for _, text in BENCHMARK_SAMPLES:
+                started = time.perf_counter()
+                identify_language(text)
+                timings.append((time.perf_counter() - started) * 1e6)
+        timings.sort()
+
+        accuracy = sum(correct.values()) / len(BENCHMARK_SAMPLES)
+        self.stdout.write(self.style.SUCCESS(
+            f'Accuracy: {accuracy:.1%} on {len(BENCHMARK_SAMPLES)} samples'
+        ))
+        for language in sorted(totals):
+            breakdown = ', '.join(f'{guess}={count}' for guess, count in confusion[language].most_common())
+            self.stdout.write(f'  {language}: {correct[language]}/{totals[language]} ({breakdown})')
+        self.stdout.write(f'Would skip the remote translator for {skipped_remote} sample(s) (confidence >= {threshold})')
+        self.stdout.write(
+            f'Latency per call: mean {sum(timings) / len(timings):.1f}us, '
+            f'p50 {self.percentile(timings, 50):.1f}us, p99 {self.percentile(timings, 99):.1f}us'
+        )
+
+    def percentile(self, ordered, pct):
+        index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
@@ -0,0 +1,230 @@
+# client_appointments/management/commands/booking_storm.py
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from appointment_nature.models import AppointmentNature
+from clients.models import Client
+from personnel.models import Personnel
+from client_appointments.models import AppointmentDateCapacity, ClientAppointment
+from client_appointments.serializers import FULL_SCHEDULE_MESSAGE
+
+
+def first_weekdays_of_next_month(count, today=None):
+    today = today or date.today()
+    day = (today.replace(day=1) + timedelta(days=32)).replace(day=1)
+    days = []
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+async def post_json(host, port, path, payload, timeout):
+    """Minimal HTTP/1.1 POST over a fresh connection, like a browser opening the booking page.
+
+    Returns (status code, body). Uses only asyncio so the harness needs nothing installed.
+    """
+    body = json.dumps(payload).encode()
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(
+            f'POST {path} HTTP/1.1\r\n'
+            f'Host: {host}:{port}\r\n'
+            'Content-Type: application/json\r\n'
+            'Accept: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            'Connection: close\r\n\r\n'.encode() + body
+        )
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    status_line, _, rest = response.partition(b'\r\n')
+    _, _, content = rest.partition(b'\r\n\r\n')
+    return int(status_line.split()[1]), content
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay the opening of a new month: many clients POST to client-appointments/ at the same moment '
+        'for the same few dates on a running server. Reports throughput, errors and latency, and fails '
+        'if any date ends up above its capacity or the capacity ledger disagrees with the appointments.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--path', default='/api/client-appointments/')
+        parser.add_argument('--requests', type=int, default=300, help='Booking attempts in the storm')
+        parser.add_argument('--concurrency', type=int, default=100,
+                            help='Most requests in flight at once (the dev server backlog is small)')
+        parser.add_argument('--dates', type=lambda value: [date.fromisoformat(day) for day in value.split(',')],
+                            help='Comma separated YYYY-MM-DD dates to fight over; defaults to '
+                                 'the first --date-count weekdays of next month')
+        parser.add_argument('--date-count', type=int, default=3)
+        parser.add_argument('--officer-id', type=int, help='Defaults to the first examiner')
+        parser.add_argument('--inquiry-type', type=int, help='Appointment nature id; defaults to the first one')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Seconds per request')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for client and date choice')
+        parser.add_argument('--cleanup', action='store_true',
+                            help='Delete the appointments the storm created afterwards, giving their slots back')
+
+    def handle(self, *args, **options):
+        target = urlsplit(options['base_url'])
+        if target.scheme != 'http':
+            raise CommandError('Only plain http dev servers are supported')
+        dates = options['dates'] or first_weekdays_of_next_month(options['date_count'])
+        rng = random.Random(options['seed'])
+
+        client_ids = list(Client.objects.filter(is_active=True).order_by('id').values_list('id', flat=True)[:options['requests']])
+        if not client_ids:
+            raise CommandError('No clients to book with; run manage.py seed_data first')
+        officer = (
+            Personnel.objects.filter(pk=options['officer_id']).first() if options['officer_id']
+            else Personnel.objects.filter(position='Examiner').order_by('id').first() or Personnel.objects.order_by('id').first()
+        )
+        nature = (
+            AppointmentNature.objects.filter(pk=options['inquiry_type']).first() if options['inquiry_type']
+            else AppointmentNature.objects.order_by('id').first()
+        )
+        if officer is None or nature is None:
+            raise CommandError('Need at least one personnel and one appointment nature')
+
+        payloads = [
+            {
+                'client': client_ids[i % len(client_ids)],
+                'inquiry_type': nature.id,
+                'appointment_date': rng.choice(dates).isoformat(),
+                'officer_id': officer.id,
+                'notes': 'booking storm',
+            }
+            for i in range(options['requests'])
+        ]
+
+        self.stdout.write('Before the storm:')
+        before = self.date_state(dates)
+        self.write_dates(before)
+
+        self.stdout.write(f'Sending {len(payloads)} booking(s), up to {options["concurrency"]} at once...')
+        results, elapsed = asyncio.run(self.storm(
+            target.hostname, target.port or 80, options['path'], payloads, options['concurrency'], options['timeout']
+        ))
+
+        after = self.date_state(dates)
+        self.report(results, elapsed, before, after)
+
+        created_ids = [appointment_id for _, _, _, appointment_id in results if appointment_id]
+        problems = self.find_problems(dates, before, after, created_ids)
+        if options['cleanup'] and created_ids:
+            # post_delete gives the slots back to the ledger
+            ClientAppointment.objects.filter(id__in=created_ids).delete()
+            self.stdout.write(f'Removed the {len(created_ids)} appointment(s) created by the storm')
+        if problems:
+            for problem in problems:
+                self.stdout.write(self.style.ERROR(f'  {problem}'))
+            raise CommandError(f'{len(problems)} consistency problem(s) after the storm')
+        self.stdout.write(self.style.SUCCESS('No date went over capacity and the ledger matches the appointments'))
+
+    async def storm(self, host, port, path, payloads, concurrency, timeout):
+        gate = asyncio.Event()
+        slots = asyncio.Semaphore(concurrency)
+
+        async def book(payload):
+            await gate.wait()
+            async with slots:
+                started = time.perf_counter()
+                try:
+                    status, content = await post_json(host, port, path, payload, timeout)
+                except (OSError, asyncio.TimeoutError) as e:
+                    return 'error', type(e).__name__, (time.perf_counter() - started) * 1000, None
+                latency = (time.perf_counter() - started) * 1000
+            try:
+                data = json.loads(content)
+            except ValueError:
+                # e.g. Django's HTML error page
+                return status, 'non-JSON response', latency, None
+            if status == 201:
+                return status, 'created', latency, data.get('data', {}).get('id')
+            errors = data.get('errors', {})
+            if status == 400 and FULL_SCHEDULE_MESSAGE in json.dumps(errors):
+                return status, 'full', latency, None
+            return status, json.dumps(errors or data.get('message', ''))[:80], latency, None
+
+        tasks = [asyncio.create_task(book(payload)) for payload in payloads]
+        # Everyone waits at the gate, then fires at once
+        await asyncio.sleep(0)
+        started = time.perf_counter()
+        gate.set()
+        results = await asyncio.gather(*tasks)
+        return results, time.perf_counter() - started
+
+    def date_state(self, dates):
+        ledger = AppointmentDateCapacity.objects.in_bulk(dates, field_name='appointment_date')
+        actual = dict(
+            ClientAppointment.objects
+            .filter(appointment_date__in=dates)
+            .exclude(status='Cancelled')
+            .values('appointment_date')
+            .annotate(total=Count('id'))
+            .order_by()
+            .values_list('appointment_date', 'total')
+        )
+        return {
+            day: {
+                'capacity': ledger[day].capacity if day in ledger else None,
+                'booked': ledger[day].booked if day in ledger else 0,
+                'actual': actual.get(day, 0),
+            }
+            for day in dates
+        }
+
+    def write_dates(self, state):
+        for day, row in state.items():
+            capacity = row['capacity'] if row['capacity'] is not None else 'default'
+            self.stdout.write(f'  {day}: capacity {capacity}, ledger {row["booked"]}, appointments {row["actual"]}')
+
+    def report(self, results, elapsed, before, after):
+        outcomes = Counter((status, reason) for status, reason, _, _ in results)
+        latencies = sorted(latency for _, _, latency, _ in results)
+        created = outcomes[(201, 'created')]
+        rejected_full = outcomes[(400, 'full')]
+        errors = len(results) - created - rejected_full
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(results)} request(s) in {elapsed:.2f}s: {len(results) / elapsed:.1f} req/s, '
+            f'{created} created, {rejected_full} turned away as full, '
+            f'{errors} error(s) ({errors / len(results):.1%})'
+        ))
+        self.stdout.write(
+            f'Latency: p50 {self.percentile(latencies, 50):.1f}ms, p95 {self.percentile(latencies, 95):.1f}ms, '
+            f'p99 {self.percentile(latencies, 99):.1f}ms, max {latencies[-1]:.1f}ms'
+        )
+        for (status, reason), count in sorted(outcomes.items(), key=str):
+            if (status, reason) not in [(201, 'created'), (400, 'full')]:
+                self.stdout.write(f'  {status} {reason}: {count}')
+        self.stdout.write('After the storm:')
+        self.write_dates(after)
+
+    def find_problems(self, dates, before, after, created_ids):
+        problems = []
+        for day in dates:
+            row = after[day]
+            capacity = row['capacity']
+            if capacity is not None and row['actual'] > capacity:
+                problems.append(f'{day}: {row["actual"]} appointments for capacity {capacity}')
+            if row['booked'] != row['actual']:
+                problems.append(f'{day}: ledger says {row["booked"]} booked but there are {row["actual"]} appointments')
+        new_rows = sum(after[day]['actual'] - before[day]['actual'] for day in dates)
+        if new_rows != len(created_ids):
+            problems.append(f'{len(created_ids)} request(s) got 201 but {new_rows} appointment(s) were added')
+        return problems
+
+    def percentile(self, ordered, pct):
+        index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
@@ -0,0 +1,111 @@
+# client_appointments/management/commands/dispatch_sms.py
+import time
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from client_appointments.models import SmsOutbox
+from utils.sms import SEMAPHORE_BULK_LIMIT, SemaphoreClient, SmsError, normalize_number
+
+
+class Command(BaseCommand):
+    help = 'Send queued SMS from the outbox, batching identical messages into bulk requests (run continuously, or with --once)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Send the messages that are due now and exit')
+        parser.add_argument('--batch-size', type=int, default=SEMAPHORE_BULK_LIMIT,
+                            help='Messages claimed per round trip to the outbox')
+        parser.add_argument('--max-attempts', type=int,
+                            default=getattr(settings, 'SMS_MAX_ATTEMPTS', 6),
+                            help='Attempts before a message is dead-lettered')
+        parser.add_argument('--idle-sleep', type=float, default=2.0,
+                            help='Seconds to wait when the outbox is empty')
+        parser.add_argument('--url', help='Override SEMAPHORE_URL, e.g. a local fake_sms_server')
+
+    def handle(self, *args, **options):
+        self.client = SemaphoreClient(url=options['url'])
+        self.max_attempts = options['max_attempts']
+        self.retry_delay = getattr(settings, 'SMS_RETRY_DELAY', 30)
+        self.sent = self.retried = self.dead = self.requests = 0
+        request_time = 0.0
+        started = time.monotonic()
+
+        try:
+            while True:
+                messages = SmsOutbox.claim(options['batch_size'])
+                if not messages:
+                    if options['once']:
+                        break
+                    time.sleep(options['idle_sleep'])
+                    continue
+
+                for batch in self.group(messages):
+                    request_started = time.monotonic()
+                    self.send_batch(batch)
+                    request_time += time.monotonic() - request_started
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.client.close()
+
+        duration = max(time.monotonic() - started, 1e-6)
+        latency = request_time / self.requests * 1000 if self.requests else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f'Sent {self.sent} SMS in {self.requests} request(s) over {duration:.1f}s '
+            f'({self.sent / duration:.1f} msg/s, {latency:.0f}ms per request); '
+            f'{self.retried} to retry, {self.dead} dead-lettered'
+        ))
+
+    def group(self, messages):
+        """One batch per distinct text, each within the gateway's recipient limit"""
+        by_text = defaultdict(list)
+        for message in messages:
+            by_text[message.message].append(message)
+        for same_text in by_text.values():
+            for i in range(0, len(same_text), SEMAPHORE_BULK_LIMIT):
+                yield same_text[i:i + SEMAPHORE_BULK_LIMIT]
+
+    def send_batch(self, batch):
+        self.requests += 1
+        # The same phone typed two ways is still one recipient
+        numbers = list(dict.fromkeys(normalize_number(message.phone_number) for message in batch))
+        try:
+            provider_ids = self.client.send(numbers, batch[0].message)
+        except SmsError as e:
+            if not e.retryable and len(numbers) > 1:
+                self.split_batch(batch, numbers)
+            else:
+                self.fail_batch(batch, e)
+            return
+        SmsOutbox.mark_sent(batch, provider_ids)
+        self.sent += len(batch)
+
+    def split_batch(self, batch, numbers):
+        """Resend a rejected bulk request as two halves.
+
+        The gateway rejects the whole request for one malformed number, so
+        bisecting until the bad recipients are alone keeps the rest sendable
+        (about 2 log2(n) extra requests per bad number).
+        """
+        first_half = set(numbers[:len(numbers) // 2])
+        self.send_batch([message for message in batch if normalize_number(message.phone_number) in first_half])
+        self.send_batch([message for message in batch if normalize_number(message.phone_number) not in first_half])
+
+    def fail_batch(self, batch, error):
+        # Messages in one batch can be on different attempts, so decide per message
+        dead = [message for message in batch if not error.retryable or message.attempts >= self.max_attempts]
+        retry = [message for message in batch if message not in dead]
+        if dead:
+            SmsOutbox.mark_dead(dead, str(error))
+            self.dead += len(dead)
+            self.stderr.write(f'Dead-lettered {len(dead)} SMS: {error}')
+        # Exponential backoff: retry_delay, 2x, 4x, ... grouped by attempt count
+        by_attempts = defaultdict(list)
+        for message in retry:
+            by_attempts[message.attempts].append(message)
+        for attempts, messages in by_attempts.items():
+            SmsOutbox.mark_retry(messages, str(error), timedelta(seconds=self.retry_delay * 2 ** (attempts - 1)))
+            self.retried += len(messages)
+        if retry:
+            self.stderr.write(f'{len(retry)} SMS will be retried: {error}')
@@ -0,0 +1,103 @@
+# client_appointments/management/commands/fake_sms_server.py
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+from django.core.management.base import BaseCommand
+
+
+_valid_recipient = re.compile(r'^639\d{9}$')
+
+
+def gateway_recipient(number):
+    """Recipients come back the way Semaphore reports them: 639XXXXXXXXX"""
+    digits = ''.join(char for char in number if char.isdigit())
+    return '63' + digits[1:] if digits.startswith('0') else digits
+
+
+class FakeSemaphoreHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode()
+        fields = {key: values[0] for key, values in parse_qs(body).items()}
+        time.sleep(server.latency)
+
+        if random.random() < server.failure_rate:
+            with server.lock:
+                server.stats['failures'] += 1
+            return self.reply(503, {'error': 'Service temporarily unavailable'})
+        if not fields.get('number') or not fields.get('message'):
+            return self.reply(200, {'number': ['The number field is required.']})
+
+        numbers = fields['number'].split(',')
+        # Like Semaphore, one malformed number rejects the whole request
+        if not all(_valid_recipient.match(gateway_recipient(number)) for number in numbers):
+            return self.reply(200, {'number': ['The number format is invalid.']})
+        with server.lock:
+            server.stats['requests'] += 1
+            server.stats['messages'] += len(numbers)
+            result = [
+                {'message_id': next(server.next_id), 'recipient': gateway_recipient(number),
+                 'message': fields['message'], 'status': 'Pending'}
+                for number in numbers
+            ]
+        server.log(f"{len(numbers)} recipient(s): {fields['message'][:60]}")
+        self.reply(200, result)
+
+    def reply(self, code, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeSemaphoreServer(ThreadingHTTPServer):
+    """The fake gateway; port 0 picks a free port (see server_address)"""
+
+    def __init__(self, port=0, latency=0.0, failure_rate=0.0, log=None):
+        super().__init__(('127.0.0.1', port), FakeSemaphoreHandler)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.log = log or (lambda line: None)
+        self.stats = {'requests': 0, 'messages': 0, 'failures': 0}
+        self.lock = threading.Lock()
+        self.next_id = iter(range(1, 10 ** 9))
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/api/v4/messages'
+
+
+class Command(BaseCommand):
+    help = 'Run a local stand-in for the Semaphore messages API to test dispatch_sms without sending real SMS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8025)
+        parser.add_argument('--latency', type=float, default=0.05,
+                            help='Seconds each request takes, like the real gateway')
+        parser.add_argument('--failure-rate', type=float, default=0.0,
+                            help='Fraction of requests answered with HTTP 503')
+
+    def handle(self, *args, **options):
+        server = FakeSemaphoreServer(
+            options['port'], latency=options['latency'], failure_rate=options['failure_rate'], log=self.stdout.write
+        )
+        self.stdout.write(f'Fake SMS gateway on {server.url} (Ctrl+C to stop)')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        stats = server.stats
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['requests']} request(s), {stats['messages']} message(s), {stats['failures']} simulated failure(s)"
+        ))
@@ -0,0 +1,92 @@
+# client_appointments/management/commands/process_feedback_queue.py
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from client_appointments.feedback import enrich_feedback
+from client_appointments.models import FeedbackEnrichmentTask
+from client_appointments.translation_cache import translation_cache
+
+
+class Command(BaseCommand):
+    help = 'Translate and score queued appointment feedback (run continuously, or with --once)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Process the tasks that are due now and exit')
+        parser.add_argument('--batch-size', type=int, default=20,
+                            help='Tasks claimed per round trip to the queue')
+        parser.add_argument('--rate', type=float,
+                            default=getattr(settings, 'FEEDBACK_ENRICHMENT_RATE', 5),
+                            help='Maximum tasks per second for this worker (0 = no limit)')
+        parser.add_argument('--max-attempts', type=int,
+                            default=getattr(settings, 'FEEDBACK_ENRICHMENT_MAX_ATTEMPTS', 5),
+                            help='Attempts before falling back to untranslated scoring')
+        parser.add_argument('--idle-sleep', type=float, default=2.0,
+                            help='Seconds to wait when the queue is empty')
+
+    def handle(self, *args, **options):
+        interval = 1.0 / options['rate'] if options['rate'] > 0 else 0
+        retry_delay = getattr(settings, 'FEEDBACK_ENRICHMENT_RETRY_DELAY', 30)
+        processed = failed = 0
+        started = time.monotonic()
+
+        try:
+            while True:
+                tasks = FeedbackEnrichmentTask.claim(options['batch_size'])
+                if not tasks:
+                    if options['once']:
+                        break
+                    time.sleep(options['idle_sleep'])
+                    continue
+
+                for task in tasks:
+                    task_started = time.monotonic()
+                    if self.run_task(task, options['max_attempts'], retry_delay):
+                        processed += 1
+                    else:
+                        failed += 1
+                    # Throttle to the configured throughput
+                    elapsed = time.monotonic() - task_started
+                    if interval > elapsed:
+                        time.sleep(interval - elapsed)
+        except KeyboardInterrupt:
+            pass
+
+        duration = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} task(s), {failed} retried or failed '
+            f'in {duration:.1f}s ({processed / duration:.1f} tasks/s)'
+        ))
+        cache = translation_cache.stats()
+        self.stdout.write(
+            f"Translation cache: {cache['memory_hits']} memory hit(s), {cache['db_hits']} database hit(s), "
+            f"{cache['misses']} miss(es), hit ratio {cache['hit_ratio']:.0%}"
+        )
+
+    def run_task(self, task, max_attempts, retry_delay):
+        appointment = task.appointment
+        try:
+            enriched = enrich_feedback(appointment)
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+            if task.attempts < max_attempts:
+                # Exponential backoff: retry_delay, 2x, 4x, ...
+                if task.mark_retry(error, timedelta(seconds=retry_delay * 2 ** (task.attempts - 1))):
+                    self.stderr.write(f'Appointment {appointment.id}: attempt {task.attempts} failed ({error}), retrying')
+            else:
+                # Out of retries: keep the old behaviour of scoring the untranslated text
+                try:
+                    enrich_feedback(appointment, translate=False)
+                except Exception as fallback_error:
+                    error = f'{error}; fallback: {type(fallback_error).__name__}: {fallback_error}'
+                if task.mark_failed(error):
+                    self.stderr.write(f'Appointment {appointment.id}: giving up after {task.attempts} attempts ({error})')
+            return False
+
+        # Feedback resubmitted while this ran: the task is Queued again for the
+        # new text, so leave it alone rather than marking it Done
+        if not enriched or not task.mark_done():
+            self.stderr.write(f'Appointment {appointment.id}: feedback changed while enriching, left queued')
+            return False
+        return True
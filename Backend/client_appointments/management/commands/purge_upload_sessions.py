@@ -0,0 +1,22 @@
+# client_appointments/management/commands/purge_upload_sessions.py
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from client_appointments.models import UploadSession
+from client_appointments.uploads import discard_session
+
+
+class Command(BaseCommand):
+    help = 'Delete resumable uploads that have not received a chunk recently, along with their part files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-hours', type=int, default=24,
+                            help='Purge sessions idle for at least this many hours')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['older_than_hours'])
+        purged = 0
+        for session in UploadSession.objects.filter(updated_at__lt=cutoff).iterator():
+            discard_session(session)
+            purged += 1
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} upload session(s)'))
@@ -0,0 +1,19 @@
+# client_appointments/management/commands/rebuild_appointment_stats.py
+import time
+from django.core.management.base import BaseCommand
+from client_appointments.models import AppointmentStatsRollup
+
+
+class Command(BaseCommand):
+    help = 'Recompute the appointment stats rollup table from the appointments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows per INSERT')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rows = AppointmentStatsRollup.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {rows} rollup row(s) in {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,79 @@
+# client_appointments/management/commands/rescore_feedback.py
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand
+from client_appointments.feedback import analyze_sentiment_batch, get_sentiment_analyzer
+from client_appointments.models import ClientAppointment
+
+
+class Command(BaseCommand):
+    help = 'Re-score the sentiment of all appointment feedback (e.g. after a lexicon or threshold change)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Rows read, scored and written per chunk')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Scoring processes (1 scores in this process)')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        workers = max(options['workers'], 1)
+        started = time.monotonic()
+        self.total = self.changed = 0
+
+        if workers == 1:
+            get_sentiment_analyzer()
+            for ids, texts, current in self.chunks(chunk_size):
+                self.write_scores(ids, current, analyze_sentiment_batch(texts))
+        else:
+            # Each worker loads the lexicon once; the main process only reads and writes rows
+            with ProcessPoolExecutor(max_workers=workers, initializer=get_sentiment_analyzer) as pool:
+                in_flight = []
+                for ids, texts, current in self.chunks(chunk_size):
+                    in_flight.append((ids, current, pool.submit(analyze_sentiment_batch, texts)))
+                    # Keep a bounded number of chunks in memory
+                    if len(in_flight) >= workers * 2:
+                        ids, current, future = in_flight.pop(0)
+                        self.write_scores(ids, current, future.result())
+                        self.report(started)
+                for ids, current, future in in_flight:
+                    self.write_scores(ids, current, future.result())
+
+        self.report(started, final=True)
+
+    def chunks(self, chunk_size):
+        """Yield (ids, texts, current (score, label) pairs) for feedback rows, walking the primary key"""
+        last_id = 0
+        while True:
+            rows = list(
+                ClientAppointment.objects
+                .filter(id__gt=last_id, feedback__isnull=False)
+                .exclude(feedback='')
+                .order_by('id')
+                .values_list('id', 'translated_feedback', 'feedback', 'sentiment_score', 'sentiment_label')[:chunk_size]
+            )
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            # Score the English translation when the enrichment worker has produced one
+            yield [row[0] for row in rows], [row[1] or row[2] for row in rows], [row[3:] for row in rows]
+
+    def write_scores(self, ids, current, scores):
+        # Only rows whose score or label moved are written, so a repeated run writes nothing
+        appointments = [
+            ClientAppointment(id=appointment_id, sentiment_score=score, sentiment_label=label)
+            for appointment_id, old, (score, label) in zip(ids, current, scores)
+            if old != (score, label)
+        ]
+        ClientAppointment.objects.bulk_update(appointments, ['sentiment_score', 'sentiment_label'], batch_size=500)
+        self.total += len(ids)
+        self.changed += len(appointments)
+
+    def report(self, started, final=False):
+        duration = max(time.monotonic() - started, 1e-6)
+        message = (
+            f'Re-scored {self.total} feedback row(s), {self.changed} changed, '
+            f'in {duration:.1f}s ({self.total / duration:.0f} rows/s)'
+        )
+        self.stdout.write(self.style.SUCCESS(message) if final else message)
@@ -0,0 +1,381 @@
+# client_appointments/management/commands/seed_data.py
+import random
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, time as dt_time, timedelta
+from django.contrib.auth import hashers
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from appointment_nature.models import AppointmentNature
+from appointment_schedule.models import Appointment
+from clients.models import Client
+from clients.search import build_search_fields
+from personnel.models import Personnel
+from client_appointments.models import (
+    AppointmentAttachment,
+    AppointmentDateCapacity,
+    AppointmentStatsRollup,
+    ClientAppointment,
+    default_daily_capacity,
+)
+from client_appointments.uploads import detect_content_type, sha256_of, store_blob
+
+# Every seeded client and personnel username starts with this, so --flush only touches seeded rows
+SEED_PREFIX = 'seed-'
+# Password of every seeded account, for logging in while benchmarking
+SEED_PASSWORD = 'seed-password'
+
+FIRST_NAMES = [
+    'Maria', 'Jose', 'Juan', 'Ana', 'Mark', 'John', 'Michael', 'Angel', 'Jerome', 'Kristine',
+    'Jennifer', 'Christian', 'Mary Grace', 'Joshua', 'Rhea', 'Ramon', 'Liza', 'Paolo', 'Carmela', 'Noel',
+    'Rowena', 'Danilo', 'Marites', 'Ernesto', 'Josefina', 'Renato', 'Lourdes', 'Arnel', 'Cristina', 'Rogelio',
+]
+LAST_NAMES = [
+    'Santos', 'Reyes', 'Cruz', 'Bautista', 'Ocampo', 'Garcia', 'Mendoza', 'Torres', 'Tomas', 'Andrada',
+    'Castillo', 'Flores', 'Villanueva', 'Ramos', 'Castro', 'Rivera', 'Aquino', 'Navarro', 'Salazar', 'Mercado',
+    'Dela Cruz', 'De Leon', 'Soriano', 'Pascual', 'Gonzales', 'Lopez', 'Fernandez', 'Dizon', 'Manalo', 'Valdez',
+]
+# (occupation, weight); None is a client who left it blank
+OCCUPATIONS = [
+    ('Teacher', 12), ('Farmer', 10), ('Driver', 9), ('Vendor', 9), ('Student', 14), ('Nurse', 5),
+    ('Engineer', 4), ('Housewife', 10), ('Office Clerk', 7), ('OFW', 6), ('Retired', 6), ('Fisherman', 3),
+    (None, 15),
+]
+CIVIL_STATUSES = [('Single', 40), ('Married', 45), ('Widowed', 8), ('Separated', 5), ('Divorced', 2)]
+# (province, city, barangays)
+LOCATIONS = [
+    ('Bulacan', 'Malolos', ['Atlag', 'Bulihan', 'Longos', 'Mojon', 'Santo Rosario']),
+    ('Bulacan', 'Meycauayan', ['Bancal', 'Calvario', 'Lawa', 'Perez']),
+    ('Pampanga', 'San Fernando', ['Dolores', 'Sindalan', 'Telabastagan']),
+    ('Metro Manila', 'Quezon City', ['Bagong Silangan', 'Batasan Hills', 'Commonwealth', 'Holy Spirit']),
+    ('Metro Manila', 'Caloocan', ['Bagong Barrio', 'Camarin', 'Grace Park']),
+]
+NATURES = [
+    ('Estate Tax', 'Examiner'),
+    ('Donor\'s Tax', 'Examiner'),
+    ('Capital Gains Tax', 'Examiner'),
+    ('TIN Registration', 'Administrative Officer'),
+    ('Certificate Authorizing Registration', 'Deputy'),
+    ('Tax Clearance', 'Administrative Officer'),
+    ('Complaint', 'Head of Office'),
+]
+# Share of bookings per nature, same order as NATURES
+NATURE_WEIGHTS = [18, 10, 22, 25, 12, 10, 3]
+TIME_SLOTS = ['8:00 - 9:30 AM', '10:00 - 11:30 AM', '2:00 - 3:30 PM']
+# (text, language, rating)
+FEEDBACK_SAMPLES = [
+    ('Very helpful staff, the process was quick.', 'en', 5),
+    ('Smooth transaction, thank you!', 'en', 5),
+    ('Okay naman, medyo mahaba ang pila.', 'tl', 3),
+    ('Mabilis at maayos ang serbisyo. Salamat po!', 'tl', 5),
+    ('I had to come back twice because of missing documents.', 'en', 2),
+    ('The officer explained everything clearly.', 'en', 4),
+    ('Sobrang tagal ng paghihintay.', 'tl', 1),
+    ('Good service but the waiting area is crowded.', 'en', 3),
+]
+# Small but well-formed files; seeded attachments share them like identical real uploads do
+SAMPLE_FILES = [
+    ('requirements.pdf', b'%PDF-1.4\n1 0 obj <<>> endobj\ntrailer <<>>\n%%EOF\n' + b' ' * 40000),
+    ('valid_id.png', b'\x89PNG\r\n\x1a\n' + b'\x00' * 120000),
+    ('receipt.jpg', b'\xff\xd8\xff\xe0' + b'\x00' * 60000 + b'\xff\xd9'),
+]
+
+
+@contextmanager
+def manual_timestamps(model, *field_names):
+    """Let created_at/updated_at be set explicitly instead of stamped with now()"""
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a production-sized data set: clients, personnel, appointment natures, schedules, '
+        'appointments, attachments and feedback. The same options and --seed always give the same rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=1000, help='Clients to create')
+        parser.add_argument('--personnel', type=int, default=20, help='Personnel to create')
+        parser.add_argument('--appointments-per-client', type=float, default=3.0,
+                            help='Average appointments per client (geometrically distributed)')
+        parser.add_argument('--days-back', type=int, default=365, help='Appointments start this many days before --anchor-date')
+        parser.add_argument('--days-ahead', type=int, default=60, help='and end this many days after it')
+        parser.add_argument('--attachment-rate', type=float, default=0.3, help='Share of appointments with attachments')
+        parser.add_argument('--feedback-rate', type=float, default=0.4, help='Share of completed appointments with feedback')
+        parser.add_argument('--anchor-date', type=date.fromisoformat, default=None,
+                            help='"Today" for the generated data (YYYY-MM-DD); defaults to today')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per INSERT')
+        parser.add_argument('--flush', action='store_true', help='Delete previously seeded rows first')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.anchor = options['anchor_date'] or date.today()
+        self.first_day = self.anchor - timedelta(days=options['days_back'])
+        self.last_day = self.anchor + timedelta(days=options['days_ahead'])
+        self.workdays = [
+            self.first_day + timedelta(days=offset)
+            for offset in range((self.last_day - self.first_day).days + 1)
+            if (self.first_day + timedelta(days=offset)).weekday() < 5
+        ]
+        if not self.workdays:
+            raise CommandError('The date window contains no weekdays')
+        started = time.monotonic()
+
+        if options['flush']:
+            self.flush()
+        elif Client.objects.filter(username__startswith=SEED_PREFIX).exists():
+            raise CommandError('Seeded rows already exist; pass --flush to replace them')
+
+        # One hash for every account; hashing per row would dominate the run
+        self.password = hashers.make_password(SEED_PASSWORD)
+        natures = self.seed_natures()
+        personnel = self.seed_personnel(options['personnel'])
+        self.seed_schedules(personnel)
+        blobs = self.store_sample_files()
+
+        clients = appointments = attachments = 0
+        for offset in range(0, options['clients'], self.batch_size):
+            count = min(self.batch_size, options['clients'] - offset)
+            with transaction.atomic():
+                client_ids = self.seed_clients(offset, count)
+                created = self.seed_appointments(client_ids, natures, personnel, options)
+                attachments += self.seed_attachments(client_ids, blobs, options['attachment_rate'])
+            clients += count
+            appointments += created
+            self.stdout.write(f'  {clients}/{options["clients"]} clients, {appointments} appointments')
+
+        booked_dates = self.rebuild_capacity_ledger()
+        rollups = AppointmentStatsRollup.rebuild(batch_size=self.batch_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {clients} clients, {len(personnel)} personnel, {len(natures)} natures, '
+            f'{appointments} appointments and {attachments} attachments '
+            f'({booked_dates} ledger dates, {rollups} rollup rows) in {time.monotonic() - started:.1f}s. '
+            f'Accounts use the password "{SEED_PASSWORD}".'
+        ))
+
+    def flush(self):
+        # Appointments, attachments and schedules go with their clients and personnel
+        with transaction.atomic():
+            Client.objects.filter(username__startswith=SEED_PREFIX).delete()
+            Personnel.objects.filter(username__startswith=SEED_PREFIX).delete()
+
+    def aware(self, day, hour, minute=0):
+        return timezone.make_aware(datetime.combine(day, dt_time(hour, minute)))
+
+    def seed_natures(self):
+        natures = []
+        for name, routing_option in NATURES:
+            nature, _ = AppointmentNature.objects.get_or_create(
+                nature=name,
+                defaults={'routing_option': routing_option, 'description': f'{name} inquiries'}
+            )
+            natures.append(nature)
+        return natures
+
+    def seed_personnel(self, count):
+        positions = ['HeadOfOffice', 'Deputy'] + ['Administrative Officer'] * max(count // 4, 1)
+        positions += ['Examiner'] * max(count - len(positions), 0)
+        Personnel.objects.bulk_create([
+            Personnel(
+                username=f'{SEED_PREFIX}officer{i}',
+                email=f'{SEED_PREFIX}officer{i}@example.com',
+                password=self.password,
+                position=positions[i],
+                firstname=self.rng.choice(FIRST_NAMES),
+                lastname=self.rng.choice(LAST_NAMES),
+                MobileNumber=f'0918{i:07d}',
+                address='Malolos, Bulacan',
+                birthplace='Malolos',
+                birthday=date(1965 + i % 30, 1 + i % 12, 1 + i % 28),
+                sex=self.rng.choice(['Male', 'Female']),
+            )
+            for i in range(count)
+        ])
+        # MySQL does not return ids from bulk_create
+        return list(Personnel.objects.filter(username__startswith=SEED_PREFIX).order_by('id'))
+
+    def seed_schedules(self, personnel):
+        by_position = {}
+        for person in personnel:
+            by_position.setdefault(person.position, []).append(person)
+        heads = by_position.get('HeadOfOffice') or personnel
+        schedules = [
+            Appointment(
+                date=day,
+                time_slot=slot,
+                head_of_office=self.rng.choice(heads),
+                deputy=self.rng.choice(by_position.get('Deputy', [None])),
+                admin_officer=self.rng.choice(by_position.get('Administrative Officer', [None])),
+                examiner=self.rng.choice(by_position.get('Examiner', [None])),
+            )
+            for day in self.workdays
+            for slot in TIME_SLOTS
+        ]
+        # (date, time_slot) is unique; keep schedules that already exist
+        Appointment.objects.bulk_create(schedules, batch_size=self.batch_size, ignore_conflicts=True)
+
+    def store_sample_files(self):
+        blobs = []
+        for filename, content in SAMPLE_FILES:
+            file_obj = ContentFile(content, name=filename)
+            content_type = detect_content_type(file_obj, filename)
+            name, sha256 = store_blob(file_obj, sha256_of(file_obj))
+            blobs.append((filename, name, sha256, len(content), content_type))
+        return blobs
+
+    def seed_clients(self, offset, count):
+        occupations, occupation_weights = zip(*OCCUPATIONS)
+        civil_statuses, civil_status_weights = zip(*CIVIL_STATUSES)
+        clients = []
+        for i in range(offset, offset + count):
+            sex = self.rng.choice(['Male', 'Female'])
+            age = int(self.rng.triangular(18, 85, 34))
+            province, city, barangays = self.rng.choice(LOCATIONS)
+            joined = self.aware(self.first_day - timedelta(days=self.rng.randint(0, 730)), self.rng.randint(7, 19))
+            client = Client(
+                username=f'{SEED_PREFIX}client{i}',
+                email=f'{SEED_PREFIX}client{i}@example.com',
+                password=self.password,
+                firstname=self.rng.choice(FIRST_NAMES),
+                middlename=self.rng.choice(LAST_NAMES) if self.rng.random() < 0.8 else None,
+                lastname=self.rng.choice(LAST_NAMES),
+                contact_number=f'09{self.rng.randint(100000000, 999999999)}',
+                occupation=self.rng.choices(occupations, occupation_weights)[0],
+                province=province,
+                city=city,
+                barangay=self.rng.choice(barangays),
+                street=f'{self.rng.randint(1, 999)} Purok {self.rng.randint(1, 7)}' if self.rng.random() < 0.7 else None,
+                civil_status=self.rng.choices(civil_statuses, civil_status_weights)[0] if age >= 21 else 'Single',
+                birthplace=city,
+                birthday=self.anchor - timedelta(days=age * 365 + self.rng.randint(0, 364)),
+                sex=sex,
+                is_pwd=self.rng.random() < 0.05,
+                is_pregnant=sex == 'Female' and 18 <= age <= 40 and self.rng.random() < 0.06,
+                date_joined=joined,
+                created_at=joined,
+                updated_at=joined,
+            )
+            # bulk_create skips save(), which normally fills these
+            client.search_name, client.search_text = build_search_fields(client)
+            clients.append(client)
+        with manual_timestamps(Client, 'created_at', 'updated_at'):
+            Client.objects.bulk_create(clients, batch_size=self.batch_size)
+        return list(
+            Client.objects
+            .filter(username__in=[client.username for client in clients])
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+
+    def seed_appointments(self, client_ids, natures, personnel, options):
+        # Geometric count per client with the requested mean; some clients never book
+        mean = options['appointments_per_client']
+        continue_probability = mean / (mean + 1)
+        examiners = [person for person in personnel if person.position == 'Examiner'] or personnel
+        appointments = []
+        for client_id in client_ids:
+            while self.rng.random() < continue_probability:
+                appointment_date = self.rng.choice(self.workdays)
+                booked_at = self.aware(
+                    appointment_date - timedelta(days=self.rng.randint(1, 30)),
+                    self.rng.randint(7, 21), self.rng.randint(0, 59)
+                )
+                status = self.pick_status(appointment_date)
+                appointment = ClientAppointment(
+                    client_id=client_id,
+                    inquiry_type=self.rng.choices(natures, NATURE_WEIGHTS[:len(natures)])[0],
+                    assigned_officer=self.rng.choice(examiners),
+                    appointment_date=appointment_date,
+                    status=status,
+                    notes='Walk-in' if self.rng.random() < 0.1 else None,
+                    created_at=booked_at,
+                    updated_at=booked_at,
+                )
+                if status == 'Completed' and self.rng.random() < options['feedback_rate']:
+                    self.add_feedback(appointment)
+                appointments.append(appointment)
+        with manual_timestamps(ClientAppointment, 'created_at', 'updated_at'):
+            ClientAppointment.objects.bulk_create(appointments, batch_size=self.batch_size)
+        return len(appointments)
+
+    def pick_status(self, appointment_date):
+        if appointment_date < self.anchor:
+            return self.rng.choices(['Completed', 'Cancelled', 'Confirmed'], [78, 15, 7])[0]
+        return self.rng.choices(['Pending', 'Confirmed', 'Rescheduled', 'Cancelled'], [45, 40, 8, 7])[0]
+
+    def add_feedback(self, appointment):
+        text, language, rating = self.rng.choice(FEEDBACK_SAMPLES)
+        appointment.feedback = text
+        appointment.feedback_language = language
+        appointment.translated_feedback = text if language == 'en' else None
+        appointment.rating = rating
+        appointment.sentiment_score = (rating - 3) / 2
+        appointment.sentiment_label = 'Positive' if rating >= 4 else 'Negative' if rating <= 2 else 'Neutral'
+        appointment.enrichment_status = 'Done' if language == 'en' else 'Pending'
+
+    def seed_attachments(self, client_ids, blobs, rate):
+        appointments = (
+            ClientAppointment.objects
+            .filter(client_id__in=client_ids)
+            .order_by('id')
+            .values_list('id', 'created_at')
+        )
+        attachments = []
+        for appointment_id, created_at in appointments:
+            if self.rng.random() >= rate:
+                continue
+            for filename, name, sha256, size, content_type in self.rng.sample(blobs, self.rng.randint(1, len(blobs))):
+                attachment = AppointmentAttachment(
+                    appointment_id=appointment_id,
+                    filename=filename,
+                    file_size=size,
+                    sha256=sha256,
+                    content_type=content_type,
+                    uploaded_at=created_at,
+                )
+                attachment.file.name = name
+                attachments.append(attachment)
+        with manual_timestamps(AppointmentAttachment, 'uploaded_at'):
+            AppointmentAttachment.objects.bulk_create(attachments, batch_size=self.batch_size)
+        return len(attachments)
+
+    def rebuild_capacity_ledger(self):
+        """Set `booked` from the appointments, raising `capacity` on dates seeded past it"""
+        booked_per_date = dict(
+            ClientAppointment.objects
+            .exclude(status='Cancelled')
+            .values('appointment_date')
+            .annotate(total=Count('id'))
+            .order_by()
+            .values_list('appointment_date', 'total')
+        )
+        existing = AppointmentDateCapacity.objects.in_bulk(booked_per_date, field_name='appointment_date')
+        default_capacity = default_daily_capacity()
+        changed, created = [], []
+        for appointment_date, booked in booked_per_date.items():
+            row = existing.get(appointment_date)
+            if row is None:
+                row = AppointmentDateCapacity(appointment_date=appointment_date, capacity=default_capacity)
+                created.append(row)
+            else:
+                changed.append(row)
+            row.booked = booked
+            row.capacity = max(row.capacity, booked)
+        with transaction.atomic():
+            AppointmentDateCapacity.objects.bulk_update(changed, ['booked', 'capacity'], batch_size=self.batch_size)
+            AppointmentDateCapacity.objects.bulk_create(created, batch_size=self.batch_size)
+        return len(booked_per_date)
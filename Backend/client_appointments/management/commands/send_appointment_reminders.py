@@ -0,0 +1,51 @@
+# client_appointments/management/commands/send_appointment_reminders.py
+import time
+from datetime import date, datetime, timedelta
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from client_appointments.reminders import queue_reminders
+
+
+class Command(BaseCommand):
+    help = "Queue day-before SMS reminders for tomorrow's confirmed and rescheduled appointments"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Appointment date to remind about (YYYY-MM-DD, default tomorrow)')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running and queue reminders once a day at --at')
+        parser.add_argument('--at', default='08:00', help='Local time of day for --loop (HH:MM)')
+        parser.add_argument('--dispatch', action='store_true',
+                            help='Send the queued messages right away (dispatch_sms --once)')
+
+    def handle(self, *args, **options):
+        try:
+            run_at = datetime.strptime(options['at'], '%H:%M').time()
+            for_date = date.fromisoformat(options['date']) if options['date'] else None
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if not options['loop']:
+            self.run(for_date or timezone.localdate() + timedelta(days=1), options['dispatch'])
+            return
+
+        try:
+            while True:
+                # Reruns are harmless, so simply run now and then at every run_at
+                self.run(timezone.localdate() + timedelta(days=1), options['dispatch'])
+                now = timezone.localtime()
+                next_run = now.replace(hour=run_at.hour, minute=run_at.minute, second=0, microsecond=0)
+                if next_run <= now:
+                    next_run += timedelta(days=1)
+                time.sleep((next_run - now).total_seconds())
+        except KeyboardInterrupt:
+            pass
+
+    def run(self, for_date, dispatch):
+        started = time.monotonic()
+        queued = queue_reminders(for_date)
+        self.stdout.write(self.style.SUCCESS(
+            f'Queued {queued} reminder(s) for {for_date} in {time.monotonic() - started:.2f}s'
+        ))
+        if dispatch and queued:
+            call_command('dispatch_sms', once=True, stdout=self.stdout, stderr=self.stderr)
@@ -0,0 +1,37 @@
+# client_appointments/management/commands/translation_cache.py
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+from client_appointments.models import TranslationCacheEntry
+from client_appointments.translation_cache import translation_cache
+
+
+class Command(BaseCommand):
+    help = 'Show translation cache statistics and evict old or excess entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prune', action='store_true',
+                            help='Evict entries past TRANSLATION_CACHE_MAX_AGE_DAYS or above TRANSLATION_CACHE_MAX_ROWS')
+        parser.add_argument('--max-rows', type=int, help='Override TRANSLATION_CACHE_MAX_ROWS')
+        parser.add_argument('--max-age-days', type=int, help='Override TRANSLATION_CACHE_MAX_AGE_DAYS')
+
+    def handle(self, *args, **options):
+        if options['prune']:
+            deleted = translation_cache.evict(options['max_rows'], options['max_age_days'])
+            self.stdout.write(self.style.SUCCESS(f'Evicted {deleted} translation cache entr{"y" if deleted == 1 else "ies"}'))
+
+        totals = TranslationCacheEntry.objects.aggregate(entries=Count('id'), hits=Sum('hits'))
+        entries = totals['entries']
+        hits = totals['hits'] or 0
+        # Every entry was created by exactly one translator call (a miss)
+        lookups = hits + entries
+        ratio = hits / lookups if lookups else 0.0
+        self.stdout.write(f'Entries: {entries}, database hits: {hits}, misses: {entries}, hit ratio: {ratio:.0%}')
+
+        languages = (
+            TranslationCacheEntry.objects
+            .values('detected_language')
+            .annotate(count=Count('id'))
+            .order_by('-count')
+        )
+        for row in languages:
+            self.stdout.write(f"  {row['detected_language']}: {row['count']}")
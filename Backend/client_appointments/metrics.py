@@ -0,0 +1,44 @@
+# client_appointments/metrics.py
+from django.db.models import Count
+from utils.metrics import REGISTRY, Gauge, Histogram, register_cache
+
+# Translation is a network call; sentiment scoring is local and fast
+TRANSLATION_LATENCY = Histogram(
+    'feedback_translation_duration_seconds', 'Time spent in the feedback translator',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+SENTIMENT_LATENCY = Histogram(
+    'feedback_sentiment_duration_seconds', 'Time spent scoring the sentiment of one feedback',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+)
+SMS_OUTBOX_DEPTH = Gauge(
+    'sms_outbox_messages', 'SMS outbox rows by status', ['status'], per_process=False
+)
+FEEDBACK_QUEUE_DEPTH = Gauge(
+    'feedback_enrichment_tasks', 'Feedback enrichment tasks by status', ['status'], per_process=False
+)
+
+
+def translation_cache_stats():
+    from .translation_cache import translation_cache
+    stats = translation_cache.stats()
+    return {
+        'hits': stats['memory_hits'] + stats['db_hits'],
+        'misses': stats['misses'],
+        'entries': stats['memory_entries'],
+    }
+
+
+def collect_queue_depths():
+    """Row counts per status, served by the (status, run_after) queue indexes"""
+    from .models import FeedbackEnrichmentTask, SmsOutbox
+    for gauge, model in ((SMS_OUTBOX_DEPTH, SmsOutbox), (FEEDBACK_QUEUE_DEPTH, FeedbackEnrichmentTask)):
+        counts = dict(model.objects.values('status').annotate(total=Count('id')).order_by().values_list('status', 'total'))
+        # Report empty statuses as 0 rather than leaving the last value behind
+        for status, _ in model.STATUS_CHOICES:
+            gauge.set(counts.get(status, 0), status=status)
+
+
+def register():
+    register_cache('translation', translation_cache_stats)
+    REGISTRY.on_scrape(collect_queue_depths)
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:55
+
+import client_appointments.models
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_date_capacity(apps, schema_editor):
+    ClientAppointment = apps.get_model('client_appointments', 'ClientAppointment')
+    AppointmentDateCapacity = apps.get_model('client_appointments', 'AppointmentDateCapacity')
+    capacity = getattr(settings, 'APPOINTMENT_DAILY_CAPACITY', 10)
+    booked_per_date = (
+        ClientAppointment.objects
+        .exclude(status='Cancelled')
+        .values('appointment_date')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    AppointmentDateCapacity.objects.bulk_create(
+        [
+            AppointmentDateCapacity(
+                appointment_date=row['appointment_date'],
+                capacity=capacity,
+                booked=row['total'],
+            )
+            for row in booked_per_date
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client_appointments', '0003_add_rescheduled_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentDateCapacity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('appointment_date', models.DateField(unique=True)),
+                ('capacity', models.PositiveSmallIntegerField(default=client_appointments.models.default_daily_capacity)),
+                ('booked', models.PositiveSmallIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Appointment date capacities',
+                'ordering': ['appointment_date'],
+            },
+        ),
+        migrations.RunPython(backfill_date_capacity, migrations.RunPython.noop),
+    ]
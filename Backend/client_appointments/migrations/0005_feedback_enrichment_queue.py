@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:57
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client_appointments', '0004_appointment_date_capacity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clientappointment',
+            name='enrichment_status',
+            field=models.CharField(blank=True, choices=[('Pending', 'Pending'), ('Done', 'Done'), ('Failed', 'Failed')], max_length=10, null=True),
+        ),
+        migrations.CreateModel(
+            name='FeedbackEnrichmentTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('Queued', 'Queued'), ('Running', 'Running'), ('Done', 'Done'), ('Failed', 'Failed')], default='Queued', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('appointment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='enrichment_task', to='client_appointments.clientappointment')),
+            ],
+            options={
+                'ordering': ['run_after', 'id'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='feedback_task_queue_idx')],
+            },
+        ),
+    ]
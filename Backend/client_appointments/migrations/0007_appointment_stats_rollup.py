@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_stats_rollup(apps, schema_editor):
+    ClientAppointment = apps.get_model('client_appointments', 'ClientAppointment')
+    AppointmentStatsRollup = apps.get_model('client_appointments', 'AppointmentStatsRollup')
+    grouped = (
+        ClientAppointment.objects
+        .values('appointment_date', 'status', 'inquiry_type_id', 'assigned_officer_id')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    AppointmentStatsRollup.objects.bulk_create(
+        [
+            AppointmentStatsRollup(
+                appointment_date=row['appointment_date'],
+                status=row['status'],
+                inquiry_type_id=row['inquiry_type_id'],
+                assigned_officer_id=row['assigned_officer_id'],
+                count=row['total'],
+            )
+            for row in grouped
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointment_nature', '0001_initial'),
+        ('client_appointments', '0006_translation_cache'),
+        ('personnel', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentStatsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('appointment_date', models.DateField()),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Confirmed', 'Confirmed'), ('Rescheduled', 'Rescheduled'), ('Cancelled', 'Cancelled'), ('Completed', 'Completed')], max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('assigned_officer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats_rollups', to='personnel.personnel')),
+                ('inquiry_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats_rollups', to='appointment_nature.appointmentnature')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['assigned_officer', 'appointment_date'], name='stats_rollup_officer_idx')],
+                'constraints': [models.UniqueConstraint(fields=('appointment_date', 'status', 'inquiry_type', 'assigned_officer'), name='unique_stats_rollup_key')],
+            },
+        ),
+        migrations.RunPython(backfill_stats_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:06
+
+import mimetypes
+
+from django.db import migrations, models
+
+
+def backfill_content_type(apps, schema_editor):
+    # Existing files are not re-read; their names are a good enough guess
+    AppointmentAttachment = apps.get_model('client_appointments', 'AppointmentAttachment')
+    for attachment in AppointmentAttachment.objects.only('id', 'filename').iterator():
+        guessed, _ = mimetypes.guess_type(attachment.filename)
+        if guessed:
+            AppointmentAttachment.objects.filter(pk=attachment.pk).update(content_type=guessed)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client_appointments', '0008_resumable_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointmentattachment',
+            name='content_type',
+            field=models.CharField(default='application/octet-stream', max_length=100),
+        ),
+        migrations.RunPython(backfill_content_type, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointment_nature', '0001_initial'),
+        ('client_appointments', '0010_sms_outbox'),
+        ('personnel', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clientappointment',
+            name='reminder_sent_for',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='clientappointment',
+            index=models.Index(fields=['appointment_date', 'status'], name='appointment_date_status_idx'),
+        ),
+    ]
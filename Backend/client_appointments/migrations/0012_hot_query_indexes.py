@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointment_nature', '0001_initial'),
+        ('client_appointments', '0011_appointment_reminders'),
+        ('personnel', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointmentattachment',
+            index=models.Index(fields=['appointment', 'id'], name='attachment_appointment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointmentattachment',
+            index=models.Index(fields=['uploaded_at'], name='attachment_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clientappointment',
+            index=models.Index(fields=['created_at', 'id'], name='appointment_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clientappointment',
+            index=models.Index(fields=['client', 'created_at'], name='appointment_client_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clientappointment',
+            index=models.Index(fields=['assigned_officer', 'created_at'], name='appointment_officer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clientappointment',
+            index=models.Index(fields=['status', 'created_at'], name='appointment_status_idx'),
+        ),
+    ]
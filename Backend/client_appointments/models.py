@@ -1,8 +1,26 @@
 # client_appointments/models.py
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from datetime import timedelta
+import uuid
 from clients.models import Client
 from personnel.models import Personnel
 from appointment_nature.models import AppointmentNature
+from utils.sms import normalize_number
+
+FULL_SCHEDULE_MESSAGE = 'This schedule is already full. Please select another date.'
+
+
+class DateFullError(ValidationError):
+    """The appointment's date has no slot left in the capacity ledger"""
+
+    def __init__(self):
+        super().__init__({'appointment_date': FULL_SCHEDULE_MESSAGE})
+
 
 class ClientAppointment(models.Model):
     STATUS_CHOICES = [
@@ -19,6 +37,12 @@ class ClientAppointment(models.Model):
         ('Negative', 'Negative'),
     ]
     
+    ENRICHMENT_STATUS_CHOICES = [
+        ('Pending', 'Pending'),
+        ('Done', 'Done'),
+        ('Failed', 'Failed'),
+    ]
+    
     client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='appointments')
     inquiry_type = models.ForeignKey(AppointmentNature, on_delete=models.CASCADE, related_name='appointments')
     appointment_date = models.DateField()
@@ -36,11 +60,28 @@ class ClientAppointment(models.Model):
         blank=True, 
         null=True
     )
+    # Translation and sentiment are filled in by the feedback enrichment worker
+    enrichment_status = models.CharField(
+        max_length=10,
+        choices=ENRICHMENT_STATUS_CHOICES,
+        blank=True,
+        null=True
+    )
+    # Date the day-before reminder was queued for; a rescheduled appointment gets a new one
+    reminder_sent_for = models.DateField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['appointment_date', 'status'], name='appointment_date_status_idx'),
+            # Keyset pages (newest first), unfiltered and per client, officer or status
+            models.Index(fields=['created_at', 'id'], name='appointment_created_idx'),
+            models.Index(fields=['client', 'created_at'], name='appointment_client_idx'),
+            models.Index(fields=['assigned_officer', 'created_at'], name='appointment_officer_idx'),
+            models.Index(fields=['status', 'created_at'], name='appointment_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.client.full_name} - {self.inquiry_type.nature} - {self.appointment_date}"
@@ -48,13 +89,476 @@ class ClientAppointment(models.Model):
     @property
     def inquiry_display_name(self):
         return self.inquiry_type.nature
+    
+    @property
+    def holds_slot(self):
+        # Cancelled appointments give their slot back to the date
+        return self.status != 'Cancelled'
+    
+    def clean(self):
+        # Early, friendly check for forms (e.g. the admin); save() takes the slot for real
+        if self.holds_slot and self.appointment_date:
+            stored = self._stored_slot()
+            if stored != (self.appointment_date, True) and AppointmentDateCapacity.is_full(self.appointment_date):
+                raise DateFullError()
+    
+    def save(self, *args, **kwargs):
+        """Save and keep the per-date capacity ledger in step, whoever does the saving.
+
+        Creating, cancelling, un-cancelling or moving an appointment takes or
+        gives back its slot in the same transaction as the row. Raises
+        DateFullError, and saves nothing, when the new date is full.
+        """
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not {'appointment_date', 'status'} & set(update_fields):
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            # Lock the stored row so concurrent edits of one appointment move its slot once
+            old_date, old_holds = self._stored_slot(lock=True) or (None, False)
+            if not AppointmentDateCapacity.transfer(old_date, old_holds, self.appointment_date, self.holds_slot):
+                raise DateFullError()
+            super().save(*args, **kwargs)
+    
+    def _stored_slot(self, lock=False):
+        """(appointment_date, holds_slot) as stored in the database, or None for a new appointment"""
+        if self._state.adding or self.pk is None:
+            return None
+        rows = ClientAppointment.objects.filter(pk=self.pk)
+        if lock:
+            rows = rows.select_for_update()
+        stored = rows.values_list('appointment_date', 'status').first()
+        return (stored[0], stored[1] != 'Cancelled') if stored else None
 
 class AppointmentAttachment(models.Model):
     appointment = models.ForeignKey(ClientAppointment, on_delete=models.CASCADE, related_name='attachments')
     file = models.FileField(upload_to='appointment_attachments/')
     filename = models.CharField(max_length=255)
     file_size = models.PositiveIntegerField()
+    # Content hash; attachments with the same bytes share one stored file
+    sha256 = models.CharField(max_length=64, blank=True, null=True, db_index=True)
+    # Detected once at upload and sent as-is on download
+    content_type = models.CharField(max_length=100, default='application/octet-stream')
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            # Zip downloads read an appointment's attachments in id order
+            models.Index(fields=['appointment', 'id'], name='attachment_appointment_idx'),
+            models.Index(fields=['uploaded_at'], name='attachment_uploaded_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.appointment} - {self.filename}"
+
+
+def default_daily_capacity():
+    return getattr(settings, 'APPOINTMENT_DAILY_CAPACITY', 10)
+
+
+class AppointmentDateCapacity(models.Model):
+    """Per-date booking ledger.
+
+    `booked` counts the non-cancelled appointments on `appointment_date` and is
+    only ever changed with conditional UPDATEs, so concurrent bookings cannot
+    push it past `capacity`.
+    """
+    appointment_date = models.DateField(unique=True)
+    capacity = models.PositiveSmallIntegerField(default=default_daily_capacity)
+    booked = models.PositiveSmallIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['appointment_date']
+        verbose_name_plural = 'Appointment date capacities'
+    
     def __str__(self):
-        return f"{self.appointment} - {self.filename}"
\ No newline at end of file
+        return f"{self.appointment_date} ({self.booked}/{self.capacity})"
+    
+    @property
+    def remaining(self):
+        return max(self.capacity - self.booked, 0)
+    
+    @classmethod
+    def is_full(cls, appointment_date):
+        return cls.objects.filter(
+            appointment_date=appointment_date,
+            booked__gte=F('capacity')
+        ).exists()
+    
+    @classmethod
+    def reserve(cls, appointment_date):
+        """Take one slot on the date. Returns False when the date is already full."""
+        cls.objects.get_or_create(appointment_date=appointment_date)
+        updated = cls.objects.filter(
+            appointment_date=appointment_date,
+            booked__lt=F('capacity')
+        ).update(booked=F('booked') + 1)
+        return updated == 1
+    
+    @classmethod
+    def release(cls, appointment_date):
+        """Give one slot on the date back"""
+        cls.objects.filter(
+            appointment_date=appointment_date,
+            booked__gt=0
+        ).update(booked=F('booked') - 1)
+    
+    @classmethod
+    def transfer(cls, old_date, old_holds, new_date, new_holds):
+        """Move a booking between dates/states. Returns False if the new date is full."""
+        if new_holds and (not old_holds or new_date != old_date):
+            if not cls.reserve(new_date):
+                return False
+        if old_holds and (not new_holds or new_date != old_date):
+            cls.release(old_date)
+        return True
+
+
+
+class FeedbackEnrichmentTask(models.Model):
+    """Queue entry asking the worker to translate and score an appointment's feedback.
+
+    There is at most one task per appointment; submitting feedback again simply
+    re-queues it.
+    """
+    STATUS_CHOICES = [
+        ('Queued', 'Queued'),
+        ('Running', 'Running'),
+        ('Done', 'Done'),
+        ('Failed', 'Failed'),
+    ]
+    
+    appointment = models.OneToOneField(ClientAppointment, on_delete=models.CASCADE, related_name='enrichment_task')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='feedback_task_queue_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Enrichment for appointment {self.appointment_id} ({self.status})"
+    
+    @classmethod
+    def enqueue(cls, appointment):
+        task, _ = cls.objects.update_or_create(
+            appointment=appointment,
+            defaults={
+                'status': 'Queued',
+                'attempts': 0,
+                'run_after': timezone.now(),
+                'locked_at': None,
+                'last_error': None,
+            }
+        )
+        return task
+    
+    @classmethod
+    def claim(cls, limit, stale_after=timedelta(minutes=10)):
+        """Lock up to `limit` due tasks for this worker and mark them Running.
+
+        Running tasks whose worker died (locked longer than `stale_after`) are
+        picked up again.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            tasks = list(
+                cls.objects
+                .select_for_update(skip_locked=True)
+                .filter(
+                    Q(status='Queued', run_after__lte=now) |
+                    Q(status='Running', locked_at__lt=now - stale_after)
+                )
+                .order_by('run_after', 'id')[:limit]
+            )
+            cls.objects.filter(id__in=[task.id for task in tasks]).update(
+                status='Running',
+                attempts=F('attempts') + 1,
+                locked_at=now
+            )
+        for task in tasks:
+            task.status = 'Running'
+            task.attempts += 1
+            task.locked_at = now
+        return tasks
+    
+    def _finish(self, **fields):
+        """Apply `fields` only if this worker's claim still holds.
+
+        Resubmitted feedback re-queues the task (and resets locked_at and
+        attempts) while a worker may still be running it; that worker must
+        then leave the task Queued so the new text gets enriched. Returns
+        whether the update was applied.
+        """
+        updated = type(self).objects.filter(
+            id=self.id, status='Running', locked_at=self.locked_at, attempts=self.attempts
+        ).update(updated_at=timezone.now(), **fields)
+        if updated:
+            for name, value in fields.items():
+                setattr(self, name, value)
+        return bool(updated)
+    
+    def mark_done(self):
+        return self._finish(status='Done', locked_at=None, last_error=None)
+    
+    def mark_retry(self, error, delay):
+        return self._finish(status='Queued', locked_at=None, last_error=error, run_after=timezone.now() + delay)
+    
+    def mark_failed(self, error):
+        return self._finish(status='Failed', locked_at=None, last_error=error)
+
+
+
+class SmsOutbox(models.Model):
+    """An SMS waiting to be sent by the dispatch_sms worker.
+
+    Rows are written in the same transaction as the change they announce, so a
+    message is never lost when the SMS gateway is slow or down, and is never
+    sent for a change that was rolled back.
+    """
+    KIND_CHOICES = [
+        ('Confirmed', 'Confirmed'),
+        ('Cancelled', 'Cancelled'),
+        ('Reminder', 'Reminder'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('Queued', 'Queued'),
+        ('Sending', 'Sending'),
+        ('Sent', 'Sent'),
+        ('Dead', 'Dead'),
+    ]
+    
+    appointment = models.ForeignKey(ClientAppointment, on_delete=models.SET_NULL, blank=True, null=True, related_name='sms_messages')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    phone_number = models.CharField(max_length=20)
+    message = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    provider_message_id = models.CharField(max_length=50, blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['run_after', 'id']
+        verbose_name_plural = 'SMS outbox'
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='sms_outbox_queue_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} SMS to {self.phone_number} ({self.status})"
+    
+    @classmethod
+    def enqueue(cls, phone_number, message, kind, appointment=None):
+        return cls.objects.create(
+            appointment=appointment,
+            kind=kind,
+            phone_number=phone_number,
+            message=message
+        )
+    
+    @classmethod
+    def claim(cls, limit, stale_after=timedelta(minutes=10)):
+        """Lock up to `limit` due messages for this worker and mark them Sending.
+
+        Messages whose worker died mid-send (locked longer than `stale_after`)
+        are picked up again.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            messages = list(
+                cls.objects
+                .select_for_update(skip_locked=True)
+                .filter(
+                    Q(status='Queued', run_after__lte=now) |
+                    Q(status='Sending', locked_at__lt=now - stale_after)
+                )
+                .order_by('run_after', 'id')[:limit]
+            )
+            cls.objects.filter(id__in=[message.id for message in messages]).update(
+                status='Sending',
+                attempts=F('attempts') + 1,
+                locked_at=now
+            )
+        for message in messages:
+            message.status = 'Sending'
+            message.attempts += 1
+            message.locked_at = now
+        return messages
+    
+    @classmethod
+    def mark_sent(cls, messages, provider_ids=None):
+        """Mark a batch sent; `provider_ids` maps normalize_number() of each recipient to the gateway's message id"""
+        now = timezone.now()
+        cls.objects.filter(id__in=[message.id for message in messages]).update(
+            status='Sent',
+            locked_at=None,
+            last_error=None,
+            sent_at=now,
+            updated_at=now
+        )
+        # Only the gateway ids differ per row
+        tracked = []
+        for message in messages:
+            message.status = 'Sent'
+            message.sent_at = now
+            message.provider_message_id = (provider_ids or {}).get(normalize_number(message.phone_number))
+            if message.provider_message_id:
+                tracked.append(message)
+        cls.objects.bulk_update(tracked, ['provider_message_id'], batch_size=200)
+    
+    @classmethod
+    def mark_retry(cls, messages, error, delay):
+        cls.objects.filter(id__in=[message.id for message in messages]).update(
+            status='Queued',
+            locked_at=None,
+            last_error=error,
+            run_after=timezone.now() + delay,
+            updated_at=timezone.now()
+        )
+    
+    @classmethod
+    def mark_dead(cls, messages, error):
+        cls.objects.filter(id__in=[message.id for message in messages]).update(
+            status='Dead',
+            locked_at=None,
+            last_error=error,
+            updated_at=timezone.now()
+        )
+
+
+class TranslationCacheEntry(models.Model):
+    """Persistent translator result for a normalized feedback text (see translation_cache.py)"""
+    text_hash = models.CharField(max_length=64, unique=True)
+    translated_text = models.TextField()
+    detected_language = models.CharField(max_length=10)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        verbose_name_plural = 'Translation cache entries'
+    
+    def __str__(self):
+        return f"{self.detected_language}: {self.translated_text[:50]}"
+
+
+
+class AppointmentStatsRollup(models.Model):
+    """Appointment counts per (date, status, inquiry type, officer).
+
+    Kept in step by the signals in signals.py and rebuilt from scratch with
+    `manage.py rebuild_appointment_stats`; the stats endpoint reads it instead
+    of counting ClientAppointment rows.
+    """
+    appointment_date = models.DateField()
+    status = models.CharField(max_length=20, choices=ClientAppointment.STATUS_CHOICES)
+    inquiry_type = models.ForeignKey(AppointmentNature, on_delete=models.CASCADE, related_name='stats_rollups')
+    assigned_officer = models.ForeignKey(Personnel, on_delete=models.CASCADE, related_name='stats_rollups')
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['appointment_date', 'status', 'inquiry_type', 'assigned_officer'],
+                name='unique_stats_rollup_key'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['assigned_officer', 'appointment_date'], name='stats_rollup_officer_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.appointment_date} {self.status}: {self.count}"
+    
+    KEY_FIELDS = ('appointment_date', 'status', 'inquiry_type_id', 'assigned_officer_id')
+    
+    @classmethod
+    def key_for(cls, appointment, overrides=None):
+        """Rollup key of an appointment, with `overrides` taking precedence over its current values"""
+        overrides = overrides or {}
+        return tuple(
+            overrides[field] if field in overrides else getattr(appointment, field)
+            for field in cls.KEY_FIELDS
+        )
+    
+    @classmethod
+    def _lookup(cls, key):
+        appointment_date, status, inquiry_type_id, assigned_officer_id = key
+        return {
+            'appointment_date': appointment_date,
+            'status': status,
+            'inquiry_type_id': inquiry_type_id,
+            'assigned_officer_id': assigned_officer_id,
+        }
+    
+    @classmethod
+    def increment(cls, key):
+        lookup = cls._lookup(key)
+        cls.objects.get_or_create(**lookup)
+        cls.objects.filter(**lookup).update(count=F('count') + 1)
+    
+    @classmethod
+    def decrement(cls, key):
+        cls.objects.filter(count__gt=0, **cls._lookup(key)).update(count=F('count') - 1)
+    
+    @classmethod
+    def rebuild(cls, batch_size=1000):
+        """Recompute every rollup row from ClientAppointment. Returns the number of rows written."""
+        grouped = (
+            ClientAppointment.objects
+            .values('appointment_date', 'status', 'inquiry_type_id', 'assigned_officer_id')
+            .annotate(total=models.Count('id'))
+            .order_by()
+        )
+        with transaction.atomic():
+            cls.objects.all().delete()
+            rows = cls.objects.bulk_create(
+                (
+                    cls(
+                        appointment_date=row['appointment_date'],
+                        status=row['status'],
+                        inquiry_type_id=row['inquiry_type_id'],
+                        assigned_officer_id=row['assigned_officer_id'],
+                        count=row['total'],
+                    )
+                    for row in grouped.iterator()
+                ),
+                batch_size=batch_size,
+            )
+        return len(rows)
+
+
+
+class UploadSession(models.Model):
+    """A resumable attachment upload in progress (see uploads.py).
+
+    Chunks are appended to a part file on disk; `received_size` is the offset
+    the next chunk has to start at.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    appointment = models.ForeignKey(ClientAppointment, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    received_size = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.filename} ({self.received_size}/{self.total_size})"
+    
+    @property
+    def is_complete(self):
+        return self.received_size >= self.total_size
@@ -0,0 +1,53 @@
+# client_appointments/reminders.py
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from .models import ClientAppointment, SmsOutbox
+
+REMINDER_STATUSES = ['Confirmed', 'Rescheduled']
+
+# Deliberately the same text for everyone on a date, so the dispatcher can send
+# it to up to 1000 numbers per request
+REMINDER_TEMPLATE = (
+    "Reminder: you have an appointment with us tomorrow, {date}. "
+    "If you can no longer attend, please cancel it so the slot can go to another client."
+)
+
+
+def queue_reminders(for_date, batch_size=1000):
+    """Queue one reminder SMS per appointment on `for_date` that has not had one yet.
+
+    Appointments are claimed and marked in the same transaction as their
+    outbox rows, so running this again (or in two processes at once) never
+    queues a second reminder. Returns the number of reminders queued.
+    """
+    message = getattr(settings, 'APPOINTMENT_REMINDER_TEMPLATE', REMINDER_TEMPLATE).format(
+        date=for_date.strftime('%B %d, %Y')
+    )
+    queued = 0
+    while True:
+        with transaction.atomic():
+            # Served by appointment_date_status_idx
+            due = list(
+                ClientAppointment.objects
+                .select_for_update(skip_locked=True, of=('self',))
+                .filter(appointment_date=for_date, status__in=REMINDER_STATUSES)
+                .filter(Q(reminder_sent_for__isnull=True) | ~Q(reminder_sent_for=for_date))
+                .exclude(client__contact_number__isnull=True)
+                .exclude(client__contact_number='')
+                .order_by()
+                .values_list('id', 'client__contact_number')[:batch_size]
+            )
+            if not due:
+                return queued
+            SmsOutbox.objects.bulk_create(
+                [
+                    SmsOutbox(appointment_id=appointment_id, kind='Reminder', phone_number=phone, message=message)
+                    for appointment_id, phone in due
+                ],
+                batch_size=batch_size
+            )
+            ClientAppointment.objects.filter(id__in=[appointment_id for appointment_id, _ in due]).update(
+                reminder_sent_for=for_date
+            )
+            queued += len(due)
@@ -1,11 +1,30 @@
 # client_appointments/serializers.py
+import logging
 from rest_framework import serializers
-from .models import ClientAppointment, AppointmentAttachment
+from django.db import transaction
+from .models import (
+    FULL_SCHEDULE_MESSAGE, AppointmentAttachment, AppointmentDateCapacity, ClientAppointment, DateFullError, SmsOutbox
+)
 from clients.models import Client
 from personnel.models import Personnel
 from appointment_nature.models import AppointmentNature
 from datetime import date
-from utils.sms import send_sms 
+
+logger = logging.getLogger(__name__)
+
+STATUS_SMS_TEMPLATES = {
+    'Confirmed': "Hi {name}, your appointment on {date} has been CONFIRMED.",
+    'Cancelled': "Hi {name}, your appointment on {date} has been CANCELLED.",
+}
+
+
+def queue_status_sms(appointment, status):
+    """Queue the status notification for the dispatch_sms worker; call inside the saving transaction"""
+    client = appointment.client
+    if status not in STATUS_SMS_TEMPLATES or not client.contact_number:
+        return None
+    message = STATUS_SMS_TEMPLATES[status].format(name=client.full_name, date=appointment.appointment_date)
+    return SmsOutbox.enqueue(client.contact_number, message, status, appointment=appointment)
 
 class AppointmentAttachmentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -27,9 +46,9 @@ class ClientAppointmentSerializer(serializers.ModelSerializer):
             'inquiry_description', 'routing_option', 'appointment_date', 'status', 
             'assigned_officer', 'assigned_officer_name', 'notes', 'feedback',
             'translated_feedback', 'feedback_language', 'rating', 'sentiment_score',
-            'sentiment_label', 'attachments', 'created_at', 'updated_at'
+            'sentiment_label', 'enrichment_status', 'attachments', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['client', 'inquiry_type', 'created_at', 'updated_at']
+        read_only_fields = ['client', 'inquiry_type', 'enrichment_status', 'created_at', 'updated_at']
 
 class ClientAppointmentCreateSerializer(serializers.ModelSerializer):
     officer_id = serializers.IntegerField(write_only=True, required=True)
@@ -45,13 +64,11 @@ class ClientAppointmentCreateSerializer(serializers.ModelSerializer):
     
     def validate(self, attrs):
         appointment_date = attrs.get('appointment_date')
-        if appointment_date:
-            # Exclude the current appointment (if updating) when counting
-            count = ClientAppointment.objects.filter(appointment_date=appointment_date).count()
-            if count >= 10:
-                raise serializers.ValidationError({
-                    'appointment_date': 'This schedule is already full. Please select another date.'
-                })
+        # Early check against the ledger; the slot itself is taken in create()
+        if appointment_date and AppointmentDateCapacity.is_full(appointment_date):
+            raise serializers.ValidationError({
+                'appointment_date': FULL_SCHEDULE_MESSAGE
+            })
         return attrs
     
     def validate_inquiry_type(self, value):
@@ -69,34 +86,33 @@ class ClientAppointmentCreateSerializer(serializers.ModelSerializer):
         return value
     
     def create(self, validated_data):
-        print("[DEBUG] Starting appointment creation...")
+        logger.debug("Starting appointment creation")
 
         officer_id = validated_data.pop('officer_id')
         try:
             officer = Personnel.objects.get(id=officer_id)
         except Personnel.DoesNotExist:
-            print("[ERROR] Officer not found.")
+            logger.error("Officer not found.")
             raise serializers.ValidationError({"officer_id": "Officer not found"})
 
         client = validated_data.get('client')
 
         status = 'Confirmed' if client.is_pwd or client.is_pregnant or client.age >= 60 else 'Pending'
-        print(f"[DEBUG] Appointment status: {status}")
+        logger.debug("Appointment status: %s", status)
 
-        appointment = ClientAppointment.objects.create(
-            **validated_data,
-            assigned_officer=officer,
-            status=status
-        )
-        print(f"[DEBUG] Appointment created: {appointment}")
-
-        if status == 'Confirmed' and client.contact_number:
-            message = f"Hi {client.full_name}, your appointment on {appointment.appointment_date} has been CONFIRMED."
-            print(f"[DEBUG] Sending SMS to {client.contact_number}: {message}")
-            response = send_sms(client.contact_number, message)
-            print(f"[DEBUG] Semaphore response: {response.status_code} {response.text}")
-        else:
-            print("[DEBUG] No SMS sent (status not confirmed or no contact number).")
+        try:
+            with transaction.atomic():
+                # save() takes the date's slot in the capacity ledger
+                appointment = ClientAppointment.objects.create(
+                    **validated_data,
+                    assigned_officer=officer,
+                    status=status
+                )
+                if status == 'Confirmed':
+                    queue_status_sms(appointment, status)
+        except DateFullError:
+            raise serializers.ValidationError({'appointment_date': FULL_SCHEDULE_MESSAGE})
+        logger.debug("Appointment created: %s", appointment.pk)
 
         return appointment
 class ClientAppointmentUpdateSerializer(serializers.ModelSerializer):
@@ -113,15 +129,14 @@ class ClientAppointmentUpdateSerializer(serializers.ModelSerializer):
     
     def validate(self, attrs):
         appointment_date = attrs.get('appointment_date')
-        if appointment_date:
-            # Exclude the current appointment when counting
-            count = ClientAppointment.objects.filter(
-                appointment_date=appointment_date
-            ).exclude(id=self.instance.id).count()
-            if count >= 10:
-                raise serializers.ValidationError({
-                    'appointment_date': 'This schedule is already full. Please select another date.'
-                })
+        # The current appointment already holds its own slot on its date
+        moving = appointment_date and (
+            appointment_date != self.instance.appointment_date or not self.instance.holds_slot
+        )
+        if moving and AppointmentDateCapacity.is_full(appointment_date):
+            raise serializers.ValidationError({
+                'appointment_date': FULL_SCHEDULE_MESSAGE
+            })
         return attrs
     
     def validate_officer_id(self, value):
@@ -139,46 +154,32 @@ class ClientAppointmentUpdateSerializer(serializers.ModelSerializer):
         return value
     
     def update(self, instance, validated_data):
-        print("[DEBUG] Starting update for ClientAppointment ID:", instance.id)
+        logger.debug("Starting update for ClientAppointment ID: %s", instance.id)
 
         previous_status = instance.status
-        print(f"[DEBUG] Previous status: {previous_status}")
+        logger.debug("Previous status: %s", previous_status)
 
         officer_id = validated_data.pop('officer_id', None)
         if officer_id:
-            print(f"[DEBUG] Updating assigned officer to ID: {officer_id}")
+            logger.debug("Updating assigned officer to ID: %s", officer_id)
             try:
                 officer = Personnel.objects.get(id=officer_id)
                 instance.assigned_officer = officer
-                print(f"[DEBUG] Officer set to: {officer.firstname} {officer.lastname}")
+                logger.debug("Officer set to: %s %s", officer.firstname, officer.lastname)
             except Personnel.DoesNotExist:
-                print("[ERROR] Officer not found with ID:", officer_id)
+                logger.error("Officer not found with ID: %s", officer_id)
                 raise serializers.ValidationError({"officer_id": "Officer not found"})
 
-        # Perform the actual update
-        instance = super().update(instance, validated_data)
-        new_status = instance.status
-        print(f"[DEBUG] New status: {new_status}")
-
-        # Check and send SMS if status changed to Confirmed or Cancelled
-        if previous_status != new_status and new_status in ['Confirmed', 'Cancelled']:
-            client = instance.client
-            phone = client.contact_number
-            print(f"[DEBUG] Status changed — preparing to send SMS to: {phone}")
-
-            if phone:
-                if new_status == 'Confirmed':
-                    message = f"Hi {client.full_name}, your appointment on {instance.appointment_date} has been CONFIRMED."
-                elif new_status == 'Cancelled':
-                    message = f"Hi {client.full_name}, your appointment on {instance.appointment_date} has been CANCELLED."
-
-                print(f"[DEBUG] Sending SMS to {phone}: {message}")
-                response = send_sms(phone, message)
-                print(f"[DEBUG] Semaphore response: {response.status_code} - {response.text}")
-            else:
-                print("[DEBUG] No phone number provided — skipping SMS.")
-        else:
-            print("[DEBUG] No status change requiring SMS.")
-
-        print("[DEBUG] Update complete for ClientAppointment ID:", instance.id)
+        # Perform the actual update; save() moves the date slot in the same transaction
+        try:
+            with transaction.atomic():
+                instance = super().update(instance, validated_data)
+                # Queue an SMS if status changed to Confirmed or Cancelled
+                if previous_status != instance.status:
+                    queue_status_sms(instance, instance.status)
+        except DateFullError:
+            raise serializers.ValidationError({'appointment_date': FULL_SCHEDULE_MESSAGE})
+        logger.debug("New status: %s", instance.status)
+
+        logger.debug("Update complete for ClientAppointment ID: %s", instance.id)
         return instance
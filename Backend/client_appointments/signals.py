@@ -0,0 +1,41 @@
+# client_appointments/signals.py
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from .models import ClientAppointment, AppointmentDateCapacity, AppointmentStatsRollup
+
+
+@receiver(post_delete, sender=ClientAppointment)
+def release_date_capacity(sender, instance, **kwargs):
+    # Also runs for appointments removed through a client delete cascade
+    if instance.holds_slot:
+        AppointmentDateCapacity.release(instance.appointment_date)
+
+
+@receiver(post_init, sender=ClientAppointment)
+def remember_stats_key(sender, instance, **kwargs):
+    # Key fields as loaded from the database, so post_save can tell what moved.
+    # Deferred fields are skipped: save() does not write them, so they cannot change.
+    instance._stats_loaded = {
+        field: instance.__dict__[field]
+        for field in AppointmentStatsRollup.KEY_FIELDS
+        if field in instance.__dict__
+    } if instance.pk else None
+
+
+@receiver(post_save, sender=ClientAppointment)
+def update_stats_rollup(sender, instance, created, **kwargs):
+    new_key = AppointmentStatsRollup.key_for(instance)
+    loaded = instance._stats_loaded
+    if created or loaded is None:
+        AppointmentStatsRollup.increment(new_key)
+    else:
+        old_key = AppointmentStatsRollup.key_for(instance, loaded)
+        if old_key != new_key:
+            AppointmentStatsRollup.decrement(old_key)
+            AppointmentStatsRollup.increment(new_key)
+    instance._stats_loaded = dict(zip(AppointmentStatsRollup.KEY_FIELDS, new_key))
+
+
+@receiver(post_delete, sender=ClientAppointment)
+def remove_from_stats_rollup(sender, instance, **kwargs):
+    AppointmentStatsRollup.decrement(AppointmentStatsRollup.key_for(instance, instance._stats_loaded))
@@ -1,3 +1,1205 @@
-from django.test import TestCase
+import csv
+import glob
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import date, timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db.models import F
+from django.forms import modelform_factory
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from appointment_nature.models import AppointmentNature
+from appointment_schedule.models import Appointment
+from authentication.jwe_utils import jwe_manager
+from authentication.tests import personnel_header
+from clients.models import Client
+from personnel.models import Personnel
+from utils.query_plan import QueryPlanAssertions, analyze_tables
+from utils.metrics import Counter, Gauge, Histogram, Registry, render
+from utils.sms import normalize_number
+from utils.snapshot_cache import get_snapshot
+from .models import (
+    AppointmentAttachment,
+    AppointmentDateCapacity,
+    AppointmentStatsRollup,
+    ClientAppointment,
+    DateFullError,
+    FeedbackEnrichmentTask,
+    SmsOutbox,
+    TranslationCacheEntry,
+    UploadSession,
+)
+from .feedback import enrich_feedback, translate_text
+from .langid import identify_language
+from .langid_samples import BENCHMARK_SAMPLES
+from .management.commands.fake_sms_server import FakeSemaphoreServer
+from .management.commands.process_feedback_queue import Command as ProcessFeedbackQueue
+from .pagination import KeysetPagination
+from .reminders import REMINDER_STATUSES, queue_reminders
+from .translation_cache import TranslationCache, normalize_text
+from .uploads import create_attachment, finish_session
 
-# Create your tests here.
+# Enough rows that the planner prefers an index whenever one fits
+SEED_CLIENTS = 300
+SEED_APPOINTMENTS = 3000
+
+
+class AppointmentQueryPlanTests(QueryPlanAssertions, TestCase):
+    """Each hot appointment query must be answered through an index.
+
+    Where the code can be run, the tests EXPLAIN the statements it actually
+    sends (views, keyset paginator, reminder scheduler); the rest mirror the
+    querysets of the ZIP downloads and the admin. A change that drops or
+    bypasses one of their indexes fails here with the offending plan.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.officers = Personnel.objects.bulk_create([
+            Personnel(username=f'officer{i}', email=f'officer{i}@example.com', lastname='Officer', firstname=str(i), birthday=date(1980, 1, 1))
+            for i in range(10)
+        ])
+        cls.natures = AppointmentNature.objects.bulk_create([
+            AppointmentNature(nature=f'Nature {i}', routing_option='Examiner', description='')
+            for i in range(5)
+        ])
+        cls.clients = Client.objects.bulk_create([
+            Client(
+                username=f'client{i}', email=f'client{i}@example.com', lastname='Client', firstname=str(i),
+                birthday=date(1950 + i % 50, 1 + i % 12, 1 + i % 28), contact_number=f'0917{i:07d}'
+            )
+            for i in range(SEED_CLIENTS)
+        ])
+        statuses = [value for value, _ in ClientAppointment.STATUS_CHOICES]
+        cls.first_date = date(2026, 1, 5)
+        appointments = ClientAppointment.objects.bulk_create([
+            ClientAppointment(
+                client=cls.clients[i % SEED_CLIENTS],
+                inquiry_type=cls.natures[i % len(cls.natures)],
+                assigned_officer=cls.officers[i % len(cls.officers)],
+                appointment_date=cls.first_date + timedelta(days=i % 365),
+                status=statuses[i % len(statuses)],
+            )
+            for i in range(SEED_APPOINTMENTS)
+        ])
+        # bulk_create stamps every row with the same created_at; spread them out like real bookings
+        started = appointments[0].created_at - timedelta(days=365)
+        for i, appointment in enumerate(appointments):
+            appointment.created_at = started + timedelta(hours=3 * i)
+        ClientAppointment.objects.bulk_update(appointments, ['created_at'], batch_size=500)
+        cls.appointment = appointments[0]
+        AppointmentAttachment.objects.bulk_create([
+            AppointmentAttachment(appointment=appointment, file=f'appointment_attachments/{appointment.id}.pdf', filename='scan.pdf', file_size=1)
+            for appointment in appointments[::3]
+        ])
+        AppointmentDateCapacity.objects.bulk_create([
+            AppointmentDateCapacity(appointment_date=cls.first_date + timedelta(days=i), booked=i % 12)
+            for i in range(365)
+        ])
+        AppointmentStatsRollup.rebuild()
+        Appointment.objects.bulk_create([
+            Appointment(date=cls.first_date + timedelta(days=i), head_of_office=cls.officers[0])
+            for i in range(365)
+        ])
+        analyze_tables(
+            Client, Personnel, AppointmentNature, ClientAppointment, AppointmentAttachment,
+            AppointmentDateCapacity, AppointmentStatsRollup, Appointment
+        )
+
+    def get(self, url, **params):
+        response = self.client.get(url, params, **personnel_header())
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def assertListIndexed(self, **params):
+        with self.assertQueriesIndexed():
+            self.get('/api/client-appointments/', **params)
+
+    def test_list_first_page(self):
+        self.assertListIndexed()
+
+    def test_list_next_page(self):
+        cursor = self.get('/api/client-appointments/', page_size=100)['next_cursor']
+        self.assertListIndexed(cursor=cursor)
+
+    def test_list_by_client(self):
+        self.assertListIndexed(client_id=self.clients[7].id)
+
+    def test_list_by_officer(self):
+        self.assertListIndexed(officer_id=self.officers[3].id)
+
+    def test_list_by_status(self):
+        self.assertListIndexed(status='Pending')
+
+    def test_list_by_date_range(self):
+        self.assertListIndexed(date_from=self.first_date, date_to=self.first_date + timedelta(days=6))
+
+    def test_by_client(self):
+        self.assertIndexed(ClientAppointment.objects.filter(client=self.clients[7]))
+
+    def test_reminder_batch(self):
+        for_date = ClientAppointment.objects.filter(status__in=REMINDER_STATUSES).values_list('appointment_date', flat=True)[0]
+        with self.assertQueriesIndexed():
+            self.assertGreater(queue_reminders(for_date), 0)
+
+    def test_attachments_zip(self):
+        self.assertIndexed(self.appointment.attachments.order_by('id'))
+
+    def test_attachments_bundle(self):
+        self.assertIndexed(
+            AppointmentAttachment.objects
+            .filter(appointment__appointment_date=self.first_date, appointment__assigned_officer_id=self.officers[0].id)
+            .select_related('appointment__client')
+            .order_by('appointment_id', 'id')
+        )
+
+    def test_attachment_admin_list(self):
+        self.assertIndexed(AppointmentAttachment.objects.order_by('-uploaded_at')[:100])
+
+    def test_availability_window(self):
+        with self.assertQueriesIndexed():
+            self.get('/api/client-appointments/availability/', date_from=self.first_date, date_to=self.first_date + timedelta(days=13))
+
+    def test_next_free_dates(self):
+        full_day = AppointmentDateCapacity.objects.filter(booked__gte=F('capacity')).first()
+        with self.assertQueriesIndexed():
+            data = self.get('/api/client-appointments/availability/', date=full_day.appointment_date)['data']
+        self.assertTrue(data['requested_date']['is_full'])
+
+    def test_stats_window(self):
+        with self.assertQueriesIndexed():
+            self.get('/api/client-appointments/stats/', date_from=self.first_date, date_to=self.first_date + timedelta(days=30))
+
+    def test_stats_by_officer(self):
+        with self.assertQueriesIndexed():
+            self.get('/api/client-appointments/stats/', officer_id=self.officers[0].id, breakdown='date')
+
+    def test_schedule_list(self):
+        self.assertIndexed(Appointment.objects.all()[:50])
+
+    def test_schedule_by_date(self):
+        self.assertIndexed(Appointment.objects.filter(date=self.first_date))
+
+
+@override_settings(APPOINTMENT_DAILY_CAPACITY=2)
+class CapacityLedgerTests(TestCase):
+    """AppointmentDateCapacity.booked must follow every save and delete of an appointment"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.officer = Personnel.objects.create(
+            username='officer', email='officer@example.com', lastname='Officer', firstname='One', birthday=date(1980, 1, 1)
+        )
+        cls.nature = AppointmentNature.objects.create(nature='Inquiry', routing_option='Examiner', description='')
+        cls.client_user = Client.objects.create(
+            username='juan', email='juan@example.com', lastname='Cruz', firstname='Juan',
+            birthday=date(1990, 1, 1), contact_number='09170000000'
+        )
+        cls.day = date.today() + timedelta(days=30)
+        cls.other_day = cls.day + timedelta(days=1)
+
+    def book(self, day=None, status='Pending'):
+        return ClientAppointment.objects.create(
+            client=self.client_user, inquiry_type=self.nature, assigned_officer=self.officer,
+            appointment_date=day or self.day, status=status
+        )
+
+    def booked(self, day=None):
+        ledger = AppointmentDateCapacity.objects.filter(appointment_date=day or self.day).first()
+        return ledger.booked if ledger else 0
+
+    def test_reserve_stops_at_capacity(self):
+        self.assertTrue(AppointmentDateCapacity.reserve(self.day))
+        self.assertTrue(AppointmentDateCapacity.reserve(self.day))
+        self.assertFalse(AppointmentDateCapacity.reserve(self.day))
+        self.assertEqual(self.booked(), 2)
+        self.assertTrue(AppointmentDateCapacity.is_full(self.day))
+
+    def test_release_never_goes_negative(self):
+        AppointmentDateCapacity.reserve(self.day)
+        AppointmentDateCapacity.release(self.day)
+        AppointmentDateCapacity.release(self.day)
+        self.assertEqual(self.booked(), 0)
+
+    def test_transfer_between_dates(self):
+        AppointmentDateCapacity.reserve(self.day)
+        self.assertTrue(AppointmentDateCapacity.transfer(self.day, True, self.other_day, True))
+        self.assertEqual((self.booked(), self.booked(self.other_day)), (0, 1))
+
+    def test_transfer_to_full_date_keeps_old_slot(self):
+        AppointmentDateCapacity.reserve(self.day)
+        AppointmentDateCapacity.reserve(self.other_day)
+        AppointmentDateCapacity.reserve(self.other_day)
+        self.assertFalse(AppointmentDateCapacity.transfer(self.day, True, self.other_day, True))
+        self.assertEqual((self.booked(), self.booked(self.other_day)), (1, 2))
+
+    def test_create_takes_slot_and_rejects_over_capacity(self):
+        self.book()
+        self.book()
+        with self.assertRaises(DateFullError):
+            self.book()
+        self.assertEqual(self.booked(), 2)
+        self.assertEqual(ClientAppointment.objects.filter(appointment_date=self.day).count(), 2)
+
+    def test_cancel_and_restore_move_slot(self):
+        appointment = self.book()
+        appointment.status = 'Cancelled'
+        appointment.save()
+        self.assertEqual(self.booked(), 0)
+        appointment.status = 'Confirmed'
+        appointment.save()
+        self.assertEqual(self.booked(), 1)
+
+    def test_saving_twice_does_not_double_count(self):
+        appointment = self.book()
+        appointment.notes = 'called ahead'
+        appointment.save()
+        appointment.save(update_fields=['notes'])
+        self.assertEqual(self.booked(), 1)
+
+    def test_moving_date_moves_slot(self):
+        appointment = self.book()
+        appointment.appointment_date = self.other_day
+        appointment.save()
+        self.assertEqual((self.booked(), self.booked(self.other_day)), (0, 1))
+
+    def test_moving_to_full_date_is_rejected(self):
+        self.book(self.other_day)
+        self.book(self.other_day)
+        appointment = self.book()
+        appointment.appointment_date = self.other_day
+        with self.assertRaises(DateFullError):
+            appointment.save()
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.appointment_date, self.day)
+        self.assertEqual((self.booked(), self.booked(self.other_day)), (1, 2))
+
+    def test_delete_releases_slot(self):
+        self.book().delete()
+        self.assertEqual(self.booked(), 0)
+
+    def test_admin_form_edits_keep_ledger(self):
+        # The admin saves through a ModelForm: clean() rejects full dates, save() moves the slot
+        form_class = modelform_factory(
+            ClientAppointment, fields=['client', 'inquiry_type', 'appointment_date', 'status', 'assigned_officer']
+        )
+        data = {
+            'client': self.client_user.id, 'inquiry_type': self.nature.id, 'appointment_date': self.day,
+            'status': 'Pending', 'assigned_officer': self.officer.id,
+        }
+        appointment = form_class(data).save()
+        self.assertEqual(self.booked(), 1)
+
+        form_class({**data, 'status': 'Cancelled'}, instance=appointment).save()
+        self.assertEqual(self.booked(), 0)
+
+        self.book()
+        self.book()
+        form = form_class({**data, 'status': 'Pending'}, instance=appointment)
+        self.assertFalse(form.is_valid())
+        self.assertIn('appointment_date', form.errors)
+        self.assertEqual(self.booked(), 2)
+
+    def test_api_rejects_full_date(self):
+        payload = {
+            'client': self.client_user.id, 'inquiry_type': self.nature.id,
+            'appointment_date': self.day.isoformat(), 'officer_id': self.officer.id,
+        }
+        for _ in range(2):
+            self.assertEqual(self.client.post('/api/client-appointments/', payload, content_type='application/json').status_code, 201)
+        response = self.client.post('/api/client-appointments/', payload, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.booked(), 2)
+
+
+class StatsRollupTests(TestCase):
+    """The signal-maintained rollup must always match a fresh rebuild()"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.officers = [
+            Personnel.objects.create(
+                username=f'officer{i}', email=f'officer{i}@example.com', lastname='Officer', firstname=str(i),
+                birthday=date(1980, 1, 1)
+            )
+            for i in range(2)
+        ]
+        cls.natures = [
+            AppointmentNature.objects.create(nature=nature, routing_option='Examiner', description='')
+            for nature in ('Inquiry', 'Complaint')
+        ]
+        cls.clients = [
+            Client.objects.create(
+                username=f'client{i}', email=f'client{i}@example.com', lastname='Cruz', firstname=str(i),
+                birthday=date(1990, 1, 1), contact_number='09170000000'
+            )
+            for i in range(2)
+        ]
+        cls.day = date.today() + timedelta(days=30)
+
+    def book(self, client, status='Pending', day=None, officer=None, nature=None):
+        return ClientAppointment.objects.create(
+            client=client, inquiry_type=nature or self.natures[0], assigned_officer=officer or self.officers[0],
+            appointment_date=day or self.day, status=status
+        )
+
+    def counts(self):
+        return {
+            AppointmentStatsRollup.key_for(row): row.count
+            for row in AppointmentStatsRollup.objects.filter(count__gt=0)
+        }
+
+    def assertMatchesRebuild(self):
+        maintained = self.counts()
+        AppointmentStatsRollup.rebuild()
+        self.assertEqual(maintained, self.counts())
+
+    def test_rollup_follows_every_change(self):
+        first = self.book(self.clients[0])
+        second = self.book(self.clients[0], status='Confirmed', nature=self.natures[1])
+        third = self.book(self.clients[1])
+        self.assertMatchesRebuild()
+        self.assertEqual(sum(self.counts().values()), 3)
+
+        first.status = 'Confirmed'
+        first.save()
+        self.assertMatchesRebuild()
+
+        second.appointment_date = self.day + timedelta(days=1)
+        second.status = 'Rescheduled'
+        second.save()
+        self.assertMatchesRebuild()
+
+        # Saved again from a fresh instance, and a save that changes nothing
+        third = ClientAppointment.objects.get(pk=third.pk)
+        third.assigned_officer = self.officers[1]
+        third.save()
+        third.save()
+        self.assertMatchesRebuild()
+
+        first.delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(sum(self.counts().values()), 2)
+
+    def test_client_delete_cascade(self):
+        for status in ('Pending', 'Confirmed', 'Cancelled'):
+            self.book(self.clients[0], status=status)
+        kept = self.book(self.clients[1], status='Confirmed')
+        self.assertMatchesRebuild()
+
+        self.clients[0].delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(self.counts(), {AppointmentStatsRollup.key_for(kept): 1})
+
+
+class KeysetPaginationTests(TestCase):
+    """Following next_cursor must visit every appointment exactly once, newest first"""
+
+    @classmethod
+    def setUpTestData(cls):
+        officer = Personnel.objects.create(
+            username='officer', email='officer@example.com', lastname='Officer', firstname='One', birthday=date(1980, 1, 1)
+        )
+        nature = AppointmentNature.objects.create(nature='Inquiry', routing_option='Examiner', description='')
+        client = Client.objects.create(
+            username='juan', email='juan@example.com', lastname='Cruz', firstname='Juan',
+            birthday=date(1990, 1, 1), contact_number='09170000000'
+        )
+        appointments = ClientAppointment.objects.bulk_create([
+            ClientAppointment(client=client, inquiry_type=nature, assigned_officer=officer,
+                              appointment_date=date(2026, 1, 5) + timedelta(days=i))
+            for i in range(23)
+        ])
+        # Ties on created_at must be broken by id
+        stamp = appointments[0].created_at
+        for i, appointment in enumerate(appointments):
+            appointment.created_at = stamp - timedelta(minutes=i // 4)
+        ClientAppointment.objects.bulk_update(appointments, ['created_at'])
+        cls.expected = list(ClientAppointment.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def walk(self, page_size):
+        ids, cursor, pages = [], None, 0
+        while True:
+            url = f'/api/client-appointments/?page_size={page_size}' + (f'&cursor={cursor}' if cursor else '')
+            body = self.client.get(url).json()
+            ids += [row['id'] for row in body['data']]
+            pages += 1
+            if not body['has_next']:
+                self.assertIsNone(body['next_cursor'])
+                return ids, pages
+            cursor = body['next_cursor']
+
+    def test_cursor_walk_visits_every_row_once(self):
+        for page_size in (1, 4, 5, 22, 23, 50):
+            ids, pages = self.walk(page_size)
+            self.assertEqual(ids, self.expected, f'page_size={page_size}')
+            self.assertEqual(pages, max(1, -(-len(self.expected) // page_size)))
+
+    def test_cursor_round_trip(self):
+        appointment = ClientAppointment.objects.order_by('-created_at', '-id')[5]
+        paginator = KeysetPagination()
+        self.assertEqual(
+            paginator.decode_cursor(paginator.encode_cursor(appointment)),
+            (appointment.created_at, appointment.id)
+        )
+
+    def test_invalid_cursor_is_a_400(self):
+        for cursor in ('garbage', 'bm90LWEtZGF0ZXwx', 'MjAyNi0wMS0wMXxhYmM='):
+            response = self.client.get(f'/api/client-appointments/?cursor={cursor}')
+            self.assertEqual(response.status_code, 400, cursor)
+
+    def test_export_matches_list_order(self):
+        # Exports read keyset batches too; the batches must line up with no gaps at the created_at ties
+        with self.settings(EXPORT_BATCH_SIZE=3), self.assertNumQueries(8):
+            response = self.client.get('/api/client-appointments/export/', **personnel_header())
+            # The rows are read while the response streams
+            content = b''.join(response.streaming_content).decode('utf-8-sig')
+        rows = list(csv.reader(io.StringIO(content)))[1:]
+        self.assertEqual([int(row[0]) for row in rows], self.expected)
+
+    def test_page_size_is_clamped(self):
+        body = self.client.get('/api/client-appointments/?page_size=0').json()
+        self.assertEqual(len(body['data']), 1)
+        body = self.client.get('/api/client-appointments/?page_size=nope').json()
+        self.assertEqual(len(body['data']), 23)
+
+
+class AttachmentFilesTestCase(TestCase):
+    """Appointments with real attachment files in a throwaway MEDIA_ROOT"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = self.settings(MEDIA_ROOT=self.media_root, UPLOAD_SESSION_DIR=os.path.join(self.media_root, 'sessions'))
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.officer = Personnel.objects.create(
+            username='officer', email='officer@example.com', lastname='Officer', firstname='One', birthday=date(1980, 1, 1)
+        )
+        self.nature = AppointmentNature.objects.create(nature='Inquiry', routing_option='Examiner', description='')
+        self.day = date.today() + timedelta(days=30)
+        self.appointments = []
+        for i in range(3):
+            client = Client.objects.create(
+                username=f'client{i}', email=f'client{i}@example.com', lastname=f'Last{i}', firstname=f'First{i}',
+                birthday=date(1990, 1, 1), contact_number=f'0917000000{i}'
+            )
+            self.appointments.append(ClientAppointment.objects.create(
+                client=client, inquiry_type=self.nature, assigned_officer=self.officer, appointment_date=self.day
+            ))
+
+    def attach(self, appointment, filename, content):
+        return create_attachment(appointment, ContentFile(content), filename, len(content))
+
+
+class AttachmentUploadTests(AttachmentFilesTestCase):
+
+    def blob_files(self):
+        return [name for _, _, names in os.walk(os.path.join(self.media_root, 'appointment_attachments')) for name in names]
+
+    def upload(self, appointment, filename, content, chunk_size=4):
+        url = f'/api/client-appointments/{appointment.id}/uploads/'
+        response = self.client.post(url, {'filename': filename, 'total_size': len(content)}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        session_url = f"{url}{response.json()['data']['session_id']}/"
+        for offset in range(0, len(content), chunk_size):
+            response = self.client.put(
+                f'{session_url}?offset={offset}', content[offset:offset + chunk_size], content_type='application/octet-stream'
+            )
+        return response
+
+    def test_identical_files_share_one_blob(self):
+        first = self.attach(self.appointments[0], 'scan.pdf', b'%PDF-1.4 same bytes')
+        second = self.attach(self.appointments[1], 'copy.pdf', b'%PDF-1.4 same bytes')
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual((first.sha256, first.content_type), (second.sha256, 'application/pdf'))
+        self.assertEqual(len(self.blob_files()), 1)
+
+    def test_resumable_upload(self):
+        response = self.upload(self.appointments[0], 'notes.txt', b'chunked upload body')
+        self.assertEqual(response.status_code, 201)
+        attachment = AppointmentAttachment.objects.get(id=response.json()['data']['id'])
+        with attachment.file.open('rb') as stored:
+            self.assertEqual(stored.read(), b'chunked upload body')
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'sessions')), [])
+
+    def test_resumable_upload_dedupes_against_existing_blob(self):
+        existing = self.attach(self.appointments[0], 'scan.txt', b'shared content')
+        response = self.upload(self.appointments[1], 'again.txt', b'shared content')
+        attachment = AppointmentAttachment.objects.get(id=response.json()['data']['id'])
+        self.assertEqual(attachment.file.name, existing.file.name)
+        self.assertEqual(len(self.blob_files()), 1)
+
+    def test_failed_finish_removes_new_blob_and_keeps_session(self):
+        with mock.patch.object(AppointmentAttachment, 'save', side_effect=DatabaseError('disk full')), \
+                self.assertLogs('client_appointments.views', 'ERROR'):
+            response = self.upload(self.appointments[0], 'notes.txt', b'never attached')
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(response.json()['success'])
+        self.assertEqual(self.blob_files(), [])
+        session = UploadSession.objects.get()
+        self.assertTrue(session.is_complete)
+        # Finishing again succeeds from the part file that was kept
+        attachment = finish_session(session)
+        with attachment.file.open('rb') as stored:
+            self.assertEqual(stored.read(), b'never attached')
+
+    def test_failed_finish_keeps_shared_blob(self):
+        existing = self.attach(self.appointments[0], 'scan.txt', b'shared content')
+        with mock.patch.object(AppointmentAttachment, 'save', side_effect=DatabaseError('disk full')), \
+                self.assertLogs('client_appointments.views', 'ERROR'):
+            response = self.upload(self.appointments[1], 'again.txt', b'shared content')
+        self.assertEqual(response.status_code, 500)
+        self.assertTrue(existing.file.storage.exists(existing.file.name))
+
+    def test_failed_finish_is_retried_by_get_or_empty_put(self):
+        for retry in ('get', 'put'):
+            with self.subTest(retry=retry):
+                with mock.patch.object(AppointmentAttachment, 'save', side_effect=DatabaseError('disk full')), \
+                        self.assertLogs('client_appointments.views', 'ERROR'):
+                    response = self.upload(self.appointments[0], f'{retry}.txt', b'retried body')
+                self.assertEqual(response.status_code, 500)
+                session = UploadSession.objects.get()
+                session_url = f'/api/client-appointments/{self.appointments[0].id}/uploads/{session.id}/'
+                # A chunk past the end is still refused while the session waits to be finished
+                response = self.client.put(f'{session_url}?offset=0', b'x', content_type='application/octet-stream')
+                self.assertEqual(response.status_code, 409)
+
+                if retry == 'get':
+                    response = self.client.get(session_url)
+                else:
+                    response = self.client.put(f'{session_url}?offset={session.total_size}', b'', content_type='application/octet-stream')
+                self.assertEqual(response.status_code, 201)
+                attachment = AppointmentAttachment.objects.get(id=response.json()['data']['id'])
+                with attachment.file.open('rb') as stored:
+                    self.assertEqual(stored.read(), b'retried body')
+                self.assertFalse(UploadSession.objects.exists())
+                self.assertEqual(self.client.get(session_url).status_code, 404)
+
+
+class AttachmentDownloadTests(AttachmentFilesTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.appointment = self.appointments[0]
+        self.attachment = self.attach(self.appointment, 'notes.txt', b'0123456789')
+        self.url = f'/api/client-appointments/{self.appointment.id}/attachments/{self.attachment.id}/file/'
+
+    def get(self, **headers):
+        response = self.client.get(self.url, **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_download_attachment_links_to_file_route(self):
+        response = self.client.get(
+            f'/api/client-appointments/{self.appointment.id}/download_attachment/', {'attachment_id': self.attachment.id}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['file_url'], f'http://testserver{self.url}')
+
+    def test_whole_file(self):
+        response, body = self.get()
+        self.assertEqual((response.status_code, body), (200, b'0123456789'))
+        self.assertEqual(response['ETag'], f'"{self.attachment.sha256}"')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_ranges(self):
+        for header, content_range, body in (
+            ('bytes=2-5', 'bytes 2-5/10', b'2345'),
+            ('bytes=7-', 'bytes 7-9/10', b'789'),
+            ('bytes=-3', 'bytes 7-9/10', b'789'),
+            ('bytes=8-100', 'bytes 8-9/10', b'89'),
+        ):
+            response, received = self.get(HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 206, header)
+            self.assertEqual((response['Content-Range'], received), (content_range, body))
+            self.assertEqual(response['Content-Length'], str(len(body)))
+
+    def test_unsatisfiable_and_multiple_ranges(self):
+        response, _ = self.get(HTTP_RANGE='bytes=10-')
+        self.assertEqual((response.status_code, response['Content-Range']), (416, 'bytes */10'))
+        # Several ranges are answered with the whole file
+        response, body = self.get(HTTP_RANGE='bytes=0-1,4-5')
+        self.assertEqual((response.status_code, body), (200, b'0123456789'))
+
+    def test_conditional_requests(self):
+        etag = f'"{self.attachment.sha256}"'
+        response, _ = self.get(HTTP_IF_NONE_MATCH=f'"other", W/{etag}')
+        self.assertEqual(response.status_code, 304)
+        response, body = self.get(HTTP_RANGE='bytes=0-3', HTTP_IF_RANGE=etag)
+        self.assertEqual((response.status_code, body), (206, b'0123'))
+        # The client's partial copy is of another version: send it all again
+        response, body = self.get(HTTP_RANGE='bytes=0-3', HTTP_IF_RANGE='"stale"')
+        self.assertEqual((response.status_code, body), (200, b'0123456789'))
+
+
+class AttachmentZipTests(AttachmentFilesTestCase):
+
+    def read_zip(self, response):
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        return {name: archive.read(name) for name in archive.namelist()}
+
+    def test_appointment_zip_reads_in_batches(self):
+        appointment = self.appointments[0]
+        for i in range(5):
+            self.attach(appointment, 'scan.pdf', f'page {i}'.encode())
+        with mock.patch('client_appointments.views.ZIP_BATCH_SIZE', 2):
+            files = self.read_zip(self.client.get(f'/api/client-appointments/{appointment.id}/attachments/zip/'))
+        self.assertEqual(sorted(files), ['scan (2).pdf', 'scan (3).pdf', 'scan (4).pdf', 'scan (5).pdf', 'scan.pdf'])
+        self.assertEqual(sorted(files.values()), [f'page {i}'.encode() for i in range(5)])
+
+    def test_bundle_has_every_appointment_of_the_day(self):
+        for appointment in self.appointments:
+            for i in range(3):
+                self.attach(appointment, f'file{i}.txt', f'{appointment.id}-{i}'.encode())
+        with mock.patch('client_appointments.views.ZIP_BATCH_SIZE', 2):
+            files = self.read_zip(self.client.get(
+                f'/api/client-appointments/attachments/zip/?appointment_date={self.day}', **personnel_header()
+            ))
+        self.assertEqual(len(files), 9)
+        for appointment in self.appointments:
+            folder = f'{appointment.id}_{appointment.client.lastname}_{appointment.client.firstname}'
+            for i in range(3):
+                self.assertEqual(files[f'{folder}/file{i}.txt'], f'{appointment.id}-{i}'.encode())
+
+
+@mock.patch('client_appointments.feedback.analyze_sentiment', lambda text: (0.5, 'Positive'))
+class FeedbackQueueTests(TestCase):
+    """A resubmission while the worker is enriching must leave the new text queued"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.officer = Personnel.objects.create(
+            username='officer', email='officer@example.com', lastname='Officer', firstname='One', birthday=date(1980, 1, 1)
+        )
+        cls.nature = AppointmentNature.objects.create(nature='Inquiry', routing_option='Examiner', description='')
+        cls.client_user = Client.objects.create(
+            username='juan', email='juan@example.com', lastname='Cruz', firstname='Juan',
+            birthday=date(1990, 1, 1), contact_number='09170000000'
+        )
+
+    def setUp(self):
+        self.appointment = ClientAppointment.objects.create(
+            client=self.client_user, inquiry_type=self.nature, assigned_officer=self.officer,
+            appointment_date=date.today(), status='Completed'
+        )
+        self.command = ProcessFeedbackQueue(stdout=io.StringIO(), stderr=io.StringIO())
+
+    def submit(self, text):
+        token = jwe_manager.create_token(self.client_user.id, self.client_user.username)
+        response = self.client.post(
+            f'/api/client-appointments/{self.appointment.id}/feedback/',
+            {'feedback': text, 'rating': 5}, content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def run_claimed(self, translate):
+        [task] = FeedbackEnrichmentTask.claim(10)
+        with mock.patch('client_appointments.feedback.translate_text', side_effect=translate):
+            return self.command.run_task(task, max_attempts=2, retry_delay=30)
+
+    def test_enriches_and_marks_done(self):
+        self.submit('Maayo kaayo')
+        self.assertTrue(self.run_claimed(lambda text: (f'EN: {text}', 'ceb')))
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.translated_feedback, 'EN: Maayo kaayo')
+        self.assertEqual(self.appointment.enrichment_status, 'Done')
+        self.assertEqual(self.appointment.enrichment_task.status, 'Done')
+
+    def test_resubmission_during_run_stays_queued(self):
+        self.submit('first')
+
+        def translate(text):
+            self.submit('second')
+            return f'EN: {text}', 'en'
+
+        self.assertFalse(self.run_claimed(translate))
+        self.appointment.refresh_from_db()
+        task = self.appointment.enrichment_task
+        self.assertEqual(self.appointment.feedback, 'second')
+        self.assertEqual(self.appointment.enrichment_status, 'Pending')
+        self.assertIsNone(self.appointment.translated_feedback)
+        self.assertEqual((task.status, task.attempts), ('Queued', 0))
+
+        self.assertTrue(self.run_claimed(lambda text: (f'EN: {text}', 'en')))
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.translated_feedback, 'EN: second')
+        self.assertEqual(self.appointment.enrichment_task.status, 'Done')
+
+    def test_resubmission_after_save_is_not_marked_done(self):
+        self.submit('first')
+        [task] = FeedbackEnrichmentTask.claim(10)
+        with mock.patch('client_appointments.feedback.translate_text', lambda text: (text, 'en')):
+            self.assertTrue(enrich_feedback(task.appointment))
+        self.submit('second')
+        self.assertFalse(task.mark_done())
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'Queued')
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.enrichment_status, 'Pending')
+
+    def test_failure_after_resubmission_does_not_delay_new_text(self):
+        self.submit('first')
+
+        def translate(text):
+            self.submit('second')
+            raise ConnectionError('translator down')
+
+        self.assertFalse(self.run_claimed(translate))
+        task = FeedbackEnrichmentTask.objects.get(appointment=self.appointment)
+        self.assertEqual((task.status, task.attempts, task.last_error), ('Queued', 0, None))
+        self.assertLessEqual(task.run_after, timezone.now())
+
+    def test_retry_backs_off_then_falls_back(self):
+        self.submit('first')
+
+        def fail(text):
+            raise ConnectionError('translator down')
+
+        self.assertFalse(self.run_claimed(fail))
+        task = FeedbackEnrichmentTask.objects.get(appointment=self.appointment)
+        self.assertEqual((task.status, task.attempts), ('Queued', 1))
+        self.assertGreater(task.run_after, timezone.now() + timedelta(seconds=25))
+
+        FeedbackEnrichmentTask.objects.filter(id=task.id).update(run_after=timezone.now())
+        self.assertFalse(self.run_claimed(fail))
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), ('Failed', 2))
+        self.appointment.refresh_from_db()
+        self.assertEqual((self.appointment.feedback_language, self.appointment.enrichment_status), ('unknown', 'Failed'))
+
+
+@override_settings(SEMAPHORE_API_KEY='test-key', SEMAPHORE_SENDER_NAME='OFFICE', SMS_RETRY_DELAY=30)
+class RescoreFeedbackTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        officer = Personnel.objects.create(
+            username='officer', email='officer@example.com', lastname='Officer', firstname='One', birthday=date(1980, 1, 1)
+        )
+        nature = AppointmentNature.objects.create(nature='Inquiry', routing_option='Examiner', description='')
+        client_user = Client.objects.create(
+            username='juan', email='juan@example.com', lastname='Cruz', firstname='Juan',
+            birthday=date(1990, 1, 1), contact_number='09170000000'
+        )
+        for feedback, translated_feedback in [
+            ('good service', None),
+            ('Ang bagal', 'bad and slow'),
+            ('okay lang', 'it was okay'),
+            ('', None),
+        ]:
+            ClientAppointment.objects.create(
+                client=client_user, inquiry_type=nature, assigned_officer=officer, appointment_date=date.today(),
+                status='Completed', feedback=feedback, translated_feedback=translated_feedback,
+                sentiment_score=0.0, sentiment_label='Neutral'
+            )
+
+    def rescore(self):
+        analyzer = mock.Mock()
+        analyzer.polarity_scores.side_effect = lambda text: {
+            'compound': 0.6 if 'good' in text else -0.6 if 'bad' in text else 0.0
+        }
+        out = io.StringIO()
+        with mock.patch('client_appointments.feedback.get_sentiment_analyzer', return_value=analyzer), \
+                mock.patch('client_appointments.management.commands.rescore_feedback.get_sentiment_analyzer'):
+            call_command('rescore_feedback', workers=1, chunk_size=2, stdout=out)
+        return out.getvalue()
+
+    def scores(self):
+        return list(ClientAppointment.objects.order_by('id').values_list('feedback', 'sentiment_score', 'sentiment_label'))
+
+    def test_rescores_then_second_run_is_a_noop(self):
+        self.assertIn('Re-scored 3 feedback row(s), 2 changed', self.rescore())
+        expected = [
+            ('good service', 0.6, 'Positive'),
+            # The translation is scored when there is one
+            ('Ang bagal', -0.6, 'Negative'),
+            ('okay lang', 0.0, 'Neutral'),
+            ('', 0.0, 'Neutral'),
+        ]
+        self.assertEqual(self.scores(), expected)
+
+        self.assertIn('Re-scored 3 feedback row(s), 0 changed', self.rescore())
+        self.assertEqual(self.scores(), expected)
+
+
+class TranslationCacheTests(TestCase):
+
+    def setUp(self):
+        self.cache = TranslationCache(max_memory_entries=2)
+
+    def test_normalized_texts_share_a_key(self):
+        self.assertEqual(normalize_text('  Salamat   po!'), 'salamat po')
+        self.assertEqual(normalize_text('«Ｓａｌａｍａｔ po»...'), 'salamat po')
+        # Punctuation inside the text is kept
+        self.assertEqual(normalize_text('Hindi, salamat.'), 'hindi, salamat')
+        self.assertEqual(normalize_text('?!'), '')
+
+        self.cache.set('Salamat po!', 'Thank you', 'tl')
+        self.assertEqual(self.cache.get('salamat po'), ('Thank you', 'tl'))
+        self.assertEqual(TranslationCacheEntry.objects.count(), 1)
+
+    def test_memory_then_database_then_miss(self):
+        self.cache.set('Salamat po', 'Thank you', 'tl')
+        self.assertEqual(self.cache.get('salamat po'), ('Thank you', 'tl'))
+        self.assertEqual(self.cache.stats()['memory_hits'], 1)
+
+        self.cache.clear_memory()
+        self.assertEqual(self.cache.get('Salamat po'), ('Thank you', 'tl'))
+        self.assertEqual(TranslationCacheEntry.objects.get().hits, 1)
+        # The database hit is remembered in memory again
+        self.assertEqual(self.cache.get('Salamat po'), ('Thank you', 'tl'))
+
+        self.assertIsNone(self.cache.get('Ang bagal'))
+        self.assertEqual(self.cache.stats(), {
+            'memory_entries': 1,
+            'memory_hits': 2,
+            'db_hits': 1,
+            'misses': 1,
+            'hit_ratio': 0.75,
+        })
+
+    def test_memory_is_bounded_lru(self):
+        self.cache.set('one', 'one', 'en')
+        self.cache.set('two', 'two', 'en')
+        self.cache.get('one')
+        self.cache.set('three', 'three', 'en')
+        self.assertEqual(self.cache.stats()['memory_entries'], 2)
+
+        self.cache.get('one')
+        self.cache.get('three')
+        self.cache.get('two')
+        stats = self.cache.stats()
+        self.assertEqual((stats['memory_hits'], stats['db_hits']), (3, 1))
+
+    def test_evict_drops_stale_then_least_recently_used(self):
+        now = timezone.now()
+        for age_days, text in [(400, 'stale'), (30, 'oldest'), (20, 'older'), (10, 'recent'), (0, 'newest')]:
+            self.cache.set(text, text.upper(), 'en')
+            TranslationCacheEntry.objects.filter(translated_text=text.upper()).update(last_used_at=now - timedelta(days=age_days))
+
+        self.assertEqual(self.cache.evict(max_rows=2, max_age_days=180), 3)
+        self.assertEqual(
+            sorted(TranslationCacheEntry.objects.values_list('translated_text', flat=True)), ['NEWEST', 'RECENT']
+        )
+        # Evicted entries are not served from memory either
+        self.assertEqual(self.cache.stats()['memory_entries'], 0)
+        self.assertIsNone(self.cache.get('oldest'))
+        self.assertEqual(self.cache.get('recent'), ('RECENT', 'en'))
+        self.assertEqual(self.cache.evict(max_rows=2, max_age_days=180), 0)
+
+
+class LanguageIdTests(TestCase):
+
+    def test_identifies_english_and_tagalog_samples_confidently(self):
+        for expected, text in BENCHMARK_SAMPLES:
+            if expected not in ('en', 'tl'):
+                continue
+            with self.subTest(text=text):
+                language, confidence = identify_language(text)
+                self.assertEqual(language, expected)
+                self.assertGreaterEqual(confidence, 0.9)
+
+    def test_text_without_words_is_unknown(self):
+        for text in ('', '  ', '12:30 !!'):
+            self.assertEqual(identify_language(text), ('unknown', 0.0))
+
+    def test_translate_text_skips_translator_for_english(self):
+        translator = mock.Mock()
+        translator.translate.side_effect = lambda text, src=None: (f'EN: {text}', src)
+        with mock.patch('client_appointments.feedback.get_translator', return_value=translator), \
+                mock.patch('client_appointments.translation_cache.translation_cache', TranslationCache()) as cache:
+            self.assertEqual(translate_text('Very helpful staff, thank you!'), ('Very helpful staff, thank you!', 'en'))
+            translator.translate.assert_not_called()
+            self.assertEqual(cache.stats()['misses'], 0)
+
+            # Confidently Tagalog text is translated without a remote detect
+            self.assertEqual(translate_text('Salamat po sa tulong ninyo.'), ('EN: Salamat po sa tulong ninyo.', 'tl'))
+            translator.translate.assert_called_once_with('Salamat po sa tulong ninyo.', src='tl')
+
+
+class SmsDispatchTests(TestCase):
+    """dispatch_sms against the fake_sms_server gateway"""
+
+    def setUp(self):
+        self.gateway = FakeSemaphoreServer()
+        thread = threading.Thread(target=self.gateway.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.gateway.server_close)
+        self.addCleanup(self.gateway.shutdown)
+
+    def dispatch(self, **options):
+        call_command('dispatch_sms', once=True, url=self.gateway.url, stdout=io.StringIO(), stderr=io.StringIO(), **options)
+
+    def queue(self, *numbers):
+        return [SmsOutbox.enqueue(number, 'Your appointment is confirmed.', 'Confirmed') for number in numbers]
+
+    def test_normalize_number(self):
+        for number in ('09171234567', '+63 917 123 4567', '639171234567', '0917-123-4567', '9171234567'):
+            self.assertEqual(normalize_number(number), '09171234567')
+
+    def test_provider_ids_map_back_to_rows(self):
+        # The gateway answers with 639XXXXXXXXX whatever form was stored
+        messages = self.queue('09171234567', '+63 918 765 4321', '09190000000')
+        self.dispatch()
+        self.assertEqual(self.gateway.stats['requests'], 1)
+        sent = SmsOutbox.objects.in_bulk([message.id for message in messages])
+        self.assertTrue(all(message.status == 'Sent' for message in sent.values()))
+        provider_ids = [sent[message.id].provider_message_id for message in messages]
+        self.assertNotIn(None, provider_ids)
+        self.assertEqual(len(set(provider_ids)), 3)
+
+    def test_rejected_number_does_not_sink_the_batch(self):
+        good = self.queue('09171234567', '09181234567', '09191234567', '09201234567')
+        [bad] = self.queue('0917123')
+        self.dispatch()
+        statuses = dict(SmsOutbox.objects.values_list('id', 'status'))
+        self.assertEqual([statuses[message.id] for message in good], ['Sent'] * 4)
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts), ('Dead', 1))
+        self.assertIn('number format is invalid', bad.last_error)
+        self.assertEqual(self.gateway.stats['messages'], 4)
+
+    def test_claim_takes_due_messages_once(self):
+        due, later = self.queue('09171234567', '09181234567')
+        SmsOutbox.objects.filter(id=later.id).update(run_after=timezone.now() + timedelta(hours=1))
+        self.assertEqual([message.id for message in SmsOutbox.claim(10)], [due.id])
+        # Claimed rows are Sending and not handed to a second worker until they go stale
+        self.assertEqual(SmsOutbox.claim(10), [])
+        SmsOutbox.objects.filter(id=due.id).update(locked_at=timezone.now() - timedelta(minutes=11))
+        [reclaimed] = SmsOutbox.claim(10)
+        self.assertEqual((reclaimed.id, reclaimed.attempts), (due.id, 2))
+
+    def test_failures_back_off_then_dead_letter(self):
+        self.gateway.failure_rate = 1.0
+        [message] = self.queue('09171234567')
+        self.dispatch(max_attempts=2)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('Queued', 1))
+        self.assertIn('HTTP 503', message.last_error)
+        self.assertGreater(message.run_after, timezone.now() + timedelta(seconds=25))
+
+        SmsOutbox.objects.filter(id=message.id).update(run_after=timezone.now())
+        self.dispatch(max_attempts=2)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('Dead', 2))
+
+
+class MetricsTests(TestCase):
+    """/metrics access and the adding up of worker snapshots"""
+
+    def test_closed_without_token_unless_debug(self):
+        with self.settings(METRICS_TOKEN='', DEBUG=False):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with self.settings(METRICS_TOKEN='', DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    def test_token_required_when_set(self):
+        with self.settings(METRICS_TOKEN='scrape-me', DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('feedback_enrichment_tasks{status="Queued"} 0', response.content.decode())
+
+    def write_snapshot(self, directory, pid, families):
+        with open(os.path.join(directory, f'metrics-{pid}.json'), 'w') as snapshot_file:
+            json.dump({'pid': pid, 'metrics': families}, snapshot_file)
+
+    def test_gather_adds_up_worker_snapshots(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        registry = Registry()
+        requests_total = Counter('requests_total', 'Requests', ['view'], registry=registry)
+        latency = Histogram('latency_seconds', 'Latency', registry=registry, buckets=(0.1, 1.0))
+        entries = Gauge('entries', 'Entries', registry=registry)
+        requests_total.inc(view='list')
+        latency.observe(0.05)
+        entries.set(3)
+
+        family = lambda kind, samples, buckets=(), labels=(): {
+            'kind': kind, 'help': '', 'labels': list(labels), 'buckets': list(buckets), 'samples': samples
+        }
+        # A live worker (our parent) and one that has exited
+        dead_pid = 2 ** 22 + 1
+        while True:
+            try:
+                os.kill(dead_pid, 0)
+            except ProcessLookupError:
+                break
+            except PermissionError:
+                pass
+            dead_pid += 1
+        for pid, count in ((os.getppid(), 2), (dead_pid, 5)):
+            self.write_snapshot(directory, pid, {
+                'requests_total': family('counter', [[['list'], count], [['detail'], 1]], labels=['view']),
+                'latency_seconds': family('histogram', [[[], [0, 1, 0, 0.5]]], buckets=[0.1, 1.0]),
+                'entries': family('gauge', [[[], 10]]),
+            })
+        # From an older deploy with other buckets: cannot be added, so skipped. It is
+        # listed first, which must not make it the layout the others are matched to
+        self.write_snapshot(directory, 1, {
+            'latency_seconds': family('histogram', [[[], [1, 0, 0, 0, 0.1]]], buckets=[0.1, 0.5, 1.0]),
+        })
+
+        list_files = glob.glob
+        with self.settings(METRICS_MULTIPROCESS_DIR=directory), \
+                mock.patch('utils.metrics.glob.glob', lambda pattern: sorted(list_files(pattern))):
+            families = registry.gather()
+        counts = {tuple(labels): value for labels, value in families['requests_total']['samples']}
+        self.assertEqual(counts, {('list',): 8, ('detail',): 2})
+        [[_, buckets]] = families['latency_seconds']['samples']
+        self.assertEqual(buckets[:3], [1, 2, 0])
+        self.assertAlmostEqual(buckets[3], 1.05)
+        # Gauges of exited workers are dropped
+        self.assertEqual(families['entries']['samples'], [[[], 13]])
+        self.assertIn('latency_seconds_bucket{le="1.0"} 3', render(families))
+
+
+class SnapshotCacheTests(TestCase):
+    """get_snapshot: fresh for ttl, stale while one caller refreshes, computed once when cold"""
+    key = 'tests:snapshot'
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.calls = 0
+
+    def compute(self, value='fresh', delay=0):
+        def compute():
+            self.calls += 1
+            time.sleep(delay)
+            return value
+        return compute
+
+    def make_stale(self, value):
+        cache.set(self.key, {'value': value, 'expires_at': time.time() - 1}, 60)
+
+    def test_fresh_value_is_reused(self):
+        self.assertEqual(get_snapshot(self.key, self.compute('first'), ttl=60), 'first')
+        self.assertEqual(get_snapshot(self.key, self.compute('second'), ttl=60), 'first')
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_is_refreshed(self):
+        self.make_stale('old')
+        self.assertEqual(get_snapshot(self.key, self.compute('new'), ttl=60), 'new')
+        self.assertEqual(get_snapshot(self.key, self.compute('newer'), ttl=60), 'new')
+
+    def test_stale_value_served_while_another_worker_refreshes(self):
+        self.make_stale('old')
+        cache.add(f'{self.key}:refresh-lock', True, 30)
+        self.assertEqual(get_snapshot(self.key, self.compute('new'), ttl=60), 'old')
+        self.assertEqual(self.calls, 0)
+
+    def test_cold_cache_computes_once_for_concurrent_callers(self):
+        results = []
+        compute = self.compute('value', delay=0.2)
+        threads = [
+            threading.Thread(target=lambda: results.append(get_snapshot(self.key, compute, ttl=60)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 5)
+        self.assertEqual(self.calls, 1)
+
+    def test_cold_cache_computes_itself_when_the_wait_runs_out(self):
+        cache.add(f'{self.key}:refresh-lock', True, 30)
+        self.assertEqual(get_snapshot(self.key, self.compute('mine'), ttl=60, wait=0.1), 'mine')
+        self.assertEqual(self.calls, 1)
+
+
+@override_settings(SEMAPHORE_API_KEY='test-key', SEMAPHORE_SENDER_NAME='OFFICE')
+class ReminderTests(TestCase):
+    """send_appointment_reminders queues one reminder per appointment and date"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.officer = Personnel.objects.create(
+            username='officer', email='officer@example.com', lastname='Officer', firstname='One', birthday=date(1980, 1, 1)
+        )
+        cls.nature = AppointmentNature.objects.create(nature='Inquiry', routing_option='Examiner', description='')
+        cls.day = date.today() + timedelta(days=1)
+
+    def book(self, contact_number, status='Confirmed', day=None):
+        index = Client.objects.count()
+        client = Client.objects.create(
+            username=f'client{index}', email=f'client{index}@example.com', lastname='Cruz', firstname=f'Juan{index}',
+            birthday=date(1990, 1, 1), contact_number=contact_number
+        )
+        return ClientAppointment.objects.create(
+            client=client, inquiry_type=self.nature, assigned_officer=self.officer,
+            appointment_date=day or self.day, status=status
+        )
+
+    def remind(self, day=None, **options):
+        call_command(
+            'send_appointment_reminders', date=str(day or self.day), stdout=io.StringIO(), stderr=io.StringIO(), **options
+        )
+
+    def reminders(self):
+        return sorted(SmsOutbox.objects.filter(kind='Reminder').values_list('appointment_id', flat=True))
+
+    def test_rerun_queues_nothing_new(self):
+        first, second = self.book('09171234567'), self.book('09181234567', status='Rescheduled')
+        self.remind()
+        self.remind()
+        self.assertEqual(self.reminders(), sorted([first.id, second.id]))
+
+    def test_only_confirmed_and_rescheduled_with_a_number(self):
+        confirmed = self.book('09171234567')
+        self.book('09181234567', status='Cancelled')
+        self.book('09191234567', status='Pending')
+        self.book('')
+        self.remind()
+        self.assertEqual(self.reminders(), [confirmed.id])
+
+    def test_cancelled_appointment_gets_no_reminder(self):
+        appointment = self.book('09171234567')
+        appointment.status = 'Cancelled'
+        appointment.save()
+        self.remind()
+        self.assertEqual(self.reminders(), [])
+
+    def test_rescheduled_appointment_is_reminded_for_its_new_date(self):
+        appointment = self.book('09171234567')
+        self.remind()
+        new_day = self.day + timedelta(days=3)
+        appointment.appointment_date = new_day
+        appointment.status = 'Rescheduled'
+        appointment.save()
+        self.remind()
+        self.assertEqual(self.reminders(), [appointment.id])
+        self.remind(day=new_day)
+        self.assertEqual(self.reminders(), [appointment.id, appointment.id])
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.reminder_sent_for, new_day)
+
+    def test_one_bad_number_does_not_sink_the_days_reminders(self):
+        gateway = FakeSemaphoreServer()
+        threading.Thread(target=gateway.serve_forever, daemon=True).start()
+        self.addCleanup(gateway.server_close)
+        self.addCleanup(gateway.shutdown)
+        good = [self.book(f'0917123456{i}') for i in range(5)]
+        bad = self.book('12345')
+        with self.settings(SEMAPHORE_URL=gateway.url):
+            self.remind(dispatch=True)
+        statuses = dict(SmsOutbox.objects.values_list('appointment_id', 'status'))
+        self.assertEqual([statuses[appointment.id] for appointment in good], ['Sent'] * 5)
+        self.assertEqual(statuses[bad.id], 'Dead')
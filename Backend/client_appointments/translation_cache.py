@@ -0,0 +1,145 @@
+# client_appointments/translation_cache.py
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import TranslationCacheEntry
+
+_whitespace = re.compile(r'\s+')
+
+
+def _is_edge(char):
+    return char.isspace() or unicodedata.category(char).startswith('P')
+
+
+def normalize_text(text):
+    """Case, width, whitespace and surrounding punctuation differences should not produce separate cache entries"""
+    text = _whitespace.sub(' ', unicodedata.normalize('NFKC', text).casefold())
+    start, end = 0, len(text)
+    while start < end and _is_edge(text[start]):
+        start += 1
+    while end > start and _is_edge(text[end - 1]):
+        end -= 1
+    return text[start:end]
+
+
+def text_hash(text):
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class TranslationCache:
+    """Two-level memo of translator results keyed by the normalized-text hash.
+
+    A bounded in-process LRU sits in front of the TranslationCacheEntry table,
+    so repeated feedback is served from memory and different workers share
+    results through the database.
+    """
+
+    def __init__(self, max_memory_entries=None):
+        self.max_memory_entries = max_memory_entries or getattr(settings, 'TRANSLATION_CACHE_MEMORY_ENTRIES', 5000)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def get(self, text):
+        """Returns (translated_text, detected_language), or None on a miss"""
+        key = text_hash(text)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return self._entries[key]
+
+        entry = (
+            TranslationCacheEntry.objects
+            .filter(text_hash=key)
+            .values_list('translated_text', 'detected_language')
+            .first()
+        )
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        TranslationCacheEntry.objects.filter(text_hash=key).update(
+            hits=F('hits') + 1,
+            last_used_at=timezone.now()
+        )
+        with self._lock:
+            self.db_hits += 1
+        self._remember(key, entry)
+        return entry
+
+    def set(self, text, translated_text, detected_language):
+        key = text_hash(text)
+        try:
+            with transaction.atomic():
+                TranslationCacheEntry.objects.create(
+                    text_hash=key,
+                    translated_text=translated_text,
+                    detected_language=detected_language
+                )
+        except IntegrityError:
+            # Another worker cached the same text first
+            pass
+        self._remember(key, (translated_text, detected_language))
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_memory_entries:
+                self._entries.popitem(last=False)
+
+    def clear_memory(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.db_hits
+            lookups = hits + self.misses
+            return {
+                'memory_entries': len(self._entries),
+                'memory_hits': self.memory_hits,
+                'db_hits': self.db_hits,
+                'misses': self.misses,
+                'hit_ratio': hits / lookups if lookups else 0.0,
+            }
+
+    def evict(self, max_rows=None, max_age_days=None):
+        """Drop stale entries, then the least recently used ones above max_rows. Returns rows deleted."""
+        max_rows = max_rows if max_rows is not None else getattr(settings, 'TRANSLATION_CACHE_MAX_ROWS', 100000)
+        max_age_days = max_age_days if max_age_days is not None else getattr(settings, 'TRANSLATION_CACHE_MAX_AGE_DAYS', 180)
+
+        cutoff = timezone.now() - timedelta(days=max_age_days)
+        deleted, _ = TranslationCacheEntry.objects.filter(last_used_at__lt=cutoff).delete()
+
+        excess = TranslationCacheEntry.objects.count() - max_rows
+        while excess > 0:
+            oldest_ids = list(
+                TranslationCacheEntry.objects
+                .order_by('last_used_at', 'id')
+                .values_list('id', flat=True)[:min(excess, 1000)]
+            )
+            removed, _ = TranslationCacheEntry.objects.filter(id__in=oldest_ids).delete()
+            if not removed:
+                break
+            deleted += removed
+            excess -= removed
+
+        if deleted:
+            self.clear_memory()
+        return deleted
+
+
+# GLOBAL INSTANCE FOR USEABILITY
+translation_cache = TranslationCache()
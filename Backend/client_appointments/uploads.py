@@ -0,0 +1,151 @@
+# client_appointments/uploads.py
+import hashlib
+import mimetypes
+import os
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from .models import AppointmentAttachment
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Leading bytes of the formats clients actually send; anything else falls back
+# to the extension
+FILE_SIGNATURES = [
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/msword'),
+]
+
+
+def sha256_of(file_obj):
+    """Hash a file-like object in blocks and rewind it"""
+    digest = hashlib.sha256()
+    file_obj.seek(0)
+    for block in iter(lambda: file_obj.read(HASH_BLOCK_SIZE), b''):
+        digest.update(block)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def detect_content_type(file_obj, filename):
+    """MIME type from the file's leading bytes, then from its name"""
+    file_obj.seek(0)
+    head = file_obj.read(16)
+    file_obj.seek(0)
+    guessed, _ = mimetypes.guess_type(filename)
+    for signature, content_type in FILE_SIGNATURES:
+        if head.startswith(signature):
+            # Old Office formats share one container; the extension tells them apart
+            if content_type == 'application/msword' and guessed:
+                return guessed
+            return content_type
+    # docx/xlsx are zip files; only trust the extension when the bytes agree
+    if head.startswith(b'PK\x03\x04'):
+        return guessed if guessed and ('zip' in guessed or 'openxml' in guessed) else 'application/zip'
+    return guessed or 'application/octet-stream'
+
+
+def blob_name(sha256):
+    # Fan out by the first two hex digits so no directory grows too large
+    return f'appointment_attachments/blobs/{sha256[:2]}/{sha256}'
+
+
+def store_blob(file_obj, sha256=None):
+    """Save the bytes once under their SHA-256 and return (storage name, sha256).
+
+    If the same content was stored before, the existing file is reused and
+    nothing is written.
+    """
+    sha256 = sha256 or sha256_of(file_obj)
+    name = blob_name(sha256)
+    if not default_storage.exists(name):
+        name = default_storage.save(name, File(file_obj))
+    return name, sha256
+
+
+def create_attachment(appointment, file_obj, filename, size, sha256=None):
+    """Attach a file to an appointment, sharing storage with identical uploads"""
+    content_type = detect_content_type(file_obj, filename)
+    name, sha256 = store_blob(file_obj, sha256)
+    attachment = AppointmentAttachment(
+        appointment=appointment,
+        filename=filename,
+        file_size=size,
+        sha256=sha256,
+        content_type=content_type
+    )
+    attachment.file.name = name
+    attachment.save()
+    return attachment
+
+
+#---RESUMABLE UPLOADS--------------------------------------------------------------------------
+
+def session_path(session):
+    directory = getattr(settings, 'UPLOAD_SESSION_DIR', os.path.join(settings.BASE_DIR, 'upload_sessions'))
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f'{session.id}.part')
+
+
+def write_chunk(session, stream, length):
+    """Append `length` bytes from `stream` to the session's part file, block by block.
+
+    Returns the number of bytes written; a short read (client disconnected)
+    leaves the session at whatever was received so it can resume from there.
+    """
+    written = 0
+    mode = 'r+b' if os.path.exists(session_path(session)) else 'wb'
+    with open(session_path(session), mode) as part:
+        part.seek(session.received_size)
+        while written < length:
+            block = stream.read(min(HASH_BLOCK_SIZE, length - written))
+            if not block:
+                break
+            part.write(block)
+            written += len(block)
+        part.truncate()
+    return written
+
+
+def finish_session(session):
+    """Turn a fully received session into an attachment and clean up its part file.
+
+    The attachment row and the session's deletion commit together. If that
+    fails the session and its part file are left as they were, so finishing
+    can be retried (the upload view does so on a GET of the session), and a
+    blob written here that no attachment uses is removed again.
+    """
+    path = session_path(session)
+    with open(path, 'rb') as part:
+        sha256 = sha256_of(part)
+        # Blobs are shared by content; only one this call writes may be cleaned up
+        new_blob = not default_storage.exists(blob_name(sha256))
+        name, _ = store_blob(part, sha256)
+        try:
+            with transaction.atomic():
+                attachment = create_attachment(
+                    session.appointment,
+                    part,
+                    session.filename,
+                    session.total_size,
+                    sha256
+                )
+                session.delete()
+        except BaseException:
+            if new_blob and not AppointmentAttachment.objects.filter(file=name).exists():
+                default_storage.delete(name)
+            raise
+    os.remove(path)
+    return attachment
+
+
+def discard_session(session):
+    path = session_path(session)
+    if os.path.exists(path):
+        os.remove(path)
+    session.delete()
@@ -3,32 +3,138 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
+from rest_framework.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
 from django.core.files.storage import default_storage
 import os
-from django.db.models import Count, Q
-from datetime import date
+import logging
+from functools import partial
+from django.db import transaction
+from django.db.models import Count, Q, F, Sum
+from datetime import date, timedelta
 from django.utils import timezone
-from .models import ClientAppointment, AppointmentAttachment
+from django.conf import settings
+from .models import (
+    ClientAppointment,
+    AppointmentAttachment,
+    AppointmentDateCapacity,
+    AppointmentStatsRollup,
+    FeedbackEnrichmentTask,
+    UploadSession,
+    default_daily_capacity
+)
+from .pagination import KeysetPagination
+from .uploads import create_attachment, write_chunk, finish_session, discard_session
 from .serializers import (
     ClientAppointmentSerializer, 
     ClientAppointmentCreateSerializer,
     ClientAppointmentUpdateSerializer
 )
 from clients.models import Client
-from googletrans import Translator
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
+from authentication.permissions import IsPersonnel
+from utils.export import export_response, keyset_iterator, keyset_rows
+from utils.file_download import serve_file
+from utils.zip_stream import zip_response
+from utils.snapshot_cache import get_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Reports and bulk downloads; everything else keeps the viewset's AllowAny
+STAFF_ONLY_ACTIONS = ['stats', 'dashboard_stats', 'export', 'attachments_bundle']
+
+AVAILABILITY_DEFAULT_DAYS = 31
+AVAILABILITY_MAX_DAYS = 366
+AVAILABILITY_MAX_SUGGESTIONS = 10
+AVAILABILITY_SUGGESTION_HORIZON_DAYS = 90
+
+DASHBOARD_AGE_GROUPS = [
+    {'name': '18-25', 'min_age': 18, 'max_age': 25},
+    {'name': '26-35', 'min_age': 26, 'max_age': 35},
+    {'name': '36-45', 'min_age': 36, 'max_age': 45},
+    {'name': '46-55', 'min_age': 46, 'max_age': 55},
+    {'name': '56+', 'min_age': 56, 'max_age': 150},
+]
+
+# Attachment rows read per query while a ZIP bundle streams
+ZIP_BATCH_SIZE = 500
+
+APPOINTMENT_EXPORT_FIELDS = [
+    'id', 'client_id', 'client__lastname', 'client__firstname', 'client__middlename',
+    'inquiry_type__nature', 'appointment_date', 'status',
+    'assigned_officer__lastname', 'assigned_officer__firstname', 'notes',
+    'rating', 'feedback', 'translated_feedback', 'feedback_language',
+    'sentiment_score', 'sentiment_label', 'created_at', 'updated_at',
+]
+APPOINTMENT_EXPORT_HEADER = [
+    'ID', 'Client ID', 'Client Last Name', 'Client First Name', 'Client Middle Name',
+    'Nature of Inquiry', 'Appointment Date', 'Status',
+    'Officer Last Name', 'Officer First Name', 'Notes',
+    'Rating', 'Feedback', 'Translated Feedback', 'Feedback Language',
+    'Sentiment Score', 'Sentiment', 'Created At', 'Updated At',
+]
+
+STATS_BREAKDOWNS = {
+    'officer': ['assigned_officer_id', 'assigned_officer__firstname', 'assigned_officer__lastname'],
+    'date': ['appointment_date'],
+    'inquiry_type': ['inquiry_type_id', 'inquiry_type__nature'],
+}
 
-# Download VADER lexicon if not already present
-try:
-    nltk.data.find('sentiment/vader_lexicon')
-except LookupError:
-    nltk.download('vader_lexicon')
 class ClientAppointmentViewSet(viewsets.ModelViewSet):
     queryset = ClientAppointment.objects.all()
     serializer_class = ClientAppointmentSerializer
     permission_classes = [AllowAny]
+    pagination_class = KeysetPagination
+    
+    def get_permissions(self):
+        if self.action in STAFF_ONLY_ACTIONS:
+            return [IsPersonnel()]
+        return super().get_permissions()
+    
+    def get_queryset(self):
+        # Pull the related rows the serializer reads in the same query
+        return (
+            ClientAppointment.objects
+            .select_related('client', 'assigned_officer', 'inquiry_type')
+            .prefetch_related('attachments')
+        )
+    
+    def filter_queryset(self, queryset):
+        """Apply the client, officer, status and date filters from the query string"""
+        params = self.request.query_params
+        
+        client_id = params.get('client_id')
+        if client_id:
+            queryset = queryset.filter(client_id=client_id)
+        
+        officer_id = params.get('officer_id')
+        if officer_id:
+            queryset = queryset.filter(assigned_officer_id=officer_id)
+        
+        # Accepts a single status or a comma separated list
+        statuses = [s for s in params.get('status', '').split(',') if s]
+        if statuses:
+            queryset = queryset.filter(status__in=statuses)
+        
+        date_filters = {
+            'appointment_date': 'appointment_date',
+            'date_from': 'appointment_date__gte',
+            'date_to': 'appointment_date__lte',
+        }
+        for param, lookup in date_filters.items():
+            value = self._date_param(param)
+            if value:
+                queryset = queryset.filter(**{lookup: value})
+        
+        return queryset
+    
+    def _date_param(self, name, default=None):
+        value = self.request.query_params.get(name)
+        if not value:
+            return default
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise ValidationError({name: 'Date must be in YYYY-MM-DD format.'})
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -55,12 +161,7 @@ class ClientAppointmentViewSet(viewsets.ModelViewSet):
             # Handle file attachments
             uploaded_files = request.FILES.getlist('attachments')
             for file in uploaded_files:
-                AppointmentAttachment.objects.create(
-                    appointment=appointment,
-                    file=file, 
-                    filename=file.name,
-                    file_size=file.size
-                )
+                create_attachment(appointment, file, file.name, file.size)
             
             full_serializer = ClientAppointmentSerializer(appointment)
             
@@ -78,12 +179,10 @@ class ClientAppointmentViewSet(viewsets.ModelViewSet):
         
     @action(detail=False, methods=['get'])
     def full_dates(self, request):
-        """Return appointment dates that are already full (10 or more)"""
+        """Return appointment dates that have no remaining capacity"""
         full_dates = (
-            ClientAppointment.objects
-            .values('appointment_date')
-            .annotate(total=Count('id'))
-            .filter(total__gte=10)
+            AppointmentDateCapacity.objects
+            .filter(booked__gte=F('capacity'))
             .values_list('appointment_date', flat=True)
         )
 
@@ -92,6 +191,101 @@ class ClientAppointmentViewSet(viewsets.ModelViewSet):
             'data': list(full_dates)
         })
     
+    @action(detail=False, methods=['get'])
+    def availability(self, request):
+        """Remaining capacity per day between date_from and date_to, plus free dates after a full one"""
+        date_from = self._date_param('date_from', date.today())
+        date_to = self._date_param('date_to', date_from + timedelta(days=AVAILABILITY_DEFAULT_DAYS - 1))
+        if date_to < date_from:
+            raise ValidationError({'date_to': 'date_to must not be before date_from.'})
+        if (date_to - date_from).days >= AVAILABILITY_MAX_DAYS:
+            raise ValidationError({'date_to': f'The window cannot exceed {AVAILABILITY_MAX_DAYS} days.'})
+        
+        # Dates without a ledger row have no bookings yet
+        ledger = {
+            row.appointment_date: row
+            for row in AppointmentDateCapacity.objects.filter(
+                appointment_date__range=(date_from, date_to)
+            )
+        }
+        default_capacity = default_daily_capacity()
+        days = []
+        day = date_from
+        while day <= date_to:
+            row = ledger.get(day)
+            capacity = row.capacity if row else default_capacity
+            booked = row.booked if row else 0
+            days.append({
+                'date': day,
+                'capacity': capacity,
+                'booked': booked,
+                'remaining': max(capacity - booked, 0)
+            })
+            day += timedelta(days=1)
+        
+        data = {
+            'date_from': date_from,
+            'date_to': date_to,
+            'days': days
+        }
+        
+        requested_date = self._date_param('date')
+        if requested_date:
+            try:
+                suggest = min(max(int(request.query_params.get('suggest', 3)), 1), AVAILABILITY_MAX_SUGGESTIONS)
+            except ValueError:
+                raise ValidationError({'suggest': 'suggest must be an integer.'})
+            is_full = AppointmentDateCapacity.is_full(requested_date)
+            data['requested_date'] = {'date': requested_date, 'is_full': is_full}
+            data['suggestions'] = self._next_free_dates(requested_date, suggest) if is_full else []
+        
+        return Response({
+            'success': True,
+            'data': data,
+            'message': 'Availability retrieved successfully'
+        })
+    
+    def _next_free_dates(self, after, count):
+        """The next `count` dates after `after` that still have capacity, within a bounded horizon"""
+        horizon_end = after + timedelta(days=AVAILABILITY_SUGGESTION_HORIZON_DAYS)
+        full_dates = set(
+            AppointmentDateCapacity.objects
+            .filter(appointment_date__gt=after, appointment_date__lte=horizon_end, booked__gte=F('capacity'))
+            .values_list('appointment_date', flat=True)
+        )
+        free_dates = []
+        day = after + timedelta(days=1)
+        while day <= horizon_end and len(free_dates) < count:
+            if day not in full_dates:
+                free_dates.append(day)
+            day += timedelta(days=1)
+        return free_dates
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Download the appointments matching the list filters as CSV (default) or XLSX"""
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in ['csv', 'xlsx']:
+            return Response({
+                'success': False,
+                'message': 'file_format must be csv or xlsx'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # values() projection read in keyset batches of (created_at, id): no model
+        # instances and never more than one batch of rows in memory
+        rows = keyset_rows(
+            self.filter_queryset(ClientAppointment.objects.all()),
+            ['-created_at', '-id'],
+            APPOINTMENT_EXPORT_FIELDS
+        )
+        try:
+            return export_response(file_format, 'appointments', APPOINTMENT_EXPORT_HEADER, rows)
+        except ImportError:
+            return Response({
+                'success': False,
+                'message': 'XLSX export requires openpyxl to be installed'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    
     @action(detail=True, methods=['post'])
     def upload_attachment(self, request, pk=None):
         """Upload additional attachments to an existing appointment"""
@@ -106,13 +300,8 @@ class ClientAppointmentViewSet(viewsets.ModelViewSet):
         
         attachments_created = []
         for file in uploaded_files:
-            # Create attachment record - the file will be saved automatically
-            attachment = AppointmentAttachment.objects.create(
-                appointment=appointment,
-                file=file,  # Use the file directly
-                filename=file.name,
-                file_size=file.size
-            )
+            # Stored by content hash, so re-uploading the same file costs no disk
+            attachment = create_attachment(appointment, file, file.name, file.size)
             attachments_created.append({
                 'id': attachment.id,
                 'filename': attachment.filename,
@@ -125,6 +314,144 @@ class ClientAppointmentViewSet(viewsets.ModelViewSet):
             'message': f'{len(attachments_created)} file(s) uploaded successfully'
         })
     
+    @action(detail=True, methods=['post'], url_path='uploads')
+    def start_upload(self, request, pk=None):
+        """Start a resumable upload; chunks are then PUT to uploads/<session_id>/"""
+        appointment = get_object_or_404(ClientAppointment, pk=pk)
+        filename = request.data.get('filename')
+        try:
+            total_size = int(request.data.get('total_size'))
+        except (TypeError, ValueError):
+            total_size = None
+        
+        if not filename or total_size is None or total_size <= 0:
+            return Response({
+                'success': False,
+                'message': 'filename and a positive total_size are required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        max_size = getattr(settings, 'ATTACHMENT_MAX_SIZE', 100 * 1024 * 1024)
+        if total_size > max_size:
+            return Response({
+                'success': False,
+                'message': f'Files larger than {max_size} bytes are not accepted'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        session = UploadSession.objects.create(
+            appointment=appointment,
+            filename=os.path.basename(filename)[:255],
+            total_size=total_size
+        )
+        
+        return Response({
+            'success': True,
+            'data': self._upload_session_data(session),
+            'message': 'Upload started'
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['get', 'put', 'delete'], url_path=r'uploads/(?P<session_id>[0-9a-f-]{36})')
+    def upload_chunk(self, request, pk=None, session_id=None):
+        """GET: how much has been received. PUT ?offset=N: append the raw request body. DELETE: abort.
+
+        A session whose last chunk arrived but could not be turned into an
+        attachment is finished again by a GET or an empty PUT at offset == total_size.
+        """
+        session = get_object_or_404(UploadSession, pk=session_id, appointment_id=pk)
+        
+        if request.method == 'GET':
+            if session.is_complete:
+                return self._finish_upload(session)
+            return Response({
+                'success': True,
+                'data': self._upload_session_data(session)
+            })
+        
+        if request.method == 'DELETE':
+            discard_session(session)
+            return Response({
+                'success': True,
+                'message': 'Upload cancelled'
+            })
+        
+        try:
+            offset = int(request.query_params.get('offset', ''))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return Response({
+                'success': False,
+                'message': 'offset must be an integer'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if length == 0 and offset == session.total_size and session.is_complete:
+            return self._finish_upload(session)
+        
+        max_chunk = getattr(settings, 'UPLOAD_CHUNK_MAX_SIZE', 8 * 1024 * 1024)
+        if length <= 0 or length > max_chunk:
+            return Response({
+                'success': False,
+                'message': f'Chunks must be between 1 and {max_chunk} bytes'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # The row lock keeps two requests from writing the same session at once
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().get(pk=session.pk)
+            if offset != session.received_size or offset + length > session.total_size:
+                return Response({
+                    'success': False,
+                    'data': self._upload_session_data(session),
+                    'message': f'Expected a chunk starting at offset {session.received_size}'
+                }, status=status.HTTP_409_CONFLICT)
+            
+            session.received_size += write_chunk(session, request.stream, length)
+            session.save(update_fields=['received_size', 'updated_at'])
+        
+        if not session.is_complete:
+            return Response({
+                'success': True,
+                'data': self._upload_session_data(session),
+                'message': 'Chunk received'
+            })
+        
+        return self._finish_upload(session)
+    
+    def _finish_upload(self, session):
+        # Locked so a retry racing the original request cannot attach the file twice
+        try:
+            with transaction.atomic():
+                session = UploadSession.objects.select_for_update().filter(pk=session.pk).first()
+                if session is None:
+                    return Response({
+                        'success': False,
+                        'message': 'Upload not found'
+                    }, status=status.HTTP_404_NOT_FOUND)
+                attachment = finish_session(session)
+        except Exception:
+            logger.exception('Could not finish upload session %s', session.pk)
+            return Response({
+                'success': False,
+                'data': self._upload_session_data(session),
+                'message': 'The file was received but could not be saved; retry by requesting the upload again'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        return Response({
+            'success': True,
+            'data': {
+                'id': attachment.id,
+                'filename': attachment.filename,
+                'file_size': attachment.file_size
+            },
+            'message': 'File uploaded successfully'
+        }, status=status.HTTP_201_CREATED)
+    
+    def _upload_session_data(self, session):
+        return {
+            'session_id': session.id,
+            'filename': session.filename,
+            'total_size': session.total_size,
+            'received_size': session.received_size,
+            'chunk_size': getattr(settings, 'UPLOAD_CHUNK_MAX_SIZE', 8 * 1024 * 1024)
+        }
+    
     @action(detail=True, methods=['get'])
     def download_attachment(self, request, pk=None):
         """Download an attachment file"""
@@ -145,14 +472,17 @@ class ClientAppointmentViewSet(viewsets.ModelViewSet):
             
             # Return file URL for viewing in new tab
             if attachment.file:
-                file_url = request.build_absolute_uri(attachment.file.url)
+                file_url = self.reverse_action(
+                    self.attachment_file.url_name,
+                    kwargs={'pk': appointment.pk, 'attachment_id': attachment.id}
+                )
                 return Response({
                     'success': True,
                     'data': {
                         'filename': attachment.filename,
                         'file_size': attachment.file_size,
                         'file_url': file_url,
-                        'content_type': attachment.file.content_type if hasattr(attachment.file, 'content_type') else 'application/octet-stream'
+                        'content_type': attachment.content_type
                     }
                 })
             else:
@@ -167,23 +497,92 @@ class ClientAppointmentViewSet(viewsets.ModelViewSet):
                 'message': 'Attachment not found'
             }, status=status.HTTP_404_NOT_FOUND)
     
-    
-    def list(self, request):
-        """Get all appointments or filter by client"""
-        client_id = request.query_params.get('client_id')
+    @action(detail=True, methods=['get', 'head'], url_path=r'attachments/(?P<attachment_id>\d+)/file')
+    def attachment_file(self, request, pk=None, attachment_id=None):
+        """Stream an attachment, honouring Range, If-None-Match and If-Range; ?download=1 saves instead of viewing"""
+        attachment = get_object_or_404(AppointmentAttachment, pk=attachment_id, appointment_id=pk)
+        if not attachment.file or not attachment.file.storage.exists(attachment.file.name):
+            return Response({
+                'success': False,
+                'message': 'File not found on server'
+            }, status=status.HTTP_404_NOT_FOUND)
         
-        if client_id:
-            appointments = self.queryset.filter(client_id=client_id)
-        else:
-            appointments = self.queryset.all()
+        # Content-addressed files are identified by their hash; older ones by id and size
+        etag = attachment.sha256 or f'{attachment.id}-{attachment.file_size}'
+        return serve_file(
+            request,
+            attachment.file,
+            attachment.filename,
+            attachment.file_size,
+            attachment.content_type,
+            etag,
+            last_modified=attachment.uploaded_at,
+            as_attachment=request.query_params.get('download') == '1'
+        )
+    
+    @action(detail=True, methods=['get'], url_path='attachments/zip', url_name='attachments-zip')
+    def attachments_zip(self, request, pk=None):
+        """Download every attachment of one appointment as a single ZIP"""
+        appointment = get_object_or_404(ClientAppointment, pk=pk)
+        # Read in id batches while the archive is sent
+        attachments = keyset_iterator(appointment.attachments.all(), ['id'], batch_size=ZIP_BATCH_SIZE)
+        return zip_response(f'appointment_{appointment.id}_attachments', self._zip_members(attachments, nested=False))
+    
+    @action(detail=False, methods=['get'], url_path='attachments/zip', url_name='attachments-bundle')
+    def attachments_bundle(self, request):
+        """ZIP of the attachments of every appointment on ?appointment_date=, optionally for one ?officer_id="""
+        appointment_date = self._date_param('appointment_date', None)
+        if appointment_date is None:
+            return Response({
+                'success': False,
+                'message': 'appointment_date parameter is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        serializer = self.get_serializer(appointments, many=True)
+        attachments = AppointmentAttachment.objects.filter(appointment__appointment_date=appointment_date)
+        officer_id = request.query_params.get('officer_id')
+        filename = f'attachments_{appointment_date.isoformat()}'
+        if officer_id:
+            attachments = attachments.filter(appointment__assigned_officer_id=officer_id)
+            filename += f'_officer_{officer_id}'
+        
+        # Read in (appointment_id, id) keyset batches while the archive is sent,
+        # so only one batch of rows is held however many files the day has
+        attachments = keyset_iterator(
+            attachments.select_related('appointment__client'),
+            ['appointment_id', 'id'],
+            batch_size=ZIP_BATCH_SIZE
+        )
+        return zip_response(filename, self._zip_members(attachments, nested=True))
+    
+    def _zip_members(self, attachments, nested):
+        """(arcname, opener, timestamp) per attachment; nested puts each appointment in its own folder"""
+        used_names = set()
+        for attachment in attachments:
+            # A missing file would abort the archive halfway through
+            if not attachment.file or not attachment.file.storage.exists(attachment.file.name):
+                continue
+            name = os.path.basename(attachment.filename) or f'attachment_{attachment.id}'
+            if nested:
+                client = attachment.appointment.client
+                name = f'{attachment.appointment_id}_{client.lastname}_{client.firstname}/{name}'
+            
+            # Two uploads with the same name would otherwise overwrite each other when extracted
+            base, extension = os.path.splitext(name)
+            copy = 2
+            while name in used_names:
+                name = f'{base} ({copy}){extension}'
+                copy += 1
+            used_names.add(name)
+            
+            yield name, partial(attachment.file.storage.open, attachment.file.name, 'rb'), attachment.uploaded_at
+    
+    def list(self, request):
+        """Get a page of appointments, optionally filtered by client, officer, status or date"""
+        appointments = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(appointments)
+        serializer = self.get_serializer(page, many=True)
         
-        return Response({
-            'success': True,
-            'data': serializer.data,
-            'message': 'Appointments retrieved successfully'
-        })
+        return self.get_paginated_response(serializer.data)
     
     def retrieve(self, request, pk=None):
         """Get a specific appointment"""
@@ -240,6 +639,7 @@ class ClientAppointmentViewSet(viewsets.ModelViewSet):
                 'message': f'Cannot cancel appointment that is already {appointment.status.lower()}'
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        # save() gives the slot back to the date
         appointment.status = 'Cancelled'
         appointment.save()
         
@@ -292,7 +692,7 @@ class ClientAppointmentViewSet(viewsets.ModelViewSet):
                 'message': 'Client not found'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        appointments = ClientAppointment.objects.filter(client=client)
+        appointments = self.get_queryset().filter(client=client)
         serializer = ClientAppointmentSerializer(appointments, many=True)
         
         return Response({
@@ -308,29 +708,69 @@ class ClientAppointmentViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Get appointment statistics"""
-        total_appointments = ClientAppointment.objects.count()
-        pending_appointments = ClientAppointment.objects.filter(status='Pending').count()
-        confirmed_appointments = ClientAppointment.objects.filter(status='Confirmed').count()
-        cancelled_appointments = ClientAppointment.objects.filter(status='Cancelled').count()
-        completed_appointments = ClientAppointment.objects.filter(status='Completed').count()
+        """Get appointment statistics, optionally for a date range, officer or inquiry type.
+
+        ?breakdown=officer|date|inquiry_type adds per-group counts from the same query.
+        """
+        breakdown = request.query_params.get('breakdown')
+        if breakdown and breakdown not in STATS_BREAKDOWNS:
+            raise ValidationError({'breakdown': f'Choose from {list(STATS_BREAKDOWNS)}'})
+        
+        rollups = AppointmentStatsRollup.objects.all()
+        date_from = self._date_param('date_from')
+        if date_from:
+            rollups = rollups.filter(appointment_date__gte=date_from)
+        date_to = self._date_param('date_to')
+        if date_to:
+            rollups = rollups.filter(appointment_date__lte=date_to)
+        officer_id = request.query_params.get('officer_id')
+        if officer_id:
+            rollups = rollups.filter(assigned_officer_id=officer_id)
+        inquiry_type = request.query_params.get('inquiry_type')
+        if inquiry_type:
+            rollups = rollups.filter(inquiry_type_id=inquiry_type)
+        
+        group_fields = STATS_BREAKDOWNS.get(breakdown, [])
+        rows = (
+            rollups
+            .values(*group_fields, 'status')
+            .annotate(total=Sum('count'))
+            .order_by()
+        )
+        
+        totals = self._empty_status_counts()
+        groups = {}
+        for row in rows:
+            status_key = row['status'].lower()
+            totals['total'] += row['total']
+            totals[status_key] += row['total']
+            if group_fields:
+                key = tuple(row[field] for field in group_fields)
+                group = groups.setdefault(key, {
+                    **{field.replace('__', '_'): row[field] for field in group_fields},
+                    **self._empty_status_counts()
+                })
+                group['total'] += row['total']
+                group[status_key] += row['total']
+        
+        data = totals
+        if group_fields:
+            data = {**totals, 'breakdown': [groups[key] for key in sorted(groups, key=str)]}
         
         return Response({
             'success': True,
-            'data': {
-                'total': total_appointments,
-                'pending': pending_appointments,
-                'confirmed': confirmed_appointments,
-                'cancelled': cancelled_appointments,
-                'completed': completed_appointments
-            },
+            'data': data,
             'message': 'Appointment statistics retrieved successfully'
         })
-        
+    
+    def _empty_status_counts(self):
+        counts = {'total': 0}
+        counts.update({value.lower(): 0 for value, _ in ClientAppointment.STATUS_CHOICES})
+        return counts
 
     @action(detail=True, methods=['post'])
     def feedback(self, request, pk=None):
-        """Submit feedback for a completed appointment with translation and sentiment analysis"""
+        """Submit feedback for a completed appointment and queue it for translation and sentiment analysis"""
         appointment = get_object_or_404(ClientAppointment, pk=pk)
         
         # Validate appointment status
@@ -361,128 +801,100 @@ class ClientAppointmentViewSet(viewsets.ModelViewSet):
                 'message': 'Rating must be an integer between 1 and 5'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            translated_feedback, detected_language = self.translate_text(feedback_text)
-        except Exception as e:
-            print(f"Translation failed: {str(e)}")
-            translated_feedback = feedback_text
-            detected_language = 'unknown'
-        
-        # Perform sentiment analysis on translated text
-        sentiment_score, sentiment_label = self.analyze_sentiment(translated_feedback)
-        
-        # Update the appointment with feedback and sentiment
-        appointment.feedback = feedback_text
-        appointment.translated_feedback = translated_feedback
-        appointment.rating = rating
-        appointment.sentiment_score = sentiment_score
-        appointment.sentiment_label = sentiment_label
-        appointment.feedback_language = detected_language
-
-        appointment.save()
+        # Translation and sentiment run in the enrichment worker, off the request path
+        with transaction.atomic():
+            appointment.feedback = feedback_text
+            appointment.rating = rating
+            appointment.translated_feedback = None
+            appointment.feedback_language = None
+            appointment.sentiment_score = None
+            appointment.sentiment_label = None
+            appointment.enrichment_status = 'Pending'
+            appointment.save()
+            FeedbackEnrichmentTask.enqueue(appointment)
         
         serializer = ClientAppointmentSerializer(appointment)
         
         return Response({
             'success': True,
             'data': serializer.data,
-            'sentiment': {
-                'score': sentiment_score,
-                'label': sentiment_label
-            },
-            'translated_feedback': translated_feedback if detected_language != 'en' else None,
+            'enrichment_status': appointment.enrichment_status,
             'message': 'Feedback submitted successfully'
         })
-
-    def translate_text(self, text):
-        """Automatically detect the language and translate to English using Google Translate"""
-        translator = Translator()
-        try:
-            detected = translator.detect(text)
-            detected_lang = detected.lang
-
-            if detected_lang == 'en':
-                return text, detected_lang  # No need to translate
-
-            translation = translator.translate(text, src=detected_lang, dest='en')
-            return translation.text, detected_lang
-
-        except Exception as e:
-            print(f"Translation error: {str(e)}")
-            return text, 'unknown'
-
-
-    def analyze_sentiment(self, text):
-        """Analyze sentiment of English text"""
-        sia = SentimentIntensityAnalyzer()
-        sentiment = sia.polarity_scores(text)
-        score = sentiment['compound']
-        
-        # Determine label based on score
-        if score >= 0.05:
-            label = 'Positive'
-        elif score <= -0.05:
-            label = 'Negative'
-        else:
-            label = 'Neutral'
-        
-        return score, label
     
     @action(detail=False, methods=['get'])
     def dashboard_stats(self, request):
         """Get dashboard statistics for gender, age, occupation, civil status, and consultation topics"""
+        data = get_snapshot(
+            'client_appointments:dashboard_stats',
+            self._compute_dashboard_stats,
+            ttl=getattr(settings, 'DASHBOARD_STATS_TTL', 60)
+        )
         
-        # Number of males and females
-        gender_stats = Client.objects.values('sex').annotate(count=Count('id')).order_by()
-        
-        # Age distribution
-        today = date.today()
-        age_groups = [
-            {'name': '18-25', 'min_age': 18, 'max_age': 25},
-            {'name': '26-35', 'min_age': 26, 'max_age': 35},
-            {'name': '36-45', 'min_age': 36, 'max_age': 45},
-            {'name': '46-55', 'min_age': 46, 'max_age': 55},
-            {'name': '56+', 'min_age': 56, 'max_age': 150},
-        ]
-        age_stats = []
-        for group in age_groups:
-            min_birth_year = today.year - group['max_age']
-            max_birth_year = today.year - group['min_age']
-            count = Client.objects.filter(
-                birthday__year__gte=min_birth_year,
-                birthday__year__lte=max_birth_year
-            ).count()
-            age_stats.append({'name': group['name'], 'value': count})
-
-        # Occupation distribution
-        occupation_stats = Client.objects.values('occupation').annotate(count=Count('id')).exclude(occupation__isnull=True).order_by('-count')
-
-        # Civil status distribution
-        civil_status_stats = Client.objects.values('civil_status').annotate(count=Count('id')).order_by()
-
-        # Most common consultation topics
-        consultation_stats = ClientAppointment.objects.values('inquiry_type__nature').annotate(count=Count('id')).order_by('-count')[:5]
-
         return Response({
             'success': True,
-            'data': {
-                'gender': [
-                    {'name': g['sex'], 'value': g['count']}
-                    for g in gender_stats
-                ],
-                'age': age_stats,
-                'occupation': [
-                    {'name': o['occupation'], 'value': o['count']}
-                    for o in occupation_stats
-                ],
-                'civil_status': [
-                    {'name': c['civil_status'], 'value': c['count']}
-                    for c in civil_status_stats
-                ],
-                'consultation_topics': [
-                    {'name': c['inquiry_type__nature'], 'value': c['count']}
-                    for c in consultation_stats
-                ]
-            },
+            'data': data,
             'message': 'Dashboard statistics retrieved successfully'
-        })    
\ No newline at end of file
+        })
+    
+    def _compute_dashboard_stats(self):
+        """Build every dashboard section in three queries"""
+        today = date.today()
+        
+        # Age, gender and civil status in one pass over tblClients. Age buckets
+        # are birthday ranges, so each CASE compares the indexed column directly.
+        aggregates = {}
+        for group in DASHBOARD_AGE_GROUPS:
+            youngest_birthday = self._years_before(today, group['min_age'])
+            oldest_birthday = self._years_before(today, group['max_age'] + 1)
+            aggregates[f"age_{group['name']}"] = Count(
+                'id', filter=Q(birthday__gt=oldest_birthday, birthday__lte=youngest_birthday)
+            )
+        for value, _ in Client.SEX_CHOICES:
+            aggregates[f'sex_{value}'] = Count('id', filter=Q(sex=value))
+        for value, _ in Client.CIVIL_STATUS_CHOICES:
+            aggregates[f'civil_status_{value}'] = Count('id', filter=Q(civil_status=value))
+        client_counts = Client.objects.aggregate(**aggregates)
+        
+        # Occupation distribution
+        occupation_stats = Client.objects.values('occupation').annotate(count=Count('id')).exclude(occupation__isnull=True).order_by('-count')
+        
+        # Most common consultation topics, from the stats rollup rather than every appointment
+        consultation_stats = (
+            AppointmentStatsRollup.objects
+            .values('inquiry_type__nature')
+            .annotate(count=Sum('count'))
+            .order_by('-count')[:5]
+        )
+        
+        return {
+            'gender': [
+                {'name': value, 'value': client_counts[f'sex_{value}']}
+                for value, _ in Client.SEX_CHOICES
+                if client_counts[f'sex_{value}']
+            ],
+            'age': [
+                {'name': group['name'], 'value': client_counts[f"age_{group['name']}"]}
+                for group in DASHBOARD_AGE_GROUPS
+            ],
+            'occupation': [
+                {'name': o['occupation'], 'value': o['count']}
+                for o in occupation_stats
+            ],
+            'civil_status': [
+                {'name': value, 'value': client_counts[f'civil_status_{value}']}
+                for value, _ in Client.CIVIL_STATUS_CHOICES
+                if client_counts[f'civil_status_{value}']
+            ],
+            'consultation_topics': [
+                {'name': c['inquiry_type__nature'], 'value': c['count']}
+                for c in consultation_stats
+            ]
+        }
+    
+    def _years_before(self, day, years):
+        try:
+            return day.replace(year=day.year - years)
+        except ValueError:
+            # 29 February in a non-leap year
+            return day.replace(year=day.year - years, day=28)    
\ No newline at end of file
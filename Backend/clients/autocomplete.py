@@ -0,0 +1,227 @@
+# backend/clients/autocomplete.py
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from django.conf import settings
+from django.db import connection
+from .search import normalize, normalize_phone, normalize_query
+
+logger = logging.getLogger(__name__)
+
+# Keys longer than this are cut; nobody types that far before picking a match
+MAX_KEY_LENGTH = 32
+
+AUTOCOMPLETE_SOURCE_FIELDS = ['id', 'lastname', 'firstname', 'middlename', 'username', 'contact_number']
+
+
+def _keys_for(lastname, firstname, middlename, username, contact_number):
+    """Index keys of one client: "last first middle" from each word of the last name,
+    "first last", the username and the phone digits"""
+    last_words = normalize(lastname).split(' ')
+    rest = normalize(f'{firstname} {middlename or ""}')
+    keys = {f"{' '.join(last_words[start:])} {rest}"[:MAX_KEY_LENGTH] for start in range(len(last_words))}
+    keys.add(normalize(f'{firstname} {lastname}')[:MAX_KEY_LENGTH])
+    keys.add(normalize(username)[:MAX_KEY_LENGTH])
+    keys.add(normalize_phone(contact_number))
+    keys.discard('')
+    return tuple(sorted(keys))
+
+
+class ClientAutocompleteIndex:
+    """In-process prefix index over active clients' names, usernames and phone numbers.
+
+    Keys live in one sorted list with a parallel array of client ids, so a
+    lookup is a bisect plus a short forward scan. A client with a one-word
+    last name holds four keys of at most MAX_KEY_LENGTH characters and one
+    small display tuple. The index is built from the database on the first
+    lookup and patched by the Client signals in clients/signals.py. Other
+    worker processes do not see those signals, so each index is also
+    rebuilt once it is `max_age` seconds old.
+
+    Rebuilds load into fresh structures without holding `_lock` and swap
+    them in at the end, so lookups and signals never wait on the database
+    read. A stale index keeps answering while a background thread rebuilds
+    it; only the very first lookup has to wait for a build. Signals that
+    arrive during a build are recorded and replayed onto the new index
+    before the swap.
+    """
+
+    def __init__(self, max_age=None):
+        self.max_age = max_age if max_age is not None else getattr(settings, 'CLIENT_AUTOCOMPLETE_MAX_AGE', 300)
+        self._keys = []
+        self._ids = array('q')
+        # id -> (keys, full_name, username, contact_number)
+        self._clients = {}
+        self._built_at = None
+        # Guards the structures above; held only for lookups, patches and the swap
+        self._lock = threading.RLock()
+        # Held by whoever is building, so there is one build at a time
+        self._build_lock = threading.Lock()
+        # Signals received while a build is loading: [('update', client) | ('remove', id)]
+        self._pending = None
+
+    def _load(self):
+        from django.contrib.auth import get_user_model
+        User = get_user_model()
+
+        pairs = []
+        clients = {}
+        rows = (
+            User.objects
+            .filter(is_active=True)
+            .values_list(*AUTOCOMPLETE_SOURCE_FIELDS)
+            .iterator(chunk_size=5000)
+        )
+        for client_id, lastname, firstname, middlename, username, contact_number in rows:
+            record = self._record(lastname, firstname, middlename, username, contact_number)
+            clients[client_id] = record
+            pairs.extend((key, client_id) for key in record[0])
+        pairs.sort()
+        return [key for key, _ in pairs], array('q', (client_id for _, client_id in pairs)), clients
+
+    def _record(self, lastname, firstname, middlename, username, contact_number):
+        full_name = ' '.join(part for part in [firstname, middlename, lastname] if part)
+        return _keys_for(lastname, firstname, middlename, username, contact_number), full_name, username, contact_number
+
+    def _is_fresh(self):
+        built_at = self._built_at
+        return built_at is not None and time.monotonic() - built_at < self.max_age
+
+    def _ensure_built(self):
+        if self._is_fresh():
+            return
+        if self._built_at is None:
+            # Nothing to answer from yet: one caller builds, the others wait for it
+            with self._build_lock:
+                if self._built_at is None:
+                    self._rebuild()
+            return
+        # Stale: keep answering from the old index while one thread rebuilds it
+        if self._build_lock.acquire(blocking=False):
+            if self._is_fresh():
+                self._build_lock.release()
+                return
+            try:
+                threading.Thread(target=self._rebuild_in_background, name='client-autocomplete', daemon=True).start()
+            except BaseException:
+                self._build_lock.release()
+                raise
+
+    def _rebuild_in_background(self):
+        try:
+            self._rebuild()
+        except Exception:
+            logger.exception('Rebuilding the client autocomplete index failed')
+            with self._lock:
+                # Serve the old index for another max_age rather than retry on every lookup
+                self._built_at = time.monotonic()
+        finally:
+            self._build_lock.release()
+            # This thread's own database connection
+            connection.close()
+
+    def _rebuild(self):
+        """Load a new index off the lock, then swap it in. Called with _build_lock held."""
+        with self._lock:
+            self._pending = []
+        try:
+            keys, ids, clients = self._load()
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._keys, self._ids, self._clients = keys, ids, clients
+            self._built_at = time.monotonic()
+            # The load may or may not have seen these changes; re-applying is harmless
+            for action, value in pending:
+                if action == 'update':
+                    self._index(value)
+                else:
+                    self._remove(value)
+
+    def search(self, query, limit=10):
+        """Up to `limit` clients whose name, username or phone starts with `query`"""
+        prefix = normalize_query(query)[:MAX_KEY_LENGTH]
+        if not prefix:
+            return []
+        self._ensure_built()
+        results = []
+        seen = set()
+        with self._lock:
+            position = bisect_left(self._keys, prefix)
+            while position < len(self._keys) and len(results) < limit:
+                if not self._keys[position].startswith(prefix):
+                    break
+                client_id = self._ids[position]
+                if client_id not in seen:
+                    seen.add(client_id)
+                    _, full_name, username, contact_number = self._clients[client_id]
+                    results.append({
+                        'id': client_id,
+                        'full_name': full_name,
+                        'username': username,
+                        'contact_number': contact_number,
+                    })
+                position += 1
+        return results
+
+    def update(self, client):
+        """Re-index one client after it is saved"""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(('update', client))
+            if self._built_at is None:
+                # Nothing loaded yet; the first lookup reads the current rows
+                return
+            self._index(client)
+
+    def remove(self, client_id):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(('remove', client_id))
+            self._remove(client_id)
+
+    def _index(self, client):
+        self._remove(client.pk)
+        if not client.is_active:
+            return
+        record = self._record(client.lastname, client.firstname, client.middlename, client.username, client.contact_number)
+        self._clients[client.pk] = record
+        for key in record[0]:
+            position = bisect_right(self._keys, key)
+            self._keys.insert(position, key)
+            self._ids.insert(position, client.pk)
+
+    def _remove(self, client_id):
+        record = self._clients.pop(client_id, None)
+        if record is None:
+            return
+        for key in record[0]:
+            position = bisect_left(self._keys, key)
+            while position < len(self._keys) and self._keys[position] == key:
+                if self._ids[position] == client_id:
+                    del self._keys[position]
+                    del self._ids[position]
+                    break
+                position += 1
+
+    def clear(self):
+        with self._lock:
+            self._keys, self._ids, self._clients = [], array('q'), {}
+            self._built_at = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'clients': len(self._clients),
+                'keys': len(self._keys),
+                'built': self._built_at is not None,
+            }
+
+
+# GLOBAL INSTANCE FOR USEABILITY
+client_index = ClientAutocompleteIndex()
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:15
+
+from django.db import migrations, models
+
+from clients.search import backfill_search_fields as backfill
+
+
+def backfill_search_fields(apps, schema_editor):
+    backfill(apps.get_model('clients', 'Client'))
+
+
+def add_fulltext_index(apps, schema_editor):
+    # Substring search uses an ngram FULLTEXT index, which only MySQL has;
+    # other databases fall back to LIKE on search_text
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            'CREATE FULLTEXT INDEX tblClients_search_text_ft ON tblClients (search_text) WITH PARSER ngram'
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('DROP INDEX tblClients_search_text_ft ON tblClients')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_alter_client_sex'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='search_text',
+            field=models.CharField(blank=True, default='', editable=False, max_length=500),
+        ),
+        migrations.RunPython(backfill_search_fields, migrations.RunPython.noop),
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
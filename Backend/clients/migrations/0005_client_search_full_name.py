@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:40
+
+from django.db import migrations
+
+from clients.search import backfill_search_fields as backfill
+
+
+def backfill_search_fields(apps, schema_editor):
+    # search_text now also holds the "first middle last" name the directory shows
+    backfill(apps.get_model('clients', 'Client'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_client_dashboard_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_fields, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
+from .search import SEARCH_SOURCE_FIELDS, build_search_fields
 #----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
 # Create your models here.
@@ -85,6 +86,10 @@ class Client(AbstractUser):
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
     
+    # SEARCH COLUMNS (normalized copies maintained by save(), see clients/search.py)
+    search_name = models.CharField(max_length=200, blank=True, default='', db_index=True, editable=False)
+    search_text = models.CharField(max_length=500, blank=True, default='', editable=False)
+    
     # FIELD DEF & REQS
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['email', 'firstname', 'lastname']
@@ -118,10 +123,22 @@ class Client(AbstractUser):
     
     #-----------------------------------------------------------------------------------------
 
+    def save(self, *args, **kwargs):
+        self.search_name, self.search_text = build_search_fields(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and SEARCH_SOURCE_FIELDS.intersection(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_name', 'search_text'}
+        super().save(*args, **kwargs)
+    
     class Meta:
         db_table = 'tblClients'
         verbose_name = 'Client'
         verbose_name_plural = 'Clients'
+        indexes = [
+            # Covers the dashboard's age, gender and civil status counts
+            models.Index(fields=['birthday', 'sex', 'civil_status'], name='client_demographics_idx'),
+            models.Index(fields=['occupation'], name='client_occupation_idx'),
+        ]
     
     def __str__(self):
         return f"{self.firstname} {self.lastname} ({self.username})"
\ No newline at end of file
@@ -0,0 +1,106 @@
+# backend/clients/search.py
+import re
+import unicodedata
+from django.db import connections
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+# Client fields that feed the search columns; saving any of them refreshes both
+SEARCH_SOURCE_FIELDS = {'lastname', 'firstname', 'middlename', 'username', 'email', 'contact_number'}
+
+# MySQL's ngram full-text parser indexes 2-character tokens by default
+# (ngram_token_size); shorter terms fall back to the name prefix index
+NGRAM_SIZE = 2
+
+_whitespace = re.compile(r'\s+')
+_non_digits = re.compile(r'\D+')
+
+
+def normalize(text):
+    """Lowercase, accent-free, single-spaced form used for both stored columns and queries"""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return _whitespace.sub(' ', stripped.casefold()).strip()
+
+
+def normalize_phone(text):
+    """Digits only, with +63/63 numbers in the local 0XXXXXXXXXX form"""
+    digits = _non_digits.sub('', text or '')
+    if digits.startswith('63') and len(digits) == 12:
+        digits = '0' + digits[2:]
+    return digits
+
+
+def normalize_query(query):
+    """Search term for `query`, shared by the directory search and autocomplete.
+
+    A query without letters is taken as a phone number: its digits, with a
+    fully or partly typed +63 prefix turned into the stored leading 0, so
+    "+63 917-000" finds 09170001234.
+    """
+    term = normalize(query)
+    digits = _non_digits.sub('', term)
+    if digits and not any(char.isalpha() for char in term):
+        return '0' + digits[2:] if digits.startswith('63') else digits
+    return term
+
+
+def build_search_fields(client):
+    """(search_name, search_text) for a client.
+
+    search_name is "lastname firstname middlename" and backs prefix search
+    and name ordering through a plain B-tree index. search_text also holds
+    the name in the "first middle last" order the directory displays (and
+    "first last" when there is a middle name), the username, email and the
+    digits of the contact number, and backs substring search.
+    """
+    search_name = normalize(f'{client.lastname} {client.firstname} {client.middlename or ""}')
+    full_name = normalize(f'{client.firstname} {client.middlename or ""} {client.lastname}')
+    short_name = normalize(f'{client.firstname} {client.lastname}') if client.middlename else ''
+    phone_digits = normalize_phone(client.contact_number)
+    search_text = ' | '.join(part for part in [
+        search_name,
+        full_name,
+        short_name,
+        normalize(client.username),
+        normalize(client.email),
+        phone_digits,
+    ] if part)
+    return search_name[:200], search_text[:500]
+
+
+def backfill_search_fields(Client, batch_size=2000):
+    """Recompute the search columns of every client; used by the migrations"""
+    batch = []
+    for client in Client.objects.only(
+        'id', 'lastname', 'firstname', 'middlename', 'username', 'email', 'contact_number'
+    ).iterator(chunk_size=batch_size):
+        client.search_name, client.search_text = build_search_fields(client)
+        batch.append(client)
+        if len(batch) >= batch_size:
+            Client.objects.bulk_update(batch, ['search_name', 'search_text'])
+            batch = []
+    if batch:
+        Client.objects.bulk_update(batch, ['search_name', 'search_text'])
+
+
+def search_clients(queryset, query):
+    """Filter `queryset` to clients matching `query` by name, username, email or contact number"""
+    term = normalize_query(query)
+    if not term:
+        return queryset
+
+    if len(term) < NGRAM_SIZE:
+        return queryset.filter(search_name__startswith=term)
+
+    connection = connections[queryset.db]
+    if connection.vendor == 'mysql':
+        # Phrase search over the ngram FULLTEXT index behaves like a substring match
+        column = '%s.%s' % (connection.ops.quote_name(queryset.model._meta.db_table), connection.ops.quote_name('search_text'))
+        phrase = '"%s"' % term.replace('"', ' ')
+        match = RawSQL(f'MATCH({column}) AGAINST (%s IN BOOLEAN MODE)', (phrase,), output_field=FloatField())
+        return queryset.alias(search_match=match).filter(search_match__gt=0)
+
+    return queryset.filter(search_text__contains=term)
@@ -3,6 +3,7 @@ from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import get_user_model
 from datetime import date
+from authentication.hashing import make_password
 #----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
 User = get_user_model()
@@ -61,8 +62,14 @@ class ClientRegistrationSerializer(serializers.ModelSerializer):
         # Remove confirmPassword from validated_data
         validated_data.pop('confirmPassword')
         
-        # Create user
-        user = User.objects.create_user(**validated_data)
+        # Create user; the password is hashed on the bounded hashing pool
+        # (raises HashPoolBusy when it is saturated)
+        password = validated_data.pop('password')
+        user = User(**validated_data)
+        user.username = User.normalize_username(user.username)
+        user.email = User.objects.normalize_email(user.email)
+        user.password = make_password(password)
+        user.save()
         return user
 
 #---CLIENT INFO--------------------------------------------------------------------------------------------
@@ -0,0 +1,18 @@
+# backend/clients/signals.py
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .autocomplete import client_index
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def index_saved_client(sender, instance, **kwargs):
+    # After commit, so a rolled back registration or edit never shows up
+    transaction.on_commit(lambda: client_index.update(instance))
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def unindex_deleted_client(sender, instance, **kwargs):
+    client_id = instance.pk
+    transaction.on_commit(lambda: client_index.remove(client_id))
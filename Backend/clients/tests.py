@@ -1,3 +1,222 @@
+from datetime import date
+import csv
+import io
+import threading
+from unittest import mock
 from django.test import TestCase
+from authentication.tests import personnel_header
+from client_appointments.views import ClientAppointmentViewSet
+from utils.export import keyset_rows
+from utils.query_plan import QueryPlanAssertions, analyze_tables
+from .autocomplete import ClientAutocompleteIndex, client_index
+from .models import Client
+from .search import build_search_fields
 
-# Create your tests here.
+SEED_CLIENTS = 2000
+
+
+class ClientQueryPlanTests(QueryPlanAssertions, TestCase):
+    """The dashboard and directory queries over tblClients must be answered through an index"""
+
+    @classmethod
+    def setUpTestData(cls):
+        sexes = [value for value, _ in Client.SEX_CHOICES]
+        civil_statuses = [value for value, _ in Client.CIVIL_STATUS_CHOICES]
+        clients = []
+        for i in range(SEED_CLIENTS):
+            client = Client(
+                username=f'client{i}', email=f'client{i}@example.com', lastname=f'Client{i % 97}', firstname=str(i),
+                birthday=date(1940 + i % 70, 1 + i % 12, 1 + i % 28), contact_number=f'0917{i:07d}',
+                sex=sexes[i % len(sexes)], civil_status=civil_statuses[i % len(civil_statuses)],
+                occupation=f'Occupation {i % 20}',
+            )
+            client.search_name, client.search_text = build_search_fields(client)
+            clients.append(client)
+        Client.objects.bulk_create(clients)
+        analyze_tables(Client)
+
+    def test_dashboard_stats(self):
+        # Demographics as one FILTER aggregate over the covering index, then occupations and topics
+        with self.assertQueriesIndexed() as captured:
+            stats = ClientAppointmentViewSet()._compute_dashboard_stats()
+        self.assertEqual(len(captured), 3)
+        self.assertEqual(sum(group['value'] for group in stats['gender']), SEED_CLIENTS)
+
+    def test_birthday_range(self):
+        self.assertIndexed(Client.objects.filter(birthday__gt=date(1980, 1, 1), birthday__lte=date(1985, 1, 1)))
+
+    def assertDirectoryIndexed(self, ordering):
+        with self.assertQueriesIndexed():
+            response = self.client.get('/api/clients/list/', {'ordering': ordering}, **personnel_header())
+        self.assertEqual(response.status_code, 200)
+
+    def test_directory_by_name(self):
+        self.assertDirectoryIndexed('lastname')
+
+    def test_directory_by_birthday(self):
+        self.assertDirectoryIndexed('age')
+
+
+class ClientSearchTests(TestCase):
+    """Directory search by name in either order, username, email and (partly typed) phone number"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for username, firstname, middlename, lastname, contact_number in [
+            ('jdc', 'Juan', 'Santos', 'Dela Cruz', '09170001234'),
+            ('maria', 'María', None, 'Dela Cruz', '09181112222'),
+            ('pedro', 'Pedro', None, 'Reyes', '09170005678'),
+            ('ana', 'Ana', 'Cruz', 'Bautista', '09993334444'),
+        ]:
+            Client.objects.create(
+                username=username, email=f'{username}@example.com', firstname=firstname, middlename=middlename,
+                lastname=lastname, birthday=date(1990, 1, 1), contact_number=contact_number
+            )
+
+    def search(self, query, **params):
+        response = self.client.get('/api/clients/list/', {'search': query, **params}, **personnel_header())
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def usernames(self, query, **params):
+        return [row['username'] for row in self.search(query, **params)['data']]
+
+    def test_name_in_either_order(self):
+        self.assertEqual(self.usernames('dela cruz juan'), ['jdc'])
+        self.assertEqual(self.usernames('Juan Santos Dela Cruz'), ['jdc'])
+        self.assertEqual(self.usernames('Juan Dela Cruz'), ['jdc'])
+        self.assertEqual(self.usernames('maria dela cruz'), ['maria'])
+        self.assertEqual(self.usernames('Dela Cruz', ordering='username'), ['jdc', 'maria'])
+
+    def test_name_parts_do_not_run_into_each_other(self):
+        # "santos juan" only appears by joining the end of one name form to the next
+        self.assertEqual(self.usernames('santos juan'), [])
+
+    def test_username_and_email(self):
+        self.assertEqual(self.usernames('pedro'), ['pedro'])
+        self.assertEqual(self.usernames('ana@example'), ['ana'])
+
+    def test_phone_numbers(self):
+        self.assertEqual(self.usernames('0917000', ordering='username'), ['jdc', 'pedro'])
+        self.assertEqual(self.usernames('+63917000', ordering='username'), ['jdc', 'pedro'])
+        self.assertEqual(self.usernames('+63 918-111'), ['maria'])
+        self.assertEqual(self.usernames('639170001234'), ['jdc'])
+        self.assertEqual(self.usernames('5678'), ['pedro'])
+
+    def test_ordering_and_paging(self):
+        self.assertEqual(self.usernames('cruz', ordering='lastname'), ['ana', 'jdc', 'maria'])
+        self.assertEqual(self.usernames('cruz', ordering='-username'), ['maria', 'jdc', 'ana'])
+        first = self.search('cruz', ordering='username', page_size=2)
+        self.assertEqual(([row['username'] for row in first['data']], first['has_next']), (['ana', 'jdc'], True))
+        second = self.search('cruz', ordering='username', page_size=2, page=2)
+        self.assertEqual(([row['username'] for row in second['data']], second['has_next']), (['maria'], False))
+
+    def test_autocomplete_uses_the_same_phone_normalizer(self):
+        client_index.clear()
+        self.addCleanup(client_index.clear)
+        response = self.client.get('/api/clients/autocomplete/', {'q': '+63917000'}, **personnel_header())
+        self.assertEqual(sorted(row['username'] for row in response.json()['data']), ['jdc', 'pedro'])
+
+
+class ClientExportTests(TestCase):
+    """The export must hold only one batch at a time and match what the directory shows"""
+
+    @classmethod
+    def setUpTestData(cls):
+        names = ['Santos', 'Reyes', 'Cruz', 'Bautista', 'Garcia']
+        for i in range(17):
+            # Few distinct birthdays and names, so the keyset must break ties on id
+            Client.objects.create(
+                username=f'client{i}', email=f'client{i}@example.com', lastname=names[i % 5], firstname=f'Name{i}',
+                birthday=date(1980 + i % 3, 1, 1), contact_number=f'0917{i:07d}'
+            )
+
+    def test_keyset_rows_matches_plain_ordering(self):
+        for order_by in (['id'], ['-birthday', '-id'], ['search_name', 'id'], ['-search_name', '-id']):
+            expected = list(Client.objects.order_by(*order_by).values_list('id', flat=True))
+            for batch_size in (1, 4, 17, 100):
+                rows = [row[0] for row in keyset_rows(Client.objects.all(), order_by, ['id'], batch_size=batch_size)]
+                self.assertEqual(rows, expected, f'{order_by} batch_size={batch_size}')
+
+    def test_keyset_rows_reads_in_batches(self):
+        with self.assertNumQueries(5):
+            rows = list(keyset_rows(Client.objects.all(), ['id'], ['username'], batch_size=4))
+        self.assertEqual(len(rows), 17)
+
+    def export_ids(self, query):
+        response = self.client.get(f'/api/clients/export/?{query}', **personnel_header())
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        return [int(row[0]) for row in list(csv.reader(io.StringIO(content)))[1:]]
+
+    def directory_ids(self, query):
+        response = self.client.get(f'/api/clients/list/?page_size=500&{query}')
+        return [row['id'] for row in response.json()['data']]
+
+    def test_export_follows_directory_search_and_ordering(self):
+        for query in ('', 'search=cruz', 'ordering=-age', 'search=reyes&ordering=lastname', 'ordering=-created_at'):
+            self.assertEqual(self.export_ids(query), self.directory_ids(query), query)
+        self.assertEqual(len(self.export_ids('search=cruz')), 3)
+
+    def test_export_rejects_unknown_ordering(self):
+        response = self.client.get('/api/clients/export/?ordering=password', **personnel_header())
+        self.assertEqual(response.status_code, 400)
+
+
+class ClientAutocompleteIndexTests(TestCase):
+    """Rebuilds read the database off the index lock and swap the result in"""
+
+    def make_client(self, username, lastname):
+        return Client.objects.create(
+            username=username, email=f'{username}@example.com', lastname=lastname, firstname='Ana',
+            birthday=date(1990, 1, 1), contact_number='09170000000'
+        )
+
+    def names(self, index, query):
+        return [row['username'] for row in index.search(query)]
+
+    def test_stale_index_answers_while_rebuilding(self):
+        self.make_client('ana.cruz', 'Cruz')
+        index = ClientAutocompleteIndex(max_age=60)
+        self.assertEqual(self.names(index, 'cruz'), ['ana.cruz'])
+
+        self.make_client('ana.santos', 'Santos')
+        # Loaded here; the test database is not visible to the rebuild thread
+        loaded = index._load()
+        started, release = threading.Event(), threading.Event()
+
+        def slow_load():
+            started.set()
+            release.wait(5)
+            return loaded
+
+        index._built_at -= 120
+        with mock.patch.object(index, '_load', slow_load):
+            # Answered from the old index while the rebuild is blocked
+            self.assertEqual(self.names(index, 'santos'), [])
+            self.assertTrue(started.wait(5))
+            self.assertEqual(self.names(index, 'cruz'), ['ana.cruz'])
+            release.set()
+            with index._build_lock:
+                pass
+        self.assertEqual(self.names(index, 'santos'), ['ana.santos'])
+
+    def test_signals_during_rebuild_are_replayed(self):
+        cruz = self.make_client('ana.cruz', 'Cruz')
+        index = ClientAutocompleteIndex(max_age=60)
+        index.search('cruz')
+        loaded = index._load()
+        reyes = self.make_client('ana.reyes', 'Reyes')
+
+        def load_with_signals():
+            # Saved and deleted after the rows were read
+            index.update(reyes)
+            index.remove(cruz.pk)
+            return loaded
+
+        with mock.patch.object(index, '_load', load_with_signals):
+            with index._build_lock:
+                index._rebuild()
+        self.assertEqual(self.names(index, 'reyes'), ['ana.reyes'])
+        self.assertEqual(self.names(index, 'cruz'), [])
+        self.assertIsNone(index._pending)
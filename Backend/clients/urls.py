@@ -9,6 +9,8 @@ urlpatterns = [
     path('logout/', views.logout_client, name='logout_client'),
     path('profile/', views.get_client_profile, name='get_client_profile'),
     path('list/', views.get_all_clients, name='get_all_clients'),
+    path('autocomplete/', views.autocomplete_clients, name='autocomplete_clients'),
+    path('export/', views.export_clients, name='export_clients'),
     path('update/<int:client_id>/', views.update_client, name='update_client'),
     path('delete/<int:client_id>/', views.delete_client, name='delete_client'),
 ]
\ No newline at end of file
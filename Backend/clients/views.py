@@ -5,8 +5,16 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.contrib.auth import authenticate
 from django.db import transaction
+from django.db.models import Case, ExpressionWrapper, IntegerField, Q, Value, When
+from django.db.models.functions import ExtractYear
+from datetime import date
 from .serializers import ClientRegistrationSerializer, ClientSerializer
 from authentication.jwe_utils import jwe_manager
+from authentication.permissions import IsClient, IsPersonnel
+from authentication.hashing import HashPoolBusy, check_password
+from utils.export import export_response, keyset_rows
+from .search import search_clients
+from .autocomplete import client_index
 import logging
 
 logger = logging.getLogger(__name__)
@@ -54,8 +62,8 @@ def login_client(request):
                 'message': 'Invalid credentials'
             }, status=status.HTTP_401_UNAUTHORIZED)
         
-        # Check password
-        if not user.check_password(password):
+        # Check password (on the bounded hashing pool)
+        if not check_password(user, password):
             return Response({
                 'success': False,
                 'message': 'Invalid credentials'
@@ -87,6 +95,11 @@ def login_client(request):
             }
         }, status=status.HTTP_200_OK)
         
+    except HashPoolBusy:
+        return Response({
+            'success': False,
+            'message': 'Too many sign-in attempts right now, please try again shortly'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '2'})
     except Exception as e:
         logger.error(f"Client login error: {str(e)}")
         return Response({
@@ -134,6 +147,11 @@ def register_client(request):
                     'errors': serializer.errors
                 }, status=status.HTTP_400_BAD_REQUEST)
                 
+    except HashPoolBusy:
+        return Response({
+            'success': False,
+            'message': 'Too many registration attempts right now, please try again shortly'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '2'})
     except Exception as e:
         logger.error(f"Client registration error: {str(e)}")
         return Response({
@@ -143,6 +161,7 @@ def register_client(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
+@permission_classes([IsClient])
 def get_client_profile(request):
     """
     Get current client's profile
@@ -161,6 +180,7 @@ def get_client_profile(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['POST'])
+@permission_classes([IsClient])
 def logout_client(request):
     """
     Logout client (mainly for frontend to clear token)
@@ -170,26 +190,97 @@ def logout_client(request):
         'message': 'Logout successful'
     }, status=status.HTTP_200_OK)
     
+CLIENT_DIRECTORY_FIELDS = [
+    'id', 'username', 'lastname', 'firstname', 'middlename',
+    'email', 'contact_number', 'province', 'city', 'barangay', 'street',
+    'civil_status', 'birthplace', 'date_joined', 'is_active',
+    'birthday', 'sex', 'is_pwd', 'is_pregnant', 'occupation',
+    'created_at', 'updated_at',
+]
+# ?ordering= values; each ends with id so pages are stable
+CLIENT_DIRECTORY_ORDERINGS = {
+    'id': ['id'],
+    'lastname': ['search_name', 'id'],
+    'username': ['username', 'id'],
+    'email': ['email', 'id'],
+    'birthday': ['birthday', 'id'],
+    'age': ['-birthday', '-id'],
+    'created_at': ['created_at', 'id'],
+}
+CLIENT_DIRECTORY_PAGE_SIZE = 50
+CLIENT_DIRECTORY_MAX_PAGE_SIZE = 500
+
+def directory_order_by(ordering):
+    """order_by() fields for an ?ordering= value, or None when it is not one of CLIENT_DIRECTORY_ORDERINGS"""
+    order_by = CLIENT_DIRECTORY_ORDERINGS.get(ordering.lstrip('-'))
+    if order_by is not None and ordering.startswith('-'):
+        order_by = [field[1:] if field.startswith('-') else f'-{field}' for field in order_by]
+    return order_by
+
+def directory_ordering_error():
+    return Response({
+        'success': False,
+        'message': f'ordering must be one of {sorted(CLIENT_DIRECTORY_ORDERINGS)}'
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+def client_age_expression(today):
+    """Age in whole years, computed by the database from birthday"""
+    birthday_not_reached = Q(birthday__month__gt=today.month) | Q(birthday__month=today.month, birthday__day__gt=today.day)
+    return ExpressionWrapper(
+        Value(today.year) - ExtractYear('birthday') - Case(When(birthday_not_reached, then=Value(1)), default=Value(0)),
+        output_field=IntegerField()
+    )
+
 @api_view(['GET'])
 @permission_classes([AllowAny]) 
 def get_all_clients(request):
     """
-    Get all clients for display in table
+    Page through the client directory.
+    ?search= matches name, username, email or contact number;
+    ?ordering= one of CLIENT_DIRECTORY_ORDERINGS, prefixed with - to reverse;
+    ?page= (from 1) and ?page_size=
     """
     try:
         from django.contrib.auth import get_user_model
         User = get_user_model()
         
-        # Get all users (assuming they are your clients)
-        clients = User.objects.all().order_by('id')
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = int(request.query_params.get('page_size', CLIENT_DIRECTORY_PAGE_SIZE))
+        except ValueError:
+            return Response({
+                'success': False,
+                'message': 'page and page_size must be numbers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        page_size = min(max(page_size, 1), CLIENT_DIRECTORY_MAX_PAGE_SIZE)
+        
+        order_by = directory_order_by(request.query_params.get('ordering', 'id'))
+        if order_by is None:
+            return directory_ordering_error()
         
-        # Serialize the data
-        serializer = ClientSerializer(clients, many=True)
+        clients = search_clients(User.objects.all(), request.query_params.get('search', ''))
+        
+        # One query: a values() projection with age computed in SQL, one row past the
+        # page to tell whether there is a next page, and no separate count()
+        offset = (page - 1) * page_size
+        rows = list(
+            clients
+            .order_by(*order_by)
+            .values(*CLIENT_DIRECTORY_FIELDS)
+            .annotate(age=client_age_expression(date.today()))[offset:offset + page_size + 1]
+        )
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        for row in rows:
+            row['full_name'] = ' '.join(part for part in [row['firstname'], row['middlename'], row['lastname']] if part)
+            row['full_address'] = ', '.join(part for part in [row['street'], row['barangay'], row['city'], row['province']] if part)
         
         return Response({
             'success': True,
-            'data': serializer.data,
-            'count': clients.count()
+            'data': rows,
+            'page': page,
+            'page_size': page_size,
+            'has_next': has_next
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -200,6 +291,74 @@ def get_all_clients(request):
             'error': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+CLIENT_AUTOCOMPLETE_MAX_LIMIT = 25
+
+@api_view(['GET'])
+@permission_classes([IsPersonnel])
+def autocomplete_clients(request):
+    """
+    Suggest active clients whose name, username or contact number starts with ?q=
+    (up to ?limit=, default 10). Served from the in-memory index in clients/autocomplete.py
+    """
+    try:
+        limit = int(request.query_params.get('limit', 10))
+    except ValueError:
+        return Response({
+            'success': False,
+            'message': 'limit must be a number'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    limit = min(max(limit, 1), CLIENT_AUTOCOMPLETE_MAX_LIMIT)
+    
+    return Response({
+        'success': True,
+        'data': client_index.search(request.query_params.get('q', ''), limit)
+    }, status=status.HTTP_200_OK)
+
+CLIENT_EXPORT_FIELDS = [
+    'id', 'username', 'lastname', 'firstname', 'middlename', 'email', 'contact_number',
+    'sex', 'civil_status', 'birthday', 'birthplace', 'occupation',
+    'street', 'barangay', 'city', 'province', 'is_pwd', 'is_pregnant', 'is_active',
+    'date_joined', 'created_at',
+]
+CLIENT_EXPORT_HEADER = [
+    'ID', 'Username', 'Last Name', 'First Name', 'Middle Name', 'Email', 'Contact Number',
+    'Sex', 'Civil Status', 'Birthday', 'Birthplace', 'Occupation',
+    'Street', 'Barangay', 'City', 'Province', 'PWD', 'Pregnant', 'Active',
+    'Date Joined', 'Created At',
+]
+
+@api_view(['GET'])
+@permission_classes([IsPersonnel])
+def export_clients(request):
+    """
+    Download the clients the directory shows for the same ?search= and ?ordering=,
+    as CSV (default) or XLSX (?file_format=xlsx)
+    """
+    file_format = request.query_params.get('file_format', 'csv')
+    if file_format not in ['csv', 'xlsx']:
+        return Response({
+            'success': False,
+            'message': 'file_format must be csv or xlsx'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+    
+    order_by = directory_order_by(request.query_params.get('ordering', 'id'))
+    if order_by is None:
+        return directory_ordering_error()
+    clients = search_clients(User.objects.all(), request.query_params.get('search', ''))
+    
+    # values() rows read in keyset batches along the directory ordering; no model instances are built
+    rows = keyset_rows(clients, order_by, CLIENT_EXPORT_FIELDS)
+    try:
+        return export_response(file_format, 'clients', CLIENT_EXPORT_HEADER, rows)
+    except ImportError:
+        return Response({
+            'success': False,
+            'message': 'XLSX export requires openpyxl to be installed'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
 @api_view(['PUT'])
 @permission_classes([AllowAny]) 
 def update_client(request, client_id):
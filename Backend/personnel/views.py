@@ -3,7 +3,9 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.contrib.auth import authenticate
-from django.contrib.auth.hashers import check_password
+from django.conf import settings
+from authentication.jwe_utils import jwe_manager
+from authentication.hashing import HashPoolBusy, check_password
 from .models import Personnel
 from .serializers import PersonnelSerializer
 
@@ -55,10 +57,17 @@ class PersonnelViewSet(viewsets.ModelViewSet):
                         'message': 'Invalid credentials'
                     }, status=status.HTTP_401_UNAUTHORIZED)
 
-            # Check password
-            if personnel.check_password(password):
-                # Generate a simple token (in production, use proper JWT or session)
-                token = f"personnel_{personnel.id}_{personnel.username}"
+            # Check password (on the bounded hashing pool)
+            if check_password(personnel, password):
+                # Signed token whose claims authorize staff endpoints without a DB lookup
+                token = jwe_manager.create_token(
+                    user_id=personnel.id,
+                    username=personnel.username,
+                    expires_in_hours=settings.PERSONNEL_TOKEN_HOURS,
+                    user_type='personnel',
+                    position=personnel.position,
+                    role='admin' if personnel.is_superuser else 'staff'
+                )
                 
                 return Response({
                     'success': True,
@@ -83,6 +92,11 @@ class PersonnelViewSet(viewsets.ModelViewSet):
                     'message': 'Invalid credentials'
                 }, status=status.HTTP_401_UNAUTHORIZED)
 
+        except HashPoolBusy:
+            return Response({
+                'success': False,
+                'message': 'Too many sign-in attempts right now, please try again shortly'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '2'})
         except Exception as e:
             return Response({
                 'success': False,
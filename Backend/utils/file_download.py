@@ -0,0 +1,122 @@
+import re
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+_range_pattern = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class _RangeFile:
+    """Read-only view of `length` bytes of an open file starting at `start`.
+
+    It deliberately has no tell()/seek(), so FileResponse does not try to
+    work out a Content-Length from the whole file.
+    """
+
+    def __init__(self, file_obj, start, length):
+        file_obj.seek(start)
+        self.file_obj = file_obj
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file_obj.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file_obj.close()
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single `bytes=` range, None to send the whole
+    file, or False when the range cannot be satisfied.
+
+    Multiple ranges are answered with the whole file, which RFC 9110 allows.
+    """
+    match = _range_pattern.match(header.replace(' ', '')) if header else None
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    # Weak comparison, as If-None-Match requires
+    tags = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return etag in tags
+
+
+def serve_file(request, field_file, filename, size, content_type, etag, last_modified=None, as_attachment=False):
+    """Send a stored file with support for conditional and byte-range requests.
+
+    When ATTACHMENT_SENDFILE_HEADER is set ('X-Accel-Redirect' for nginx,
+    'X-Sendfile' for Apache/lighttpd) the body is left to the front proxy, which
+    then handles Range itself, and no file bytes pass through the worker.
+    """
+    etag = quote_etag(etag)
+    if _matches(request.headers.get('If-None-Match'), etag):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    sendfile_header = getattr(settings, 'ATTACHMENT_SENDFILE_HEADER', None)
+    if sendfile_header:
+        response = HttpResponse(content_type=content_type)
+        if sendfile_header == 'X-Accel-Redirect':
+            prefix = getattr(settings, 'ATTACHMENT_SENDFILE_PREFIX', '/protected-media/')
+            response[sendfile_header] = prefix + field_file.name
+        else:
+            response[sendfile_header] = field_file.path
+    else:
+        response_range = None
+        range_header = request.headers.get('Range')
+        if_range = request.headers.get('If-Range')
+        # A stale If-Range means the client's partial copy is outdated: send everything
+        if range_header and (not if_range or if_range == etag):
+            response_range = parse_range(range_header, size)
+
+        if response_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        file_obj = field_file.storage.open(field_file.name, 'rb')
+        if response_range:
+            start, end = response_range
+            response = FileResponse(_RangeFile(file_obj, start, end - start + 1), content_type=content_type, status=206)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = end - start + 1
+        else:
+            response = FileResponse(file_obj, content_type=content_type)
+            response['Content-Length'] = size
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Attachments never change once stored, only get replaced by new ids
+    response['Cache-Control'] = 'private, max-age=86400'
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    return response
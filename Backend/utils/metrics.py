@@ -0,0 +1,392 @@
+import atexit
+import glob
+import hmac
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; the same defaults as the official Prometheus clients
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry or REGISTRY
+        self._values = {}
+        self.registry.register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} takes labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """[(label values, value)] to write out; called with the registry lock held"""
+        return [[list(key), value] for key, value in self._values.items()]
+
+    def reset(self):
+        self._values = {}
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self.registry.touch()
+
+    def set_total(self, value, **labels):
+        """Mirror a count the code already keeps, e.g. a cache's own hit counter"""
+        key = self._key(labels)
+        with self.registry.lock:
+            self._values[key] = value
+
+
+class Gauge(Metric):
+    """A current value.
+
+    With per_process=True every worker reports its own value and the scrape
+    shows the sum over the live workers (e.g. entries in each worker's
+    cache). Gauges with per_process=False describe shared state such as a
+    database queue; they are set by a scrape collector in the process
+    answering the scrape and never written to the shared files.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), registry=None, per_process=True):
+        self.per_process = per_process
+        super().__init__(name, documentation, labelnames, registry)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), registry=None, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # Per-bucket (not cumulative) counts plus +Inf, then the sum
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self.registry.lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            entry[index] += 1
+            entry[-1] += value
+        self.registry.touch()
+
+    def samples(self):
+        return [[list(key), list(entry)] for key, entry in self._values.items()]
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+class Registry:
+    """In-process metrics, optionally shared between worker processes through files.
+
+    When METRICS_MULTIPROCESS_DIR is set, each process writes a snapshot of its
+    metrics to <dir>/metrics-<pid>.json every METRICS_FLUSH_INTERVAL seconds
+    (and on exit), and a scrape adds up the snapshots of every process. The
+    directory should be emptied whenever the service is (re)started.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.collectors = []
+        self.scrape_collectors = []
+        self._flusher = None
+        self._flusher_lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f'Metric {metric.name} is already registered')
+        self.metrics[metric.name] = metric
+
+    def on_collect(self, collector):
+        """Call `collector()` before every snapshot, to copy per-process stats into metrics"""
+        self.collectors.append(collector)
+        return collector
+
+    def on_scrape(self, collector):
+        """Call `collector()` only in the process answering a scrape, for shared state"""
+        self.scrape_collectors.append(collector)
+        return collector
+
+    @property
+    def directory(self):
+        return getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+
+    def touch(self):
+        """Start the background flusher the first time this process records something"""
+        if self._flusher is not None or not self.directory:
+            return
+        with self._flusher_lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_forever, name='metrics-flusher', daemon=True)
+                self._flusher.start()
+
+    def _flush_forever(self):
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+        event = threading.Event()
+        while not event.wait(interval):
+            self.flush()
+
+    def _after_fork(self):
+        # The child must not report what the parent recorded, and the parent's thread is gone
+        self.lock = threading.Lock()
+        self._flusher_lock = threading.Lock()
+        self._flusher = None
+        for metric in self.metrics.values():
+            metric.reset()
+
+    def collect(self):
+        for collector in self.collectors:
+            collector()
+
+    def snapshot(self, include_shared=False):
+        """{name: family} of this process' metrics"""
+        with self.lock:
+            families = {}
+            for metric in self.metrics.values():
+                if not include_shared and metric.kind == 'gauge' and not metric.per_process:
+                    continue
+                families[metric.name] = {
+                    'kind': metric.kind,
+                    'help': metric.documentation,
+                    'labels': list(metric.labelnames),
+                    'buckets': list(getattr(metric, 'buckets', ())),
+                    'samples': metric.samples(),
+                }
+            return families
+
+    def flush(self):
+        directory = self.directory
+        if not directory:
+            return
+        self.collect()
+        data = {'pid': os.getpid(), 'metrics': self.snapshot()}
+        os.makedirs(directory, exist_ok=True)
+        # Write then rename, so a scrape never reads half a file
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-')
+        try:
+            with os.fdopen(fd, 'w') as temp_file:
+                json.dump(data, temp_file)
+            os.replace(temp_path, os.path.join(directory, f'metrics-{os.getpid()}.json'))
+        except OSError:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def gather(self):
+        """Families to expose: this process alone, or every process sharing the directory"""
+        for collector in self.scrape_collectors:
+            collector()
+        if not self.directory:
+            self.collect()
+            return self.snapshot(include_shared=True)
+
+        self.flush()
+        families = {}
+        # This process first: its bucket layouts are the ones other snapshots must match
+        own_path = os.path.join(self.directory, f'metrics-{os.getpid()}.json')
+        paths = sorted(glob.glob(os.path.join(self.directory, 'metrics-*.json')), key=lambda path: path != own_path)
+        for path in paths:
+            try:
+                with open(path) as snapshot_file:
+                    data = json.load(snapshot_file)
+            except (OSError, ValueError):
+                continue
+            alive = _is_alive(data['pid'])
+            for name, family in data['metrics'].items():
+                # Counters and histograms of exited workers still count; their gauges do not
+                if family['kind'] == 'gauge' and not alive:
+                    continue
+                _merge(families, name, family)
+        for name, family in self.snapshot(include_shared=True).items():
+            if family['kind'] == 'gauge' and not self.metrics[name].per_process:
+                families[name] = family
+        return families
+
+
+def _is_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _merge(families, name, family):
+    merged = families.get(name)
+    if merged is None:
+        families[name] = {**family, 'samples': [[labels, list(value) if isinstance(value, list) else value]
+                                                for labels, value in family['samples']]}
+        return
+    if merged['kind'] != family['kind'] or merged['buckets'] != family['buckets']:
+        # A worker from an older deploy; its numbers cannot be added to these
+        return
+    by_labels = {tuple(sample[0]): sample for sample in merged['samples']}
+    for labels, value in family['samples']:
+        sample = by_labels.get(tuple(labels))
+        if sample is None:
+            sample = [labels, list(value) if isinstance(value, list) else value]
+            merged['samples'].append(sample)
+            by_labels[tuple(labels)] = sample
+        elif isinstance(value, list):
+            sample[1] = [a + b for a, b in zip(sample[1], value)]
+        else:
+            sample[1] += value
+
+
+REGISTRY = Registry()
+
+
+@atexit.register
+def _flush_at_exit():
+    # Only processes that recorded something leave a file behind
+    if REGISTRY._flusher is not None:
+        REGISTRY.flush()
+
+
+#---EXPOSITION---------------------------------------------------------------------------------
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        if math.isnan(value):
+            return 'NaN'
+        return repr(value)
+    return str(value)
+
+
+def _add_hit_ratios(families):
+    """cache_hit_ratio from the summed hit and miss counters, so it covers every worker"""
+    hits = families.get('cache_hits_total')
+    misses = families.get('cache_misses_total')
+    if not hits or not misses:
+        return
+    miss_counts = {tuple(labels): value for labels, value in misses['samples']}
+    samples = []
+    for labels, hit_count in hits['samples']:
+        lookups = hit_count + miss_counts.get(tuple(labels), 0)
+        samples.append([labels, hit_count / lookups if lookups else 0.0])
+    families['cache_hit_ratio'] = {
+        'kind': 'gauge',
+        'help': 'Share of cache lookups answered from the cache since the workers started',
+        'labels': hits['labels'],
+        'buckets': [],
+        'samples': samples,
+    }
+
+
+def render(families):
+    """Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    for name in sorted(families):
+        family = families[name]
+        lines.append(f'# HELP {name} {family["help"]}')
+        lines.append(f'# TYPE {name} {family["kind"]}')
+        for labels, value in sorted(family['samples']):
+            pairs = list(zip(family['labels'], labels))
+            if family['kind'] != 'histogram':
+                lines.append(f'{name}{_format_labels(pairs)} {_format_value(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(family['buckets'] + [math.inf], value[:-1]):
+                cumulative += count
+                le = '+Inf' if math.isinf(bound) else repr(float(bound))
+                lines.append(f'{name}_bucket{_format_labels(pairs + [("le", le)])} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(pairs)} {_format_value(value[-1])}')
+            lines.append(f'{name}_count{_format_labels(pairs)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """GET /metrics for Prometheus; requires `Authorization: Bearer <METRICS_TOKEN>`.
+
+    Without a METRICS_TOKEN the endpoint is only open while DEBUG is on, so a
+    deployment never exposes it by accident.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+            return HttpResponseForbidden('Invalid metrics token\n', content_type='text/plain')
+    elif not settings.DEBUG:
+        return HttpResponseForbidden('Set METRICS_TOKEN to enable /metrics\n', content_type='text/plain')
+    families = REGISTRY.gather()
+    _add_hit_ratios(families)
+    return HttpResponse(render(families), content_type=CONTENT_TYPE)
+
+
+#---SHARED METRICS-----------------------------------------------------------------------------
+
+CACHE_HITS = Counter('cache_hits_total', 'Cache lookups answered from the cache', ['cache'])
+CACHE_MISSES = Counter('cache_misses_total', 'Cache lookups that had to compute or load the value', ['cache'])
+CACHE_ENTRIES = Gauge('cache_entries', 'Entries held in the in-process cache, summed over live workers', ['cache'])
+
+
+def register_cache(name, stats):
+    """Export an in-process cache whose `stats()` returns hits, misses and entries"""
+    def collect():
+        values = stats()
+        CACHE_HITS.set_total(values['hits'], cache=name)
+        CACHE_MISSES.set_total(values['misses'], cache=name)
+        CACHE_ENTRIES.set(values['entries'], cache=name)
+    REGISTRY.on_collect(collect)
@@ -0,0 +1,113 @@
+import json
+import re
+from contextlib import contextmanager
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+_sqlite_scan = re.compile(r'\bSCAN (\S+)(.*)$')
+
+
+def explain(queryset):
+    """The database's plan for `queryset`, as text (SQLite) or parsed JSON (MySQL, PostgreSQL)"""
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        return queryset.explain()
+    return json.loads(queryset.explain(format='json'))
+
+
+def explain_sql(sql, using='default'):
+    """explain() for a statement captured from the real code, with its parameters inlined"""
+    connection = connections[using]
+    prefix = {
+        'sqlite': 'EXPLAIN QUERY PLAN ',
+        'mysql': 'EXPLAIN FORMAT=JSON ',
+        'postgresql': 'EXPLAIN (FORMAT JSON) ',
+    }.get(connection.vendor)
+    if prefix is None:
+        raise NotImplementedError(f'No plan parser for {connection.vendor}')
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql)
+        rows = cursor.fetchall()
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail) per plan step
+        return '\n'.join(row[-1] for row in rows)
+    plan = rows[0][0]
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+def _table_scans(vendor, plan):
+    if vendor == 'sqlite':
+        scans = []
+        for line in plan.splitlines():
+            match = _sqlite_scan.search(line)
+            # "SCAN t USING [COVERING] INDEX i" walks an index; a bare "SCAN t" reads the table
+            if match and 'USING' not in match.group(2) and match.group(1) != 'CONSTANT':
+                scans.append(match.group(1))
+        return scans
+    if vendor == 'mysql':
+        return [node.get('table_name') for node in _nodes(plan) if node.get('access_type') == 'ALL']
+    if vendor == 'postgresql':
+        return [node.get('Relation Name') for node in _nodes(plan) if node.get('Node Type') == 'Seq Scan']
+    raise NotImplementedError(f'No plan parser for {vendor}')
+
+
+def full_table_scans(queryset):
+    """Names of the tables `queryset` reads row by row instead of through an index.
+
+    A scan over an index (ordered reads, covering indexes) does not count.
+    """
+    return _table_scans(connections[queryset.db].vendor, explain(queryset))
+
+
+def analyze_tables(*models, using='default'):
+    """Refresh planner statistics so plans match a populated database"""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('ANALYZE')
+            return
+        for model in models:
+            table = connection.ops.quote_name(model._meta.db_table)
+            if connection.vendor == 'mysql':
+                cursor.execute(f'ANALYZE TABLE {table}')
+                cursor.fetchall()
+            else:
+                cursor.execute(f'ANALYZE {table}')
+
+
+def _nodes(plan):
+    """Every dict in a JSON plan, depth first"""
+    if isinstance(plan, dict):
+        yield plan
+        for value in plan.values():
+            yield from _nodes(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _nodes(value)
+
+
+class QueryPlanAssertions:
+    """TestCase mixin for plan regression tests"""
+
+    def assertIndexed(self, queryset):
+        scans = full_table_scans(queryset)
+        if scans:
+            self.fail(f'Full table scan of {", ".join(scans)}:\n{explain(queryset)}\n\n{queryset.query}')
+
+    @contextmanager
+    def assertQueriesIndexed(self, using='default'):
+        """Every SELECT run inside the block must be answered through an index.
+
+        Checks the statements the real code sends (views, paginators,
+        aggregate() calls), not a hand-made copy of its queryset.
+        """
+        connection = connections[using]
+        with CaptureQueriesContext(connection) as captured:
+            yield captured
+        selects = [query['sql'] for query in captured.captured_queries if query['sql'].lstrip().upper().startswith('SELECT')]
+        self.assertTrue(selects, 'No SELECT was run')
+        for sql in selects:
+            plan = explain_sql(sql, using)
+            scans = _table_scans(connection.vendor, plan)
+            if scans:
+                self.fail(f'Full table scan of {", ".join(scans)}:\n{plan}\n\n{sql}')
@@ -0,0 +1,173 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from rest_framework.renderers import JSONRenderer
+from .metrics import Histogram
+
+logger = logging.getLogger('request_metrics')
+
+_current = ContextVar('request_metrics', default=None)
+
+# IN (%s, %s, ...) lists of different lengths are the same query shape
+_in_list = re.compile(r'IN \((?:%s, )*%s\)')
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time to build the response, by URL name',
+    ['view', 'method', 'status'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries per request, by URL name',
+    ['view', 'method'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 500, 1000)
+)
+
+
+class RequestMetrics:
+    """Query count and time spent per phase for the request being handled"""
+
+    __slots__ = ('started', 'queries', 'db_time', 'phases', 'statements')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.phases = {}
+        # SQL text (parameters are separate, so equal text means the same statement) -> [count, seconds]
+        self.statements = {}
+
+    def record_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        entry = self.statements.get(sql)
+        if entry is None:
+            self.statements[sql] = [1, duration]
+        else:
+            entry[0] += 1
+            entry[1] += duration
+
+    def add(self, phase, duration):
+        self.phases[phase] = self.phases.get(phase, 0.0) + duration
+
+    def duplicates(self, limit=5):
+        """Statements run more than once, most repeated first: the usual sign of an N+1"""
+        merged = Counter()
+        merged_time = Counter()
+        for sql, (count, duration) in self.statements.items():
+            fingerprint = _in_list.sub('IN (...)', sql)
+            merged[fingerprint] += count
+            merged_time[fingerprint] += duration
+        return [
+            {'fingerprint': fingerprint[:300], 'count': count, 'db_ms': round(merged_time[fingerprint] * 1000, 2)}
+            for fingerprint, count in merged.most_common(limit)
+            if count > 1
+        ]
+
+
+def current_metrics():
+    """Metrics of the request being handled on this thread, or None"""
+    return _current.get()
+
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block to `phase` of the current request; a no-op outside one"""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(phase, time.perf_counter() - started)
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that reports its work as the request's "serialize" phase"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('serialize'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class RequestMetricsMiddleware:
+    """Count and time every database query of a request.
+
+    Adds a Server-Timing header (db, serialize, external, total) and logs a
+    JSON line for requests slower than REQUEST_METRICS_SLOW_MS or with more
+    than REQUEST_METRICS_SLOW_QUERIES queries, including the statements that
+    ran repeatedly. Per query the cost is one wrapper call and a dict
+    update, so it can stay on in production.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'REQUEST_METRICS_SERVER_TIMING', True)
+        self.slow_ms = getattr(settings, 'REQUEST_METRICS_SLOW_MS', 500)
+        self.slow_queries = getattr(settings, 'REQUEST_METRICS_SLOW_QUERIES', 50)
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                # Wrappers sit on this thread's connection objects, so they also
+                # cover a database connection that is only opened later in the request
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self.record))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        total = time.perf_counter() - metrics.started
+        match = getattr(request, 'resolver_match', None)
+        # Unmatched paths share one label so scanners cannot create new series
+        view = match.view_name if match else 'unmatched'
+        REQUEST_LATENCY.observe(total, view=view, method=request.method, status=response.status_code)
+        REQUEST_QUERIES.observe(metrics.queries, view=view, method=request.method)
+        if self.server_timing:
+            response['Server-Timing'] = self.header(metrics, total)
+        if total * 1000 >= self.slow_ms or metrics.queries > self.slow_queries:
+            self.log_slow(request, response, metrics, total)
+        return response
+
+    def record(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            metrics = _current.get()
+            if metrics is not None:
+                metrics.record_query(sql, time.perf_counter() - started)
+
+    def header(self, metrics, total):
+        parts = [f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"']
+        for phase in ('serialize', 'external'):
+            if phase in metrics.phases:
+                parts.append(f'{phase};dur={metrics.phases[phase] * 1000:.1f}')
+        parts.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(parts)
+
+    def log_slow(self, request, response, metrics, total):
+        match = getattr(request, 'resolver_match', None)
+        logger.warning(json.dumps({
+            'event': 'slow_request',
+            'method': request.method,
+            'path': request.path,
+            'route': match.route if match else None,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'duration_ms': round(total * 1000, 1),
+            'db_ms': round(metrics.db_time * 1000, 1),
+            'queries': metrics.queries,
+            'phases_ms': {phase: round(duration * 1000, 1) for phase, duration in metrics.phases.items()},
+            'duplicates': metrics.duplicates(),
+        }))
+
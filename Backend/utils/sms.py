@@ -1,15 +1,111 @@
+import re
 import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from .metrics import Counter, Histogram
+from .request_metrics import timed
 
-SEMAPHORE_API_KEY = 'removed api key for safety purposes(please do not commit api key)'  # Consider using environment variables
-SEMAPHORE_SENDER_NAME = 'removed sender name for safety purposes'  # Use your registered sender name
 SEMAPHORE_URL = 'https://api.semaphore.co/api/v4/messages'
+# Semaphore accepts up to 1000 comma separated numbers per bulk request
+SEMAPHORE_BULK_LIMIT = 1000
+
+SMS_SEND_LATENCY = Histogram(
+    'sms_send_duration_seconds', 'Semaphore API request time, including failed requests',
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+SMS_SEND_FAILURES = Counter('sms_send_failures_total', 'Semaphore sends that raised SmsError', ['retryable'])
+
+
+_non_digits = re.compile(r'\D')
+
+
+def normalize_number(number):
+    """A Philippine mobile number in the local 0XXXXXXXXXX form we store.
+
+    The gateway reports recipients as 639XXXXXXXXX, and numbers may be typed
+    with +63, spaces or dashes, so both sides are compared in this form.
+    """
+    digits = _non_digits.sub('', str(number or ''))
+    if digits.startswith('63') and len(digits) == 12:
+        return '0' + digits[2:]
+    if digits.startswith('9') and len(digits) == 10:
+        return '0' + digits
+    return digits
+
+
+class SmsError(Exception):
+    """Sending failed; `retryable` is False when resending the same request cannot succeed"""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class SemaphoreClient:
+    """Semaphore API client reusing pooled keep-alive connections across sends"""
+
+    def __init__(self, api_key=None, sender_name=None, url=None, timeout=None, pool_size=4):
+        self.api_key = api_key or settings.SEMAPHORE_API_KEY
+        self.sender_name = sender_name or settings.SEMAPHORE_SENDER_NAME
+        self.url = url or getattr(settings, 'SEMAPHORE_URL', SEMAPHORE_URL)
+        self.timeout = timeout or getattr(settings, 'SMS_TIMEOUT', 10)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def send(self, numbers, message):
+        """Send one message to up to SEMAPHORE_BULK_LIMIT numbers in a single request.
+
+        Returns {normalize_number(recipient): message_id} for the recipients
+        the gateway accepted. Raises SmsError on network errors and error responses.
+        """
+        try:
+            with SMS_SEND_LATENCY.time():
+                return self._send(numbers, message)
+        except SmsError as e:
+            SMS_SEND_FAILURES.inc(retryable=str(e.retryable).lower())
+            raise
+
+    def _send(self, numbers, message):
+        payload = {
+            'apikey': self.api_key,
+            'number': ','.join(numbers),
+            'message': message,
+            'sendername': self.sender_name
+        }
+        try:
+            with timed('external'):
+                response = self.session.post(self.url, data=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise SmsError(f'{type(e).__name__}: {e}')
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise SmsError(f'HTTP {response.status_code}: {response.text[:200]}')
+        if response.status_code >= 400:
+            raise SmsError(f'HTTP {response.status_code}: {response.text[:200]}', retryable=False)
+
+        try:
+            result = response.json()
+        except ValueError:
+            raise SmsError(f'Unexpected response: {response.text[:200]}')
+        # Validation problems come back as {"field": ["error", ...]} with a 200
+        if not isinstance(result, list):
+            raise SmsError(f'Rejected: {result}', retryable=False)
+        return {
+            normalize_number(item.get('recipient')): str(item.get('message_id'))
+            for item in result
+            if isinstance(item, dict)
+        }
+
+    def close(self):
+        self.session.close()
+
 
 def send_sms(phone_number, message):
-    payload = {
-        'apikey': SEMAPHORE_API_KEY,
-        'number': phone_number,
-        'message': message,
-        'sendername': SEMAPHORE_SENDER_NAME
-    }
-    response = requests.post(SEMAPHORE_URL, data=payload)
-    return response
+    """Send a single SMS right away. Appointment notifications go through SmsOutbox instead."""
+    client = SemaphoreClient()
+    try:
+        return client.send([phone_number], message)
+    finally:
+        client.close()
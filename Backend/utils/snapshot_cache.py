@@ -0,0 +1,42 @@
+import time
+from django.core.cache import cache
+from .metrics import CACHE_HITS, CACHE_MISSES
+
+
+def get_snapshot(key, compute, ttl, stale_ttl=None, lock_timeout=30, wait=5.0):
+    """Return a cached value, recomputing it in at most one worker at a time.
+
+    The value is fresh for `ttl` seconds and then kept for another `stale_ttl`
+    seconds. Once it is stale, the first caller to take the refresh lock
+    recomputes it while everyone else keeps getting the previous snapshot.
+    Only when there is no snapshot at all do other callers wait (up to `wait`
+    seconds) for the worker doing the computation.
+    """
+    stale_ttl = ttl * 10 if stale_ttl is None else stale_ttl
+    lock_key = f'{key}:refresh-lock'
+
+    entry = cache.get(key)
+    if entry is not None and entry['expires_at'] > time.time():
+        CACHE_HITS.inc(cache='snapshot')
+        return entry['value']
+    CACHE_MISSES.inc(cache='snapshot')
+
+    if cache.add(lock_key, True, lock_timeout):
+        try:
+            value = compute()
+            cache.set(key, {'value': value, 'expires_at': time.time() + ttl}, ttl + stale_ttl)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    if entry is not None:
+        return entry['value']
+
+    # Cold cache and another worker is computing: wait for its result
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry['value']
+    return compute()
@@ -0,0 +1,61 @@
+import zipfile
+from django.http import StreamingHttpResponse
+
+ZIP_BLOCK_SIZE = 64 * 1024
+
+
+class _Sink:
+    """Write-only stream that keeps what zipfile writes until it is collected.
+
+    Having no seek()/tell() makes zipfile write data descriptors after each
+    member instead of going back to patch local headers, so the archive can
+    be sent as it is produced.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def collect(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _zip_chunks(members):
+    """Yield a ZIP archive of `members`, an iterable of (arcname, open_file, date_time),
+    where open_file() returns a readable binary file.
+
+    Each file is read in blocks and handed on straight away, so memory use
+    does not depend on file sizes; zipfile only keeps a small central
+    directory entry per member until the end. Attachments are mostly PDFs and
+    images, which do not compress further, so members are stored as-is.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        for arcname, open_file, date_time in members:
+            info = zipfile.ZipInfo(arcname, date_time=date_time.timetuple()[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            with open_file() as source, archive.open(info, mode='w', force_zip64=True) as target:
+                for block in iter(lambda: source.read(ZIP_BLOCK_SIZE), b''):
+                    target.write(block)
+                    yield sink.collect()
+            yield sink.collect()
+    # Central directory
+    yield sink.collect()
+
+
+def zip_stream(members):
+    return (chunk for chunk in _zip_chunks(members) if chunk)
+
+
+def zip_response(filename, members):
+    response = StreamingHttpResponse(zip_stream(members), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.zip"'
+    return response
@@ -14,6 +14,7 @@ import {
 } from "lucide-react";
 import { ToastContainer, toast } from 'react-toastify';
 import 'react-toastify/dist/ReactToastify.css';
+import { fetchAllAppointments } from '../utils/appointments';
 
 
 const ClientAppointment = ({ setIsModalOpen }) => {
@@ -52,8 +53,8 @@ const ClientAppointment = ({ setIsModalOpen }) => {
         url += `?client_id=${clientId}&status=Pending,Confirmed,Cancelled,Completed`;
       }
 
-      const response = await fetch(url);
-      const data = await response.json();
+      // Every page, not just the first 50
+      const data = await fetchAllAppointments(url);
 
       if (data.success) {
         const formattedAppointments = data.data
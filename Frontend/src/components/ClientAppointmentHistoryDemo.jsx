@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Upload, X, Eye, Star } from 'lucide-react';
+import { fetchAllAppointments } from '../utils/appointments';
 
 const ClientAppointmentHistory = () => {
   const [appointments, setAppointments] = useState([]);
@@ -27,8 +28,8 @@ const ClientAppointmentHistory = () => {
         url += `?client_id=${clientId}&status=Completed,Cancelled`;
       }
 
-      const response = await fetch(url);
-      const data = await response.json();
+      // Every page, not just the first 50
+      const data = await fetchAllAppointments(url);
 
       if (data.success) {
         setAppointments(data.data.map(appointment => ({
@@ -36,7 +36,6 @@ const ProtectedRoute = ({ children, requiredUserType, requiredPosition }) => {
     useEffect(() => {
         const checkAuth = async () => {
             const authToken = localStorage.getItem('authToken');
-            const userType = localStorage.getItem('userType');
             const isDemo = localStorage.getItem('isDemo') === 'true';
 
             // Check if user is logged in
@@ -45,15 +44,6 @@ const ProtectedRoute = ({ children, requiredUserType, requiredPosition }) => {
                 return;
             }
 
-            // For demo admin
-            if (isDemo && userType === 'admin') {
-                const allowedTypes = Array.isArray(requiredUserType) ? requiredUserType : [requiredUserType];
-                if (allowedTypes.includes('admin')) {
-                    setIsAuthorized(true);
-                    return;
-                }
-            }
-
             // For real users with tokens
             if (authToken && !isDemo) {
                 const payload = await decryptJWEToken(authToken);
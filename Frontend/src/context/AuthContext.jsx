@@ -25,6 +25,7 @@ export function AuthProvider({ children }) {
 
   const logout = () => {
     localStorage.removeItem('authToken');
+    localStorage.removeItem('apiToken');
     localStorage.removeItem('userType');
     setUser(null);
   };
@@ -197,10 +197,22 @@ export default function ClientAppointmentSystem() {
 useEffect(() => {
   const fetchFullDates = async () => {
     try {
-      const res = await fetch("/api/client-appointments/full_dates/");
+      // Only the bookable window is needed, not the whole appointment history
+      const today = new Date();
+      const until = new Date(today);
+      until.setDate(until.getDate() + 90);
+      const params = new URLSearchParams({
+        date_from: today.toISOString().split("T")[0],
+        date_to: until.toISOString().split("T")[0],
+      });
+      const res = await fetch(`/api/client-appointments/availability/?${params}`);
       const result = await res.json();
       if (result.success) {
-        setFullyBookedDates(result.data); // Dates in 'YYYY-MM-DD' format
+        setFullyBookedDates(
+          result.data.days
+            .filter((day) => day.remaining === 0)
+            .map((day) => day.date) // Dates in 'YYYY-MM-DD' format
+        );
       }
     } catch (err) {
       console.error("Failed to fetch fully booked dates:", err);
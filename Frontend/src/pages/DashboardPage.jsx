@@ -19,6 +19,7 @@ import AppointmentNature from "./AppointmentNature";
 import { useNavigate } from "react-router-dom";
 import { useAuth } from "../context/AuthContext";
 import { AppointmentList } from "./Personel";
+import { fetchAllAppointments } from "../utils/appointments";
 
 const COLORS = ['#0088FE', '#00C49F', '#FFBB28', '#FF8042', '#8884D8', '#FF6F61', '#6B7280'];
 
@@ -316,11 +317,8 @@ export default function DashboardPage() {
   useEffect(() => {
     const fetchAppointments = async () => {
       try {
-        const response = await fetch("/api/client-appointments/");
-        if (!response.ok) {
-          throw new Error("Failed to fetch appointments");
-        }
-        const data = await response.json();
+        // Every page, not just the first 50, so the feedback stats cover all appointments
+        const data = await fetchAllAppointments("/api/client-appointments/");
         if (data.success) {
           const processedAppointments = data.data.map((app) => ({
             id: app.id,
@@ -367,7 +365,10 @@ export default function DashboardPage() {
   useEffect(() => {
     const fetchDashboardStats = async () => {
       try {
-        const response = await fetch("/api/client-appointments/dashboard_stats/");
+        const apiToken = localStorage.getItem("apiToken");
+        const response = await fetch("/api/client-appointments/dashboard_stats/", {
+          headers: apiToken ? { Authorization: `Bearer ${apiToken}` } : {},
+        });
         if (!response.ok) {
           throw new Error("Failed to fetch dashboard stats");
         }
@@ -402,6 +403,7 @@ export default function DashboardPage() {
 
   const handleLogout = () => {
     localStorage.removeItem("authToken");
+    localStorage.removeItem("apiToken");
     localStorage.removeItem("userType");
     localStorage.removeItem("clientData");
     localStorage.removeItem("isDemo");
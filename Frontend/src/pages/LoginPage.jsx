@@ -103,16 +103,7 @@ export default function LoginPage() {
             throw new Error('Please enter both username and password');
         }
 
-        // 1. Try Admin (Demo only)
-        if (username === 'admin' && password === 'admin123') {
-            localStorage.setItem('userType', 'admin');
-            localStorage.setItem('isDemo', 'true');
-
-            navigate('/dashboard', { replace: true });
-            return;
-        }
-
-        // 2. Try Personnel Login
+        // 1. Try Personnel Login (administrators sign in as Head of Office personnel)
         const personnelResponse = await fetch('/api/personnel/personnel/login/', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
@@ -135,6 +126,8 @@ export default function LoginPage() {
                 const jweToken = await createJWEToken(tokenPayload);
 
                 localStorage.setItem('authToken', jweToken);
+                // Server-issued token for staff-only API endpoints
+                localStorage.setItem('apiToken', personnelData.data.token);
                 localStorage.setItem('userType', 'personnel');
                 localStorage.setItem('personnelData', JSON.stringify(personnel));
                 localStorage.setItem('isDemo', 'false');
@@ -145,7 +138,7 @@ export default function LoginPage() {
             }
         }
 
-        // 3. Try Client Login
+        // 2. Try Client Login
         const clientResponse = await fetch('/api/clients/login/', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
@@ -18,6 +18,7 @@ import { useNavigate } from "react-router-dom";
 import PersonnelProfile from "../components/PersonnelProfile";
 import { ToastContainer, toast } from 'react-toastify';
 import 'react-toastify/dist/ReactToastify.css';
+import { fetchAllAppointments } from "../utils/appointments";
 export function AppointmentList() {
   const [isConfirmModalOpen, setIsConfirmModalOpen] = useState(false);
   const [isRescheduleModalOpen, setIsRescheduleModalOpen] = useState(false);
@@ -225,16 +226,11 @@ const position = getPersonnelData()?.position?.toLowerCase() || "";
         throw new Error("Personnel data not found");
       }
 
-      const response = await fetch(
+      // Every page, not just the first 50
+      const data = await fetchAllAppointments(
         `http://localhost:8000/api/client-appointments/?officer_id=${personnel.id}`
       );
 
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-
-      const data = await response.json();
-
       if (data.success) {
         const filteredAppointments = data.data.filter(
           (appt) => appt.assigned_officer === personnel.id
@@ -984,6 +980,7 @@ export default function PersonnelDashboard() {
 
   const handleLogout = () => {
     localStorage.removeItem("authToken");
+    localStorage.removeItem("apiToken");
     localStorage.removeItem("userType");
     localStorage.removeItem("personnelData");
     localStorage.removeItem("isDemo");
@@ -303,12 +303,18 @@ const ClientModal = ({
   );
 };
 
+const PAGE_SIZE = 50;
+const SEARCH_DEBOUNCE_MS = 300;
+
 export default function Clients() {
   const [clients, setClients] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [sortConfig, setSortConfig] = useState({ key: null, direction: 'asc' });
   const [searchTerm, setSearchTerm] = useState('');
+  const [debouncedSearch, setDebouncedSearch] = useState('');
+  const [page, setPage] = useState(1);
+  const [hasNext, setHasNext] = useState(false);
   const [isModalOpen, setIsModalOpen] = useState(false);
   const [isEditMode, setIsEditMode] = useState(false);
   const [currentClientId, setCurrentClientId] = useState(null);
@@ -344,13 +350,21 @@ export default function Clients() {
     return age;
   };
 
-  // Fetch clients from Django API
+  // Fetch one page of clients from Django API; search and sorting happen on the server
   const fetchClients = async () => {
     try {
       setLoading(true);
       setError(null);
       
-      const response = await fetch(`${API_BASE_URL}/clients/list/`, {
+      const params = new URLSearchParams({ page: String(page), page_size: String(PAGE_SIZE) });
+      if (debouncedSearch) {
+        params.set('search', debouncedSearch);
+      }
+      if (sortConfig.key) {
+        params.set('ordering', `${sortConfig.direction === 'desc' ? '-' : ''}${sortConfig.key}`);
+      }
+      
+      const response = await fetch(`${API_BASE_URL}/clients/list/?${params}`, {
         method: 'GET',
         headers: {
           'Content-Type': 'application/json',
@@ -365,6 +379,7 @@ export default function Clients() {
       
       if (data.success) {
         setClients(data.data);
+        setHasNext(data.has_next);
       } else {
         throw new Error(data.message || 'Failed to fetch clients');
       }
@@ -376,10 +391,19 @@ export default function Clients() {
     }
   };
 
-  // Load clients when component mounts
+  // Load clients on mount and whenever the page, sort or search changes
   useEffect(() => {
     fetchClients();
-  }, []);
+  }, [page, sortConfig, debouncedSearch]);
+
+  // Search as the user types, after a short pause
+  useEffect(() => {
+    const timer = setTimeout(() => {
+      setPage(1);
+      setDebouncedSearch(searchTerm.trim());
+    }, SEARCH_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
 
   // Handle edit action
   const handleEdit = (client) => {
@@ -492,31 +516,12 @@ export default function Clients() {
     if (sortConfig.key === key && sortConfig.direction === 'asc') {
       direction = 'desc';
     }
+    setPage(1);
     setSortConfig({ key, direction });
   };
 
-  // Sort clients
-  const sortedClients = [...clients].sort((a, b) => {
-    if (sortConfig.key) {
-      const aValue = a[sortConfig.key];
-      const bValue = b[sortConfig.key];
-      
-      if (aValue < bValue) {
-        return sortConfig.direction === 'asc' ? -1 : 1;
-      }
-      if (aValue > bValue) {
-        return sortConfig.direction === 'asc' ? 1 : -1;
-      }
-    }
-    return 0;
-  });
-
-  // Filter clients based on search term
-  const filteredClients = sortedClients.filter(client =>
-    Object.values(client).some(value => 
-      value && value.toString().toLowerCase().includes(searchTerm.toLowerCase())
-    )
-  );
+  // The server already returns the page filtered and sorted
+  const filteredClients = clients;
 
   // Refresh clients
   const handleRefresh = () => {
@@ -533,7 +538,7 @@ export default function Clients() {
           <div className="p-6 border-b border-gray-200">
             <div className="flex justify-between items-center">
               <h2 className="text-2xl font-bold text-slate-800">
-                Clients ({clients.length})
+                Clients
               </h2>
               <div className="flex gap-4">
                 <input
@@ -588,9 +593,27 @@ export default function Clients() {
           {/* Results Info */}
           {!loading && !error && (
             <div className="px-6 py-4 border-t border-gray-200 bg-gray-50">
-              <p className="text-sm text-gray-600">
-                Showing {filteredClients.length} of {clients.length} clients
-              </p>
+              <div className="flex justify-between items-center">
+                <p className="text-sm text-gray-600">
+                  Page {page} · showing {clients.length} clients
+                </p>
+                <div className="flex gap-2">
+                  <button
+                    onClick={() => setPage(page - 1)}
+                    disabled={page === 1}
+                    className="px-3 py-1 border border-gray-300 rounded-lg text-sm disabled:opacity-50"
+                  >
+                    Previous
+                  </button>
+                  <button
+                    onClick={() => setPage(page + 1)}
+                    disabled={!hasNext}
+                    className="px-3 py-1 border border-gray-300 rounded-lg text-sm disabled:opacity-50"
+                  >
+                    Next
+                  </button>
+                </div>
+              </div>
             </div>
           )}
         </div>
@@ -0,0 +1,27 @@
+// GET /api/client-appointments/ returns one keyset page at a time
+// ({ data, next_cursor, has_next }); this follows the cursor to the end.
+const PAGE_SIZE = 500;
+
+export const fetchAllAppointments = async (url, options = {}) => {
+  const separator = url.includes("?") ? "&" : "?";
+  const appointments = [];
+  let cursor = null;
+
+  do {
+    const pageUrl =
+      `${url}${separator}page_size=${PAGE_SIZE}` +
+      (cursor ? `&cursor=${encodeURIComponent(cursor)}` : "");
+    const response = await fetch(pageUrl, options);
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    const page = await response.json();
+    if (!page.success) {
+      return { success: false, data: appointments, message: page.message };
+    }
+    appointments.push(...page.data);
+    cursor = page.has_next ? page.next_cursor : null;
+  } while (cursor);
+
+  return { success: true, data: appointments };
+};